@@ -1,3 +1,8 @@
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional, Sequence
+
 import instructor
 from langchain_core.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
@@ -12,7 +17,12 @@ Answer: Let's think step by step."""
 prompt = PromptTemplate(template=template, input_variables=["question"])
 
 
-def get_model(model_name: str = "x-ai/grok-4-fast", temperature: float = 0.7):
+def get_model(
+    model_name: str = "x-ai/grok-4-fast",
+    temperature: float = 0.7,
+    timeout: Optional[float] = None,
+    max_retries: int = 2,
+):
     """
     Returns a chat model instance connected to OpenRouter.
     You can change 'model_name' to any model on OpenRouter.
@@ -22,32 +32,172 @@ def get_model(model_name: str = "x-ai/grok-4-fast", temperature: float = 0.7):
         api_key=config.OPENROUTER_API_KEY,
         base_url="https://openrouter.ai/api/v1",
         temperature=temperature,
+        timeout=timeout,
+        max_retries=max_retries,
     )
 
 
-# For Instructor-based structured output
-def get_instructor(model_name: str = "x-ai/grok-4-fast", message: str = ""):
-    """
-    Returns an Instructor model instance.
-    You can change 'model_name' to any model supported by Instructor.
+# -------------------------------------------
+# PER-NODE MODEL TIERS
+# -------------------------------------------
+
+
+class ModelUsage:
+    """Thread-safe per-node counters of which tier served each LLM call."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._nodes: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, node: str, tier: str, latency_s: float, fell_back: bool) -> None:
+        with self._lock:
+            stats = self._nodes.setdefault(
+                node, {"calls": 0, "fallbacks": 0, "tiers": {}, "total_latency_s": 0.0}
+            )
+            stats["calls"] += 1
+            stats["fallbacks"] += int(fell_back)
+            stats["tiers"][tier] = stats["tiers"].get(tier, 0) + 1
+            stats["total_latency_s"] += latency_s
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                node: {
+                    "calls": s["calls"],
+                    "fallbacks": s["fallbacks"],
+                    "tiers": dict(s["tiers"]),
+                    "avg_latency_s": round(s["total_latency_s"] / s["calls"], 3),
+                }
+                for node, s in self._nodes.items()
+            }
+
+
+model_usage = ModelUsage()
+
+
+def node_tier(node: str) -> str:
+    return config.NODE_MODEL_TIERS.get(node, "strong")
+
+
+def node_model_name(node: str) -> str:
+    return config.MODEL_FAST if node_tier(node) == "fast" else config.MODEL_STRONG
+
+
+class TieredChatModel:
+    """Chat model for one graph node: the model of the node's tier, with MODEL_FALLBACK
+    taking over when a call errors out or exceeds the node's latency SLO.
+
+    The SLO is enforced as the primary model's request timeout (no retries), so a slow
+    call costs at most one SLO before the fallback answers. The serving tier is
+    recorded in `model_usage` and in the response's `response_metadata["model_tier"]`.
     """
+
+    def __init__(self, node: str, temperature: float = 0.7) -> None:
+        self.node = node
+        self.tier = node_tier(node)
+        self.slo_s = config.NODE_LATENCY_SLO_S.get(node)
+        self.client = get_model(
+            node_model_name(node), temperature, timeout=self.slo_s, max_retries=0
+        )
+        self.fallback_client = get_model(config.MODEL_FALLBACK, temperature)
+        self._primary: Any = self.client
+        self._fallback: Any = self.fallback_client
+
+    @property
+    def root_client(self):
+        return self.client.root_client
+
+    def bind_tools(self, tools: Sequence[Any]) -> "TieredChatModel":
+        bound = TieredChatModel.__new__(TieredChatModel)
+        bound.__dict__.update(self.__dict__)
+        bound._primary = self.client.bind_tools(tools)
+        bound._fallback = self.fallback_client.bind_tools(tools)
+        return bound
+
+    def _served(self, response, tier: str, started: float, fell_back: bool):
+        model_usage.record(self.node, tier, time.perf_counter() - started, fell_back)
+        response.response_metadata["model_tier"] = tier
+        return response
+
+    def invoke(self, messages, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._served(
+                self._primary.invoke(messages, **kwargs), self.tier, started, False
+            )
+        except Exception as e:
+            print(f"⚠️ {self.node}: {self.tier} model failed ({e!r}), using fallback")
+        return self._served(
+            self._fallback.invoke(messages, **kwargs), "fallback", started, True
+        )
+
+    async def ainvoke(self, messages, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._served(
+                await self._primary.ainvoke(messages, **kwargs),
+                self.tier,
+                started,
+                False,
+            )
+        except Exception as e:
+            print(f"⚠️ {self.node}: {self.tier} model failed ({e!r}), using fallback")
+        return self._served(
+            await self._fallback.ainvoke(messages, **kwargs), "fallback", started, True
+        )
+
+
+def get_node_model(node: str, temperature: float = 0.7) -> TieredChatModel:
+    """Returns the tiered chat model configured for a graph node (see NODE_MODEL_TIERS)."""
+    return TieredChatModel(node, temperature)
+
+
+# One client per process: reuses the HTTP connection pool across router calls
+@lru_cache()
+def get_instructor_client():
     client = OpenAI(
         base_url="https://openrouter.ai/api/v1", api_key=config.OPENROUTER_API_KEY
     )
+    return instructor.from_openai(client, mode=instructor.Mode.JSON)
 
-    instructor_client = instructor.from_openai(client, mode=instructor.Mode.JSON)
 
-    return instructor_client.chat.completions.create(
-        model=model_name,
+# For Instructor-based structured output
+def get_instructor(model_name: Optional[str] = None, message: str = ""):
+    """
+    Returns an Instructor model instance.
+    Defaults to the router node's tier (NODE_MODEL_TIERS["router"]); falls back to
+    MODEL_FALLBACK when the call errors out or exceeds the router's latency SLO.
+    """
+    model_name = model_name or node_model_name("router")
+    tier = node_tier("router") if model_name == node_model_name("router") else "custom"
+    messages = [
+        {
+            "role": "system",
+            "content": "You are a router. Classify the user input into the correct category.",
+        },
+        {"role": "user", "content": message},
+    ]
+
+    started = time.perf_counter()
+    try:
+        choice = get_instructor_client().chat.completions.create(
+            model=model_name,
+            response_model=RouterChoice,
+            messages=messages,
+            timeout=config.NODE_LATENCY_SLO_S.get("router"),
+        )
+        model_usage.record("router", tier, time.perf_counter() - started, False)
+        return choice
+    except Exception as e:
+        print(f"⚠️ router: {tier} model failed ({e!r}), using fallback")
+
+    choice = get_instructor_client().chat.completions.create(
+        model=config.MODEL_FALLBACK,
         response_model=RouterChoice,
-        messages=[
-            {
-                "role": "system",
-                "content": "You are a router. Classify the user input into the correct category.",
-            },
-            {"role": "user", "content": message},
-        ],
+        messages=messages,
     )
+    model_usage.record("router", "fallback", time.perf_counter() - started, True)
+    return choice
 
 
 if __name__ == "__main__":
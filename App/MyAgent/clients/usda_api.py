@@ -1,15 +1,28 @@
-import json
-import sqlite3
-
-import requests
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from App.config import config
+from App.MyAgent.clients.usda_cache import FoodCache
+from App.MyAgent.clients.usda_scheduler import RequestScheduler, USDAUnavailableError
+from App.MyAgent.utils.nutrition import extract_macros_per_100g
+
+# Speculative searches the agent hasn't asked for within this time are dropped
+SPECULATION_TTL_S = 120
 
 
 class USDAClient:
-    def __init__(self):
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        cache_db: Optional[str] = None,
+        scheduler: Optional[RequestScheduler] = None,
+    ):
         self.api_key = config.USDA_API_KEY
-        self.base_url = "https://api.nal.usda.gov/fdc/v1"
+        self.base_url = base_url or config.USDA_BASE_URL
         self.core_nutrients_ids = {
             1003: "Protein",
             1004: "Total lipid (fat)",
@@ -17,43 +30,82 @@ class USDAClient:
             1008: "Energy",
         }
 
-        # Initialize cache
-        self.cache_db = "food_cache.db"
-        self._init_cache()
-
-    # ----- SQLite Caching Mechanism ----- #
-    # Creating a SQLite cache to avoid latency on repeated food details requests
-    def _init_cache(self):
-        """Creates a tiny SQLite DB to cache food details."""
-        conn = sqlite3.connect(self.cache_db)
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS food_details (
-                fdc_id INTEGER PRIMARY KEY, 
-                data TEXT)"""
+        # Every USDA call goes through the scheduler: quota, retries, circuit breaker, hedging
+        self.scheduler = scheduler or RequestScheduler(
+            hourly_quota=config.USDA_HOURLY_QUOTA,
+            timeout_s=config.USDA_TIMEOUT_S,
+            max_retries=config.USDA_MAX_RETRIES,
+            hedge_after_s=config.USDA_HEDGE_AFTER_S,
+            failure_threshold=config.USDA_CIRCUIT_FAILURES,
+            reset_timeout_s=config.USDA_CIRCUIT_RESET_S,
         )
-        conn.commit()
-        conn.close()
 
+        # Initialize cache (default file: USDA_CACHE_PATH, else food_cache.db in the repo root)
+        self.cache = FoodCache(cache_db or config.USDA_CACHE_PATH)
+
+        # Portion prefetches in flight, so a confirmation waits for them instead of refetching
+        self._prefetch_executor: Optional[ThreadPoolExecutor] = None
+        self._prefetch_lock = threading.Lock()
+        self._inflight: Dict[int, Future] = {}
+
+        # Speculative searches started before the agent asks: normalized query → (future, start)
+        self._speculations: Dict[str, Tuple[Future, float]] = {}
+        self.speculation_stats = {"speculated": 0, "hits": 0, "unused": 0}
+        self._saved_s = 0.0
+
+    # ----- Caching ----- #
+    # Two-tier cache (in-process LRU + shared WAL SQLite) to avoid repeated USDA requests
     def _get_from_cache(self, fdc_id: int):
-        conn = sqlite3.connect(self.cache_db)
-        cursor = conn.cursor()
-        cursor.execute("SELECT data FROM food_details WHERE fdc_id = ?", (fdc_id,))
-        row = cursor.fetchone()
-        conn.close()
-        if row:
-            return json.loads(row[0])
+        return self.cache.get("details", fdc_id)
 
     def _save_to_cache(self, fdc_id: int, data: dict):
-        conn = sqlite3.connect(self.cache_db)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT OR REPLACE INTO food_details (fdc_id, data) VALUES (?, ?)",
-            (fdc_id, json.dumps(data)),
-        )
-        conn.commit()
-        conn.close()
+        self.cache.put("details", fdc_id, data, label=data.get("description"))
+
+    def _get_search_from_cache(self, query: str):
+        return self.cache.get("search", query)
+
+    def _save_search_to_cache(self, query: str, results: list):
+        self.cache.put("search", query, results)
+
+    def _search_cached_details(self, query: str, limit: int) -> list:
+        """Local fallback: cached food details whose description contains every query word."""
+        words = query.lower().split()
+        results = []
+        for details in self.cache.search_labels("details", words, limit):
+            per_100g = details.get("nutrients_per_100g") or {}
+            results.append(
+                {
+                    "fdc_id": details.get("fdc_id"),
+                    "description": details.get("description"),
+                    "brand": "Generic",
+                    "nutrients": {
+                        "Energy": {"value": per_100g.get("calories"), "unit": "KCAL"},
+                        "Protein": {"value": per_100g.get("protein_g"), "unit": "G"},
+                        "Total lipid (fat)": {
+                            "value": per_100g.get("fat_g"),
+                            "unit": "G",
+                        },
+                        "Carbohydrate, by difference": {
+                            "value": per_100g.get("carbs_g"),
+                            "unit": "G",
+                        },
+                    },
+                    "source": "local",
+                }
+            )
+        return results
+
+    def _search_fallback(self, query: str, limit: int, error: str):
+        """Cached results for this exact search, else matching cached foods, else the error."""
+        cached = self._get_search_from_cache(query.strip().lower())
+        if cached:
+            print(f"⚠️ USDA unavailable ({error}), using cached search results")
+            return [{**item, "source": "cache"} for item in cached[:limit]]
+        local = self._search_cached_details(query, limit)
+        if local:
+            print(f"⚠️ USDA unavailable ({error}), using locally cached foods")
+            return local
+        return {"error": f"USDA API unavailable: {error}"}
 
     # ----- USDA API Methods ----- #
 
@@ -62,6 +114,12 @@ class USDAClient:
         Searches for food items. Prioritizes 'Foundation' and 'Survey' data
         to avoid generic branded duplicates.
         """
+        speculated = self._use_speculation(query, limit)
+        if speculated is not None:
+            return speculated
+        return self._search(query, limit)
+
+    def _search(self, query: str, limit: int = 5, background: bool = False):
         url = f"{self.base_url}/foods/search"
         params = {
             "api_key": self.api_key,
@@ -71,7 +129,12 @@ class USDAClient:
             "dataType": ["Foundation", "Survey (FNDDS)"],
         }
         # Data from USDA comes in 100g portions by default
-        response = requests.get(url, params=params)
+        try:
+            response = self.scheduler.get(url, params, background=background)
+        except USDAUnavailableError as e:
+            if background:
+                return {"error": str(e)}
+            return self._search_fallback(query, limit, str(e))
         if response.status_code != 200:
             return {"error": f"API Error: {response.status_code}"}
 
@@ -95,28 +158,127 @@ class USDAClient:
                 }
             )
 
+        self._save_search_to_cache(query.strip().lower(), results)
         return results
 
+    # ----- Speculative Search ----- #
+
+    @staticmethod
+    def _speculation_key(query: str) -> str:
+        return " ".join(re.findall(r"\w+", query.lower()))
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._prefetch_lock:
+            if self._prefetch_executor is None:
+                self._prefetch_executor = ThreadPoolExecutor(
+                    max_workers=3, thread_name_prefix="usda-prefetch"
+                )
+            return self._prefetch_executor
+
+    def speculate_search(self, queries: Iterable[str], limit: int = 5) -> int:
+        """Starts background searches the agent is likely to make next.
+
+        A later `search_food` with the same (normalized) query and no larger limit
+        reuses the result, waiting for it if it's still running. Speculative requests
+        only use spare quota. Returns the number of searches started.
+        """
+        now = time.monotonic()
+        started = 0
+        with self._prefetch_lock:
+            for key, (_, since) in list(self._speculations.items()):
+                if now - since > SPECULATION_TTL_S:
+                    del self._speculations[key]
+                    self.speculation_stats["unused"] += 1
+        executor = self._executor()
+        with self._prefetch_lock:
+            for query in queries:
+                key = self._speculation_key(query)
+                if not key or key in self._speculations:
+                    continue
+                future = executor.submit(self._timed_search, query, limit)
+                self._speculations[key] = (future, now)
+                self.speculation_stats["speculated"] += 1
+                started += 1
+        return started
+
+    def _timed_search(self, query: str, limit: int) -> Tuple[Any, float, int]:
+        started = time.monotonic()
+        results = self._search(query, limit, background=True)
+        return results, time.monotonic() - started, limit
+
+    def _use_speculation(self, query: str, limit: int) -> Optional[list]:
+        with self._prefetch_lock:
+            speculation = self._speculations.pop(self._speculation_key(query), None)
+        if speculation is None:
+            return None
+        future, since = speculation
+        asked_at = time.monotonic()
+        try:
+            results, duration, speculated_limit = future.result(
+                timeout=self.scheduler.timeout_s
+            )
+        except Exception:
+            results, duration, speculated_limit = None, 0.0, 0
+        if not isinstance(results, list) or limit > speculated_limit:
+            with self._prefetch_lock:
+                self.speculation_stats["unused"] += 1
+            return None
+
+        with self._prefetch_lock:
+            self.speculation_stats["hits"] += 1
+            # Without speculation the search would have started now and taken `duration`
+            self._saved_s += min(duration, asked_at - since)
+        print("⚡ Search served from speculation")
+        return results[:limit]
+
+    def speculation_report(self) -> Dict[str, Any]:
+        """Hit rate and latency saved by speculative searches."""
+        with self._prefetch_lock:
+            stats = dict(self.speculation_stats)
+            hits = stats["hits"]
+            stats["pending"] = len(self._speculations)
+            stats["hit_rate"] = (
+                round(hits / stats["speculated"], 3) if stats["speculated"] else 0.0
+            )
+            stats["latency_saved_s"] = round(self._saved_s, 3)
+            stats["avg_saved_ms"] = round(1000 * self._saved_s / hits) if hits else 0
+        return stats
+
     # Get food details by portion size
     def get_food_portions(self, fdc_id: int):
         """Fetches portion size (weights) for a specific food ID.
         Example: returns that '1 cup' = 240g for a given food item.
+        Also returns the per-100 g macros used by the nutrition scaling engine.
         """
-        # Check cache first
+        # Check cache first (entries cached before per-100 g macros were stored are refreshed)
         cached_data = self._get_from_cache(fdc_id)
-        if cached_data:
+        if cached_data and "nutrients_per_100g" in cached_data:
             print("⚡ Loaded from cache")
             return cached_data
 
-        # Fetch from USDA API
-        url = f"{self.base_url}/food/{fdc_id}"
-        params = {"api_key": self.api_key}
+        # A background prefetch for this food is already running: wait for it
+        pending = self._inflight.get(fdc_id)
+        if pending is not None:
+            wait([pending], timeout=self.scheduler.timeout_s)
+            prefetched = self._get_from_cache(fdc_id)
+            if prefetched and "nutrients_per_100g" in prefetched:
+                print("⚡ Loaded from cache (prefetched)")
+                return prefetched
 
-        # Due to the high latency of USDA API, we add timeout
+        # Timeouts, retries and the circuit breaker are handled by the scheduler
         try:
-            response = requests.get(url, params=params, timeout=10)
-        except requests.exceptions.Timeout:
-            return {"error": "USDA API request timed out."}
+            return self._fetch_portions(fdc_id)
+        except USDAUnavailableError as e:
+            if cached_data:
+                # Stale entry (no per-100 g macros) still has the portion weights
+                return cached_data
+            return {"error": f"USDA API unavailable: {e}"}
+
+    def _fetch_portions(self, fdc_id: int, background: bool = False) -> dict:
+        """Fetches and caches one food's portions. Raises USDAUnavailableError."""
+        url = f"{self.base_url}/food/{fdc_id}"
+        params = {"api_key": self.api_key}
+        response = self.scheduler.get(url, params, background=background)
 
         if response.status_code != 200:
             return {"error": f"API Error: {response.status_code}"}
@@ -141,6 +303,9 @@ class USDAClient:
             "fdc_id": data.get("fdcId"),
             "description": data.get("description"),
             "portions": portions,
+            "nutrients_per_100g": extract_macros_per_100g(
+                data.get("foodNutrients", [])
+            ),
         }
 
         # Save to cache
@@ -148,6 +313,75 @@ class USDAClient:
 
         return results
 
+    # ----- Portion Prefetching ----- #
+
+    def _uncached_ids(self, fdc_ids: Iterable[int]) -> List[int]:
+        """IDs without a complete (per-100 g macros included) cache entry, in input order."""
+        wanted = list(dict.fromkeys(i for i in fdc_ids if i))
+        cached = self.cache.get_many("details", wanted)
+        return [i for i in wanted if "nutrients_per_100g" not in (cached.get(i) or {})]
+
+    def _prefetch_one(self, fdc_id: int) -> str:
+        try:
+            result = self._fetch_portions(fdc_id, background=True)
+        except USDAUnavailableError:
+            return "deferred"
+        return "failed" if "error" in result else "fetched"
+
+    def prefetch_portions(
+        self, fdc_ids: Iterable[int], wait_for_results: bool = False
+    ) -> Dict[str, int]:
+        """Caches portions for the given foods on background threads.
+
+        Prefetches only use spare quota (see RequestScheduler.background_reserve), so
+        they never slow down interactive requests. Only as many new fetches as the
+        spare quota covers right now are scheduled; the rest are `skipped` (a later
+        call picks them up) rather than queued to be deferred.
+
+        Args:
+            fdc_ids: Foods to prefetch, most important first.
+            wait_for_results: Block until done and count the outcomes.
+
+        Returns:
+            Counts of `cached` (already complete), `scheduled` and `skipped` foods,
+            plus `fetched` / `failed` / `deferred` when waiting for results.
+        """
+        fdc_ids = list(dict.fromkeys(i for i in fdc_ids if i))
+        missing = self._uncached_ids(fdc_ids)
+        futures = []
+        budget = self.scheduler.spare_tokens()
+        executor = self._executor()
+        with self._prefetch_lock:
+            for fdc_id in missing:
+                future = self._inflight.get(fdc_id)
+                if future is None:
+                    if budget <= 0:
+                        continue
+                    budget -= 1
+                    future = executor.submit(self._prefetch_one, fdc_id)
+                    self._inflight[fdc_id] = future
+                    future.add_done_callback(
+                        lambda _, fdc_id=fdc_id: self._inflight.pop(fdc_id, None)
+                    )
+                futures.append(future)
+
+        stats = {
+            "cached": len(fdc_ids) - len(missing),
+            "scheduled": len(futures),
+            "skipped": len(missing) - len(futures),
+        }
+        if wait_for_results:
+            for future in futures:
+                outcome = future.result()
+                stats[outcome] = stats.get(outcome, 0) + 1
+        return stats
+
+
+# Shared client, created on first use (it touches the SQLite cache on init)
+@lru_cache()
+def get_usda_client() -> USDAClient:
+    return USDAClient()
+
 
 # Simple test block
 if __name__ == "__main__":
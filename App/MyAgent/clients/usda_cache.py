@@ -0,0 +1,447 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+# Repo root, so the cache file doesn't depend on the working directory
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parents[3] / "food_cache.db"
+
+# Value encoding: 1 header byte, then compact JSON (compressed when it pays off)
+_RAW, _ZLIB = b"j", b"z"
+_COMPRESS_MIN_BYTES = 256
+
+# SQLite parameter limit is 999 on older builds; stay below it for IN (...) lists
+_BATCH_SIZE = 500
+
+
+def encode_value(value: Any) -> bytes:
+    raw = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
+    if len(raw) >= _COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(raw, 6)
+        if len(compressed) < len(raw):
+            return _ZLIB + compressed
+    return _RAW + raw
+
+
+def decode_value(blob: bytes) -> Any:
+    header, body = blob[:1], blob[1:]
+    if header == _ZLIB:
+        body = zlib.decompress(body)
+    elif header != _RAW:
+        raise ValueError(f"Unknown cache encoding {header!r}")
+    return json.loads(body)
+
+
+class FoodCache:
+    """Two-tier key/value cache: an in-process LRU in front of a shared SQLite store.
+
+    The store runs in WAL mode with a busy timeout, so several API workers can read
+    and write the same file concurrently. Values are compact binary (JSON + zlib),
+    decoded once per process and then served from the LRU. Treat returned values as
+    read-only: the LRU hands out the same object on every hit.
+
+    Args:
+        path: SQLite file (default: DEFAULT_CACHE_PATH).
+        max_items: LRU entry limit.
+        max_lru_bytes: LRU limit in encoded bytes.
+        pool_size: SQLite connections shared by the threads of this process.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_items: int = 4096,
+        max_lru_bytes: int = 32 * 1024 * 1024,
+        pool_size: int = 4,
+    ) -> None:
+        self.path = str(path or DEFAULT_CACHE_PATH)
+        self.max_items = max_items
+        self.max_lru_bytes = max_lru_bytes
+
+        self._lru: "OrderedDict[Tuple[str, str], Tuple[Any, int]]" = OrderedDict()
+        self._lru_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"lru_hits": 0, "store_hits": 0, "misses": 0, "writes": 0}
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
+        self._init_store()
+
+    # ----- SQLite store ----- #
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit; writes open explicit transactions. Shared across this process's threads
+        conn = sqlite3.connect(
+            self.path, timeout=5.0, check_same_thread=False, isolation_level=None
+        )
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    @staticmethod
+    @contextmanager
+    def _transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+        # IMMEDIATE takes the write lock up front, so concurrent workers queue on busy_timeout
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _init_store(self) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    label TEXT,
+                    size INTEGER NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                ) WITHOUT ROWID"""
+            )
+        self._migrate_legacy_tables()
+
+    def _migrate_legacy_tables(self) -> None:
+        """Moves rows of the old JSON-text tables (food_details, food_searches) over once."""
+        legacy = {"food_details": "details", "food_searches": "search"}
+        # One transaction, so two workers starting together can't both migrate
+        with self._connection() as conn, self._transaction(conn):
+            existing = {
+                name
+                for (name,) in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table'"
+                )
+            }
+            for table, namespace in legacy.items():
+                if table not in existing:
+                    continue
+                rows = conn.execute(f"SELECT * FROM {table}").fetchall()
+                items = {}
+                for key, data in rows:
+                    try:
+                        items[key] = json.loads(data)
+                    except (TypeError, ValueError):
+                        continue
+                labels = (
+                    {k: v.get("description") for k, v in items.items()}
+                    if namespace == "details"
+                    else None
+                )
+                self._write(conn, namespace, items, labels)
+                conn.execute(f"DROP TABLE {table}")
+
+    def _write(
+        self,
+        conn: sqlite3.Connection,
+        namespace: str,
+        items: Dict[Hashable, Any],
+        labels: Optional[Dict[Hashable, Optional[str]]] = None,
+    ) -> List[Tuple[str, Any, int]]:
+        now = time.time()
+        encoded = []
+        for key, value in items.items():
+            blob = encode_value(value)
+            label = (labels or {}).get(key)
+            encoded.append((str(key), value, len(blob), blob, label))
+        conn.executemany(
+            "INSERT OR REPLACE INTO cache_entries "
+            "(namespace, key, value, label, size, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (namespace, key, blob, label.lower() if label else None, size, now)
+                for key, _, size, blob, label in encoded
+            ],
+        )
+        return [(key, value, size) for key, value, size, _, _ in encoded]
+
+    # ----- LRU ----- #
+
+    def _lru_get(self, lru_key: Tuple[str, str]) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._lru.get(lru_key)
+            if entry is None:
+                return False, None
+            self._lru.move_to_end(lru_key)
+            self._stats["lru_hits"] += 1
+            return True, entry[0]
+
+    def _lru_put(self, lru_key: Tuple[str, str], value: Any, size: int) -> None:
+        with self._lock:
+            previous = self._lru.pop(lru_key, None)
+            if previous is not None:
+                self._lru_bytes -= previous[1]
+            self._lru[lru_key] = (value, size)
+            self._lru_bytes += size
+            while self._lru and (
+                len(self._lru) > self.max_items or self._lru_bytes > self.max_lru_bytes
+            ):
+                _, (_, evicted_size) = self._lru.popitem(last=False)
+                self._lru_bytes -= evicted_size
+
+    # ----- Public API ----- #
+
+    def get(self, namespace: str, key: Hashable) -> Optional[Any]:
+        return self.get_many(namespace, [key]).get(key)
+
+    def get_many(self, namespace: str, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """Returns {key: value} for the keys found; the store is read in one query per batch."""
+        found: Dict[Hashable, Any] = {}
+        missing: Dict[str, Hashable] = {}
+        for key in keys:
+            hit, value = self._lru_get((namespace, str(key)))
+            if hit:
+                found[key] = value
+            else:
+                missing[str(key)] = key
+
+        pending = list(missing)
+        store_hits = 0
+        with self._connection() as conn:
+            for start in range(0, len(pending), _BATCH_SIZE):
+                batch = pending[start : start + _BATCH_SIZE]
+                rows = conn.execute(
+                    f"SELECT key, value FROM cache_entries WHERE namespace = ? "
+                    f"AND key IN ({', '.join('?' * len(batch))})",
+                    (namespace, *batch),
+                ).fetchall()
+                for key, blob in rows:
+                    try:
+                        value = decode_value(blob)
+                    except (ValueError, zlib.error):
+                        continue  # corrupt entry: treat as a miss, it gets overwritten
+                    self._lru_put((namespace, key), value, len(blob))
+                    found[missing[key]] = value
+                    store_hits += 1
+
+        with self._lock:
+            self._stats["store_hits"] += store_hits
+            self._stats["misses"] += len(missing) - store_hits
+        return found
+
+    def put(
+        self, namespace: str, key: Hashable, value: Any, label: Optional[str] = None
+    ) -> None:
+        self.put_many(namespace, {key: value}, {key: label} if label else None)
+
+    def put_many(
+        self,
+        namespace: str,
+        items: Dict[Hashable, Any],
+        labels: Optional[Dict[Hashable, Optional[str]]] = None,
+    ) -> None:
+        """Writes all items in one transaction and keeps them in the LRU.
+
+        Args:
+            namespace: Logical table (e.g. "details", "search").
+            items: {key: JSON-serializable value}.
+            labels: Optional searchable text per key (see `search_labels`).
+        """
+        if not items:
+            return
+        with self._connection() as conn, self._transaction(conn):
+            written = self._write(conn, namespace, items, labels)
+        for key, value, size in written:
+            self._lru_put((namespace, key), value, size)
+        with self._lock:
+            self._stats["writes"] += len(written)
+
+    def search_labels(
+        self, namespace: str, words: List[str], limit: int = 5
+    ) -> List[Any]:
+        """Values whose label contains every word (case-insensitive)."""
+        if not words:
+            return []
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT value FROM cache_entries WHERE namespace = ? AND "
+                + " AND ".join("label LIKE ?" for _ in words)
+                + " LIMIT ?",
+                (namespace, *(f"%{w.lower()}%" for w in words), limit),
+            ).fetchall()
+        return [decode_value(blob) for (blob,) in rows]
+
+    def claim(self, namespace: str, key: Hashable, ttl_s: float) -> bool:
+        """Marks `key` as taken for `ttl_s` seconds; False if another worker holds it.
+
+        The check and the write share one IMMEDIATE transaction, so of several
+        workers claiming at once exactly one wins.
+        """
+        now = time.time()
+        with self._connection() as conn, self._transaction(conn):
+            row = conn.execute(
+                "SELECT updated_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (namespace, str(key)),
+            ).fetchone()
+            if row is not None and row[0] > now - ttl_s:
+                return False
+            self._write(conn, namespace, {key: now})
+        return True
+
+    def prune(self, namespace: str, max_age_s: float) -> int:
+        """Deletes the namespace's entries older than `max_age_s`; returns how many."""
+        where = "WHERE namespace = ? AND updated_at < ?"
+        params = (namespace, time.time() - max_age_s)
+        with self._connection() as conn, self._transaction(conn):
+            deleted = conn.execute(
+                f"SELECT key FROM cache_entries {where}", params
+            ).fetchall()
+            conn.execute(f"DELETE FROM cache_entries {where}", params)
+        with self._lock:
+            for (key,) in deleted:
+                entry = self._lru.pop((namespace, key), None)
+                if entry is not None:
+                    self._lru_bytes -= entry[1]
+        return len(deleted)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit counters plus entry counts and encoded bytes of both tiers."""
+        with self._connection() as conn:
+            store = conn.execute(
+                "SELECT namespace, count(*), coalesce(sum(size), 0) "
+                "FROM cache_entries GROUP BY namespace"
+            ).fetchall()
+        with self._lock:
+            return {
+                **self._stats,
+                "lru_entries": len(self._lru),
+                "lru_bytes": self._lru_bytes,
+                "store": {ns: {"entries": n, "bytes": b} for ns, n, b in store},
+                # WAL included: recent writes live there until the next checkpoint
+                "file_bytes": sum(
+                    os.path.getsize(f)
+                    for f in (self.path, f"{self.path}-wal")
+                    if os.path.exists(f)
+                ),
+            }
+
+
+# -------------------------------------------
+# BENCHMARK (run: python -m App.MyAgent.clients.usda_cache)
+# -------------------------------------------
+
+
+def _sample_details(fdc_id: int) -> dict:
+    return {
+        "fdc_id": fdc_id,
+        "description": f"Sample food {fdc_id}, raw",
+        "portions": [
+            {"label": f"1 {unit}", "gram_weight": 30.0 + i * 17.5}
+            for i, unit in enumerate(("cup", "tbsp", "slice", "medium", "large", "oz"))
+        ],
+        "nutrients_per_100g": {
+            "calories": 123.0,
+            "protein_g": 4.5,
+            "fat_g": 2.25,
+            "carbs_g": 20.1,
+        },
+    }
+
+
+def _writer_process(path: str, worker: int, n: int) -> None:
+    cache = FoodCache(path)
+    for i in range(n):
+        cache.put("details", worker * n + i, _sample_details(worker * n + i))
+        cache.get("details", (worker * n + i) // 2)
+
+
+def benchmark(n: int = 2000, workers: int = 4) -> Dict[str, Any]:
+    """Compares the old per-call connection + JSON-text cache with FoodCache and
+    checks that several processes can share one cache file."""
+    import multiprocessing
+    import tempfile
+
+    tmp = tempfile.mkdtemp(prefix="usda_cache_")
+    ids = list(range(1, n + 1))
+    results: Dict[str, Any] = {"entries": n}
+
+    # Old approach: a new connection and a JSON re-parse on every call
+    legacy_path = os.path.join(tmp, "legacy.db")
+    conn = sqlite3.connect(legacy_path)
+    conn.execute("CREATE TABLE food_details (fdc_id INTEGER PRIMARY KEY, data TEXT)")
+    conn.executemany(
+        "INSERT INTO food_details VALUES (?, ?)",
+        [(i, json.dumps(_sample_details(i))) for i in ids],
+    )
+    conn.commit()
+    conn.close()
+    started = time.perf_counter()
+    for i in ids:
+        conn = sqlite3.connect(legacy_path)
+        row = conn.execute(
+            "SELECT data FROM food_details WHERE fdc_id = ?", (i,)
+        ).fetchone()
+        conn.close()
+        json.loads(row[0])
+    results["legacy_get_us"] = round(1e6 * (time.perf_counter() - started) / n, 1)
+    results["legacy_file_bytes"] = os.path.getsize(legacy_path)
+
+    cache = FoodCache(os.path.join(tmp, "cache.db"))
+    started = time.perf_counter()
+    cache.put_many("details", {i: _sample_details(i) for i in ids})
+    results["put_many_us"] = round(1e6 * (time.perf_counter() - started) / n, 1)
+
+    cold = FoodCache(cache.path)  # fresh process-level LRU: every read hits SQLite
+    started = time.perf_counter()
+    for i in ids:
+        cold.get("details", i)
+    results["store_get_us"] = round(1e6 * (time.perf_counter() - started) / n, 1)
+
+    started = time.perf_counter()
+    for i in ids:
+        cold.get("details", i)
+    results["lru_get_us"] = round(1e6 * (time.perf_counter() - started) / n, 1)
+
+    bulk = FoodCache(cache.path)
+    started = time.perf_counter()
+    bulk.get_many("details", ids)
+    results["bulk_get_us"] = round(1e6 * (time.perf_counter() - started) / n, 1)
+    results["stats"] = cold.stats()
+
+    # Multi-process: workers write and read the same file concurrently
+    shared = os.path.join(tmp, "shared.db")
+    FoodCache(shared)
+    processes = [
+        multiprocessing.Process(target=_writer_process, args=(shared, w, 250))
+        for w in range(workers)
+    ]
+    started = time.perf_counter()
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+    stored = FoodCache(shared).stats()["store"].get("details", {}).get("entries", 0)
+    results["multiprocess"] = {
+        "workers": workers,
+        "ok": all(p.exitcode == 0 for p in processes) and stored == workers * 250,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+    print(f"🗄️ USDA cache benchmark: {results}")
+    return results
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,313 @@
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Status codes worth retrying: rate limited or a transient server-side failure
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class USDAUnavailableError(Exception):
+    """Raised when a USDA request can't be served (quota, open circuit or exhausted retries)."""
+
+
+# -------------------------------------------
+# TOKEN BUCKET (hourly API quota)
+# -------------------------------------------
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `capacity` burst, refilled at `rate` tokens per second."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def try_acquire(self, reserve: float = 0.0) -> bool:
+        """Takes a token without waiting, leaving at least `reserve` tokens in the bucket."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1 + reserve:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self, max_wait_s: float) -> bool:
+        """Takes a token, waiting up to `max_wait_s` for one to refill. False on timeout."""
+        deadline = time.monotonic() + max_wait_s
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait_s = (1 - self._tokens) / self.rate if self.rate > 0 else max_wait_s
+            if time.monotonic() + wait_s > deadline:
+                return False
+            time.sleep(wait_s)
+
+    def sync(self, remaining: float) -> None:
+        """Never hold more tokens than the server says are left (X-RateLimit-Remaining)."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, max(remaining, 0))
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+# -------------------------------------------
+# CIRCUIT BREAKER
+# -------------------------------------------
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures; after `reset_timeout_s`
+    a single trial request is let through (half-open) to decide whether to close again.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout_s: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self._failures = 0
+        self._opened_at = 0.0
+        self._state = self.CLOSED
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            # Also re-arms a half-open trial that never reported back (e.g. throttled)
+            if time.monotonic() - self._opened_at >= self.reset_timeout_s:
+                self._state = self.HALF_OPEN
+                self._opened_at = time.monotonic()
+                return True
+            # Open, or half-open with the trial request already in flight
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._state = self.CLOSED
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if (
+                self._state == self.HALF_OPEN
+                or self._failures >= self.failure_threshold
+            ):
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+
+# -------------------------------------------
+# REQUEST SCHEDULER
+# -------------------------------------------
+
+
+class RequestScheduler:
+    """Sends idempotent GETs to the USDA API within quota, with retries, a circuit
+    breaker and optional hedging.
+
+    Args:
+        hourly_quota: Requests allowed per hour (FDC default: 1000 per key).
+        timeout_s: Per-attempt timeout.
+        max_retries: Extra attempts after a timeout, connection error, 429 or 5xx.
+        hedge_after_s: If set, send a duplicate request when the first one hasn't
+            answered after this many seconds and use whichever returns first.
+        failure_threshold: Consecutive failed requests before the circuit opens.
+        reset_timeout_s: How long the circuit stays open before a trial request.
+        max_queue_wait_s: How long a request may wait for a quota token.
+        background_reserve: Fraction of the burst capacity that background
+            requests (prefetching) may not use, kept for interactive requests.
+    """
+
+    def __init__(
+        self,
+        hourly_quota: int = 1000,
+        timeout_s: float = 10.0,
+        max_retries: int = 2,
+        hedge_after_s: Optional[float] = None,
+        failure_threshold: int = 5,
+        reset_timeout_s: float = 60.0,
+        max_queue_wait_s: float = 2.0,
+        backoff_base_s: float = 0.5,
+        backoff_cap_s: float = 8.0,
+        background_reserve: float = 0.5,
+    ) -> None:
+        self.bucket = TokenBucket(
+            rate=hourly_quota / 3600, capacity=max(1, min(hourly_quota, 50))
+        )
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout_s)
+        self.timeout_s = timeout_s
+        self.max_retries = max_retries
+        self.hedge_after_s = hedge_after_s
+        self.max_queue_wait_s = max_queue_wait_s
+        self.backoff_base_s = backoff_base_s
+        self.backoff_cap_s = backoff_cap_s
+        self.background_reserve = background_reserve * self.bucket.capacity
+
+        # One pooled session; large enough for a primary + hedge per concurrent caller
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=20))
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=20))
+        # Built here rather than on the first hedged send, which can run on several
+        # threads at once; its worker threads still start only when used
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if hedge_after_s is not None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=8, thread_name_prefix="usda-hedge"
+            )
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "attempts": 0,
+            "retries": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "throttled": 0,
+            "short_circuited": 0,
+            "deferred": 0,
+            "failures": 0,
+        }
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] += n
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["circuit"] = self.breaker.state
+        stats["tokens"] = round(self.bucket.tokens, 1)
+        return stats
+
+    def spare_tokens(self) -> int:
+        """Background requests that can be made right now without being deferred."""
+        return max(int(self.bucket.tokens - self.background_reserve), 0)
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        # Full jitter; a server-sent Retry-After (seconds) is used as the floor
+        delay = random.uniform(
+            0, min(self.backoff_cap_s, self.backoff_base_s * 2**attempt)
+        )
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        return delay
+
+    def _take_token(self, background: bool) -> None:
+        if background:
+            # Never wait, and never dip into the share kept for interactive requests
+            if not self.bucket.try_acquire(reserve=self.background_reserve):
+                self._count("deferred")
+                raise USDAUnavailableError("Quota reserved for interactive requests.")
+        elif not self.bucket.acquire(self.max_queue_wait_s):
+            self._count("throttled")
+            # Our own quota, not a USDA failure: leave the breaker alone
+            raise USDAUnavailableError("USDA API hourly quota exhausted.")
+
+    def get(
+        self, url: str, params: Dict[str, Any], background: bool = False
+    ) -> requests.Response:
+        """Returns the response (any non-retryable status, e.g. 200 or 404).
+
+        Pass background=True for prefetching: it only uses spare quota and is not retried.
+
+        Raises:
+            USDAUnavailableError: quota exhausted, circuit open or retries exhausted.
+        """
+        self._count("requests")
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            raise USDAUnavailableError("USDA API circuit is open (recent failures).")
+
+        last_error = "unknown error"
+        max_retries = 0 if background else self.max_retries
+        for attempt in range(max_retries + 1):
+            self._take_token(background)
+            if attempt:
+                self._count("retries")
+            self._count("attempts")
+
+            retry_after = None
+            try:
+                response = self._send(url, params)
+            except requests.exceptions.RequestException as e:
+                last_error = f"{type(e).__name__}: {e}"
+            else:
+                remaining = response.headers.get("X-RateLimit-Remaining")
+                if remaining is not None and remaining.isdigit():
+                    self.bucket.sync(float(remaining))
+                if response.status_code not in RETRYABLE_STATUS:
+                    self.breaker.record_success()
+                    return response
+                last_error = f"API Error: {response.status_code}"
+                retry_after = response.headers.get("Retry-After")
+                if response.status_code == 429:
+                    self.bucket.sync(0)
+
+            if attempt < max_retries:
+                delay = self._backoff(attempt, retry_after)
+                if delay > self.backoff_cap_s:
+                    break  # e.g. Retry-After of an hour: give up now, fall back
+                time.sleep(delay)
+
+        self._count("failures")
+        self.breaker.record_failure()
+        raise USDAUnavailableError(last_error)
+
+    # ----- Hedged sends ----- #
+
+    def _send(self, url: str, params: Dict[str, Any]) -> requests.Response:
+        if self.hedge_after_s is None or self._executor is None:
+            return self.session.get(url, params=params, timeout=self.timeout_s)
+
+        primary = self._executor.submit(
+            self.session.get, url, params=params, timeout=self.timeout_s
+        )
+        done, _ = wait([primary], timeout=self.hedge_after_s)
+        # Hedges spend quota too, so only send one when a token is free right now
+        if done or not self.bucket.try_acquire():
+            return primary.result()
+
+        self._count("hedges")
+        hedge = self._executor.submit(
+            self.session.get, url, params=params, timeout=self.timeout_s
+        )
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._count("hedge_wins")
+                    return future.result()
+        # Both failed: surface the primary's error
+        return primary.result()
@@ -1,7 +1,9 @@
+from functools import lru_cache
+
 from langgraph.graph import END, START, StateGraph
 
 from .utils.chart_subgraph import chart_subgraph
-from .utils.checkpointer import memory
+from .utils.checkpointer import get_async_checkpointer, get_checkpointer
 from .utils.data_review_subgraph import data_review_subgraph
 from .utils.nodes import (
     chatbot,
@@ -30,7 +32,26 @@ builder.add_edge("data_review", END)
 builder.add_edge("chart_request", END)
 builder.add_edge("chatbot", END)
 
-graph = builder.compile(checkpointer=memory)
+
+@lru_cache()
+def get_graph():
+    """Compiles the main graph with the checkpointer on first use."""
+    return builder.compile(checkpointer=get_checkpointer())
+
+
+_async_graph = None
+
+
+def get_async_graph():
+    """Compiles the main graph for ainvoke (async checkpointer) on first use.
+
+    Called from the API server's event loop, which the checkpointer is bound to.
+    """
+    global _async_graph
+    if _async_graph is None:
+        _async_graph = builder.compile(checkpointer=get_async_checkpointer())
+    return _async_graph
+
 
 # -------------------------------------------
 # DRAW AND SAVE GRAPH
@@ -41,7 +62,7 @@ graph = builder.compile(checkpointer=memory)
 #     file_path = os.path.join(current_dir, "Pachico_Graph.png")
 
 #     # Save the graph to a file
-#     png_data = graph.get_graph(xray=True).draw_mermaid_png()
+#     png_data = get_graph().get_graph(xray=True).draw_mermaid_png()
 
 #     with open(file_path, "wb") as f:
 #         f.write(png_data)
@@ -1,15 +1,21 @@
+from functools import lru_cache
+
 from langchain_core.messages import SystemMessage
 from langgraph.graph import START, StateGraph
 from langgraph.prebuilt import ToolNode, tools_condition
 
-from App.MyAgent.clients.model import get_model
+from App.MyAgent.clients.model import get_node_model
 
 from .state import AgentState
-from .tools import generate_nutrition_chart
+from .tools import generate_nutrition_chart, generate_nutrition_dashboard
 
 # Bind chart tools to the model
-chart_tools = [generate_nutrition_chart]
-chart_model = get_model(temperature=0.3).bind_tools(chart_tools)
+chart_tools = [generate_nutrition_chart, generate_nutrition_dashboard]
+
+
+@lru_cache()
+def get_chart_model():
+    return get_node_model("chart", temperature=0.3).bind_tools(chart_tools)
 
 
 def chart_agent_node(state: AgentState):
@@ -21,18 +27,22 @@ def chart_agent_node(state: AgentState):
 ## WORKFLOW:
 
 ### Step 1: Parse the Request
-- Identify which metric the user wants: calories, protein, fat, or carbs
-- Identify the time period: weekly (last 7 days) or monthly (last 30 days)
+- Identify which metric(s) the user wants: calories, protein, fat, or carbs
+- Identify the time period: weekly (last 7 days), monthly (last 30 days), or a custom
+  range ("since March 1st", "in September") as start_date/end_date (YYYY-MM-DD)
 - If the metric is not specified, default to "calories"
 - If the period is not specified, default to "weekly"
 
 ### Step 2: Generate the Chart
-- Call `generate_nutrition_chart` with the parsed metric and period
+- ONE metric → call `generate_nutrition_chart` with the metric and period (or dates)
+- MORE than one metric, "macros" or an overview → call `generate_nutrition_dashboard` ONCE
+  (never several `generate_nutrition_chart` calls)
 - ALWAYS generate the chart from real data — NEVER fabricate values
 
 ### Step 3: Respond
-- Provide a brief summary of what the chart shows
-- Include the file path of the generated chart image
+- If the tool replied "Job #N queued", tell the user the chart is on its way (it is sent
+  automatically when ready); don't describe a chart you haven't seen
+- Otherwise provide a brief summary of what the chart shows and include the file path
 - If the chart has all zeros, mention that no food entries were found for that period
 
 ## RULES:
@@ -43,7 +53,7 @@ def chart_agent_node(state: AgentState):
     )
 
     messages = [system_msg] + list(state["messages"])
-    response = chart_model.invoke(messages)
+    response = get_chart_model().invoke(messages)
 
     return {"messages": [response]}
 
@@ -0,0 +1,301 @@
+import threading
+from datetime import date
+from functools import lru_cache
+from typing import BinaryIO, Dict, List, Literal, Optional, Sequence, Tuple, Union
+
+# Format labels and colors per metric
+METRIC_CONFIG = {
+    "calories": {"label": "Calories (kcal)", "color": "#FF6B6B"},  # Coral red
+    "protein_g": {"label": "Protein (g)", "color": "#4ECDC4"},  # Teal
+    "fat_g": {"label": "Fat (g)", "color": "#FFE66D"},  # Yellow
+    "carbs_g": {"label": "Carbs (g)", "color": "#A78BFA"},  # Purple
+}
+
+
+# Named sizes as (figsize in inches, dpi); "large" is the 1800x900 PNG sent on Telegram
+CHART_SIZES = {
+    "small": ((6, 3), 100),
+    "medium": ((9, 4.5), 100),
+    "large": ((12, 6), 150),
+}
+
+# pyplot styles and figure managers are global: charts drawn from API threads take turns
+_render_lock = threading.Lock()
+
+
+# matplotlib takes ~0.5 s to import, so it is only loaded when the first chart is drawn
+@lru_cache()
+def _pyplot():
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+def render_nutrition_chart(
+    dates: Sequence[date],
+    values: List[float],
+    metric: str,
+    file_path: Union[str, BinaryIO],
+    title: Optional[str] = None,
+    annotate: Optional[bool] = None,
+    image_format: Literal["png", "svg"] = "png",
+    figsize: Tuple[float, float] = (12, 6),
+    dpi: int = 150,
+) -> Union[str, BinaryIO]:
+    """Renders a line chart of one metric over consecutive days and saves it as an image.
+
+    Pure rendering: no DB access, so it can run in worker processes.
+
+    Args:
+        dates: One date per point (already zero-filled).
+        values: Metric value per date.
+        metric: One of the METRIC_CONFIG keys.
+        file_path: Where to save the image (a path or a binary file object).
+        title: Chart title (default: "<label> — Last N Days").
+        annotate: Write values over points (default: only for 7 days or fewer).
+        image_format: "png" or "svg" (text kept as text, so small and sharp at any size).
+        figsize: Figure size in inches; fonts and lines scale with the width.
+        dpi: Resolution of PNG output.
+
+    Returns:
+        `file_path`.
+    """
+    y_label = METRIC_CONFIG[metric]["label"]
+    line_color = METRIC_CONFIG[metric]["color"]
+    title = title or f"{y_label} — Last {len(dates)} Days"
+    if annotate is None:
+        annotate = len(dates) <= 7
+
+    # Everything was designed for a 12-inch wide figure
+    scale = max(figsize[0] / 12, 0.5)
+
+    plt = _pyplot()
+    with _render_lock, plt.rc_context({"svg.fonttype": "none"}):
+        fig = _draw_chart(
+            plt, dates, values, y_label, line_color, title, annotate, figsize, scale
+        )
+        fig.savefig(
+            file_path,
+            format=image_format,
+            dpi=dpi,
+            facecolor="#0D0D0D",
+            edgecolor="none",
+        )
+        plt.close(fig)
+
+        # Reset style to default for other plots
+        plt.style.use("default")
+
+    return file_path
+
+
+def _draw_chart(
+    plt, dates, values, y_label, line_color, title, annotate, figsize, scale
+):
+    # Set up black background
+    plt.style.use("dark_background")
+
+    # Plot line chart
+    fig, ax = plt.subplots(figsize=figsize, facecolor="#0D0D0D")  # Dark gray background
+
+    # Plot line chart with markers and gradient fill
+    ax.plot(
+        dates,
+        values,
+        color=line_color,
+        linewidth=2.5 * scale,
+        marker="o",
+        markersize=6 * scale,
+        markerfacecolor=line_color,
+        markeredgecolor="#FFFFFF",
+        markeredgewidth=1.5 * scale,
+    )
+
+    # Add subtle fill under the line
+    ax.fill_between(dates, values, alpha=0.15, color=line_color)
+
+    # Title and labels with modern font styling
+    ax.set_title(
+        title,
+        fontsize=18 * scale,
+        fontweight="bold",
+        color="#FFFFFF",
+        pad=20 * scale,
+        fontfamily="sans-serif",
+    )
+    ax.set_xlabel("Date", fontsize=12 * scale, color="#AAAAAA", labelpad=10 * scale)
+    _style_axes(ax, y_label, scale)
+
+    # Format x-axis dates
+    fig.autofmt_xdate(rotation=45)
+
+    # Add value annotations on data points (only for short ranges to avoid clutter)
+    if annotate:
+        for x, y in zip(dates, values):
+            if y > 0:
+                ax.annotate(
+                    f"{y:.0f}",
+                    (x, y),
+                    textcoords="offset points",
+                    xytext=(0, 10 * scale),
+                    ha="center",
+                    fontsize=9 * scale,
+                    color="#FFFFFF",
+                    fontweight="bold",
+                )
+
+    fig.tight_layout()
+    return fig
+
+
+def _style_axes(ax, y_label: str, scale: float) -> None:
+    ax.set_facecolor("#0D0D0D")
+    ax.set_ylabel(y_label, fontsize=12 * scale, color="#AAAAAA", labelpad=10 * scale)
+
+    # Style the grid
+    ax.grid(axis="y", color="#333333", linestyle="--", linewidth=0.5, alpha=0.7)
+    ax.grid(axis="x", color="#333333", linestyle="--", linewidth=0.5, alpha=0.3)
+
+    # Style the spines (borders)
+    for spine in ax.spines.values():
+        spine.set_color("#333333")
+        spine.set_linewidth(0.5)
+
+    # Style tick labels
+    ax.tick_params(axis="both", colors="#AAAAAA", labelsize=10 * scale)
+
+
+# -------------------------------------------
+# DASHBOARD (all macros in one figure)
+# -------------------------------------------
+
+# Energy per gram of each macro (Atwater factors)
+KCAL_PER_GRAM = {"protein_g": 4.0, "carbs_g": 4.0, "fat_g": 9.0}
+
+
+def render_dashboard_chart(
+    dates: Sequence[date],
+    series: Dict[str, List[float]],
+    file_path: Union[str, BinaryIO],
+    title: Optional[str] = None,
+    image_format: Literal["png", "svg"] = "png",
+    figsize: Tuple[float, float] = (12, 8),
+    dpi: int = 150,
+) -> Union[str, BinaryIO]:
+    """Renders calories and all macros for a date range as ONE figure.
+
+    Top panel: daily kcal from protein, carbs and fat as stacked bars, with the
+    logged calories as a line (gaps between the two show missing macro data).
+    Bottom panel: grams of each macro. Same pure-rendering contract as
+    `render_nutrition_chart`.
+
+    Args:
+        dates: One date per day (already zero-filled).
+        series: Values per date for every METRIC_CONFIG key.
+        file_path: Where to save the image (a path or a binary file object).
+        title: Chart title (default: "Nutrition Dashboard — <first> to <last>").
+        image_format: "png" or "svg".
+        figsize: Figure size in inches; fonts and lines scale with the width.
+        dpi: Resolution of PNG output.
+
+    Returns:
+        `file_path`.
+    """
+    if dates:
+        title = title or f"Nutrition Dashboard — {dates[0]:%b %d} to {dates[-1]:%b %d}"
+    scale = max(figsize[0] / 12, 0.5)
+    # Bars stop being readable past a few months: draw the macro kcal as areas then
+    as_bars = len(dates) <= 62
+
+    plt = _pyplot()
+    with _render_lock, plt.rc_context({"svg.fonttype": "none"}):
+        plt.style.use("dark_background")
+        fig, (kcal_ax, grams_ax) = plt.subplots(
+            2,
+            1,
+            figsize=figsize,
+            sharex=True,
+            gridspec_kw={"height_ratios": [3, 2]},
+            facecolor="#0D0D0D",
+        )
+
+        bottom = [0.0] * len(dates)
+        for metric, factor in KCAL_PER_GRAM.items():
+            kcal = [grams * factor for grams in series[metric]]
+            top = [b + k for b, k in zip(bottom, kcal)]
+            label = f"{METRIC_CONFIG[metric]['label'].split(' ')[0]} kcal"
+            color = METRIC_CONFIG[metric]["color"]
+            if as_bars:
+                kcal_ax.bar(
+                    dates, kcal, bottom=bottom, color=color, alpha=0.8, label=label
+                )
+            else:
+                kcal_ax.fill_between(
+                    dates, bottom, top, color=color, alpha=0.8, label=label
+                )
+            bottom = top
+
+        calories_color = METRIC_CONFIG["calories"]["color"]
+        kcal_ax.plot(
+            dates,
+            series["calories"],
+            color="#FFFFFF",
+            linewidth=2 * scale,
+            marker="o" if as_bars else None,
+            markersize=4 * scale,
+            markerfacecolor=calories_color,
+            label="Calories logged",
+        )
+        kcal_ax.set_title(
+            title,
+            fontsize=18 * scale,
+            fontweight="bold",
+            color="#FFFFFF",
+            pad=20 * scale,
+            fontfamily="sans-serif",
+        )
+        _style_axes(kcal_ax, METRIC_CONFIG["calories"]["label"], scale)
+
+        for metric in KCAL_PER_GRAM:
+            grams_ax.plot(
+                dates,
+                series[metric],
+                color=METRIC_CONFIG[metric]["color"],
+                linewidth=2 * scale,
+                label=METRIC_CONFIG[metric]["label"],
+            )
+        _style_axes(grams_ax, "Grams", scale)
+
+        for ax in (kcal_ax, grams_ax):
+            # Headroom so the legend does not cover the tallest days
+            ax.set_ylim(0, ax.get_ylim()[1] * 1.15)
+            ax.legend(
+                loc="upper left",
+                fontsize=9 * scale,
+                frameon=False,
+                ncol=4,
+                labelcolor="#DDDDDD",
+            )
+        fig.autofmt_xdate(rotation=45)
+        fig.tight_layout()
+        fig.savefig(
+            file_path,
+            format=image_format,
+            dpi=dpi,
+            facecolor="#0D0D0D",
+            edgecolor="none",
+        )
+        plt.close(fig)
+
+        # Reset style to default for other plots
+        plt.style.use("default")
+
+    return file_path
+
+
+def render_chart_task(task: dict) -> str:
+    """Process-pool entry point: renders one chart from a picklable task dict."""
+    return render_nutrition_chart(**task)
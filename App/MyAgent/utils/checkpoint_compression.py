@@ -0,0 +1,262 @@
+import zlib
+from typing import Iterable, List, Literal, Optional, Tuple
+
+from langgraph.checkpoint.serde.encrypted import EncryptedSerializer
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+try:
+    import zstandard
+except ImportError:  # zlib is used instead
+    zstandard = None
+
+# Blobs smaller than this are stored as they are (pending writes are often a few bytes)
+_COMPRESS_MIN_BYTES = 256
+
+CompressionMethod = Literal["zstd", "zlib", "none"]
+
+
+class CheckpointCompressor:
+    """Compression for checkpoint blobs, shaped as a langgraph `CipherProtocol`.
+
+    Plugged into `EncryptedSerializer`, the method name is appended to the blob type
+    ("msgpack+zstd"), and blobs whose type has no "+" (written before compression
+    was enabled) are handed to the inner serializer unchanged. Reads don't depend on
+    `method`: every stored format stays readable whatever is configured now.
+
+    Args:
+        method: "zstd", "zlib" (also used when zstandard isn't installed) or "none".
+        level: zstd compression level.
+        dictionary: Raw zstd dictionary (see `train_dictionary`). Compresses the
+            small, repetitive blobs of short threads much better.
+    """
+
+    def __init__(
+        self,
+        method: CompressionMethod = "zstd",
+        level: int = 3,
+        dictionary: Optional[bytes] = None,
+    ) -> None:
+        if method == "zstd" and zstandard is None:
+            print("⚠️ zstandard is not installed, compressing checkpoints with zlib")
+            method = "zlib"
+        self.method = method
+        self.level = level
+        self._dictionary = None
+        if dictionary and zstandard is not None:
+            self._dictionary = zstandard.ZstdCompressionDict(dictionary)
+            self._dictionary.precompute_compress(level=level)
+
+    def encrypt(self, plaintext: bytes) -> Tuple[str, bytes]:
+        if self.method == "none" or len(plaintext) < _COMPRESS_MIN_BYTES:
+            return "raw", plaintext
+        if self.method == "zstd":
+            # Compressors are cheap to create and not thread-safe: one per blob
+            compressor = zstandard.ZstdCompressor(
+                level=self.level, dict_data=self._dictionary
+            )
+            compressed = compressor.compress(plaintext)
+        else:
+            compressed = zlib.compress(plaintext, 6)
+        if len(compressed) >= len(plaintext):
+            return "raw", plaintext
+        return self.method, compressed
+
+    def decrypt(self, ciphername: str, ciphertext: bytes) -> bytes:
+        if ciphername == "raw":
+            return ciphertext
+        if ciphername == "zlib":
+            return zlib.decompress(ciphertext)
+        if ciphername == "zstd":
+            if zstandard is None:
+                raise ImportError("zstandard is required to read zstd checkpoints")
+            dict_id = zstandard.get_frame_parameters(ciphertext).dict_id
+            if dict_id and (
+                self._dictionary is None or self._dictionary.dict_id() != dict_id
+            ):
+                raise ValueError(
+                    f"Checkpoint was compressed with zstd dictionary {dict_id}, "
+                    "which is not loaded (CHECKPOINT_ZSTD_DICT)"
+                )
+            decompressor = zstandard.ZstdDecompressor(
+                dict_data=self._dictionary if dict_id else None
+            )
+            return decompressor.decompress(ciphertext)
+        raise ValueError(f"Unknown checkpoint compression {ciphername!r}")
+
+
+def compressed_serializer(
+    method: CompressionMethod = "zstd",
+    level: int = 3,
+    dictionary_path: Optional[str] = None,
+) -> EncryptedSerializer:
+    """The default JsonPlusSerializer with compressed blobs.
+
+    Args:
+        method: See `CheckpointCompressor`.
+        level: zstd compression level.
+        dictionary_path: File written by `train_dictionary`, if any.
+    """
+    dictionary = None
+    if dictionary_path:
+        with open(dictionary_path, "rb") as f:
+            dictionary = f.read()
+    return EncryptedSerializer(
+        CheckpointCompressor(method, level, dictionary), JsonPlusSerializer()
+    )
+
+
+def train_dictionary(samples: Iterable[bytes], size: int = 64 * 1024) -> bytes:
+    """Trains a zstd dictionary on serialized (uncompressed) checkpoint blobs."""
+    if zstandard is None:
+        raise ImportError("zstandard is required to train a dictionary")
+    samples = [s for s in samples if len(s) >= _COMPRESS_MIN_BYTES]
+    return zstandard.train_dictionary(size, samples).as_bytes()
+
+
+def stored_blobs(db_path: str, limit: int = 5000) -> List[bytes]:
+    """Uncompressed blobs of an existing checkpoint DB, to train a dictionary on."""
+    import sqlite3
+
+    compressor = CheckpointCompressor()
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT type, checkpoint FROM checkpoints "
+            "UNION ALL SELECT type, value FROM writes LIMIT ?",
+            (limit,),
+        ).fetchall()
+    finally:
+        conn.close()
+    blobs = []
+    for type_, blob in rows:
+        if not blob:
+            continue
+        if type_ and "+" in type_:
+            blob = compressor.decrypt(type_.split("+", 1)[1], blob)
+        blobs.append(blob)
+    return blobs
+
+
+# Dictionary training and benchmark against the plain serializer:
+#   python -m App.MyAgent.utils.checkpoint_compression train [--db agent_checkpoints.db]
+#   python -m App.MyAgent.utils.checkpoint_compression bench [--dict checkpoint.dict]
+if __name__ == "__main__":
+    import argparse
+    import json
+    import os
+    import random
+    import sqlite3
+    import statistics
+    import tempfile
+    import time
+
+    from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+    from langgraph.checkpoint.base import empty_checkpoint
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    FOODS = [
+        ("Chicken, broilers or fryers, breast, meat only, cooked, roasted", 165, 31.0),
+        ("Rice, white, long-grain, regular, enriched, cooked", 130, 2.7),
+        ("Oats, whole grain, rolled, old fashioned", 379, 13.2),
+        ("Bananas, ripe and slightly ripe, raw", 89, 1.1),
+        ("Egg, whole, raw, fresh", 143, 12.6),
+        ("Yogurt, Greek, plain, nonfat", 59, 10.2),
+        ("Broccoli, raw", 34, 2.8),
+        ("Salmon, Atlantic, farmed, cooked, dry heat", 206, 22.1),
+    ]
+
+    def synthetic_thread(seed: int, turns: int):
+        """Yields the growing message list of a food-logging thread, one per step."""
+        rng = random.Random(seed)
+        messages = []
+        for turn in range(turns):
+            name, kcal, protein = rng.choice(FOODS)
+            grams = rng.choice([80, 100, 150, 200, 250])
+            call = {
+                "name": "search_usda_foods",
+                "args": {"query": name.split(",")[0].lower()},
+                "id": f"call_{seed}_{turn}",
+            }
+            rows = [
+                [170000 + rng.randrange(9000), f"{name} {k}", kcal + k, protein, 3.6, 0]
+                for k in range(5)
+            ]
+            steps = [
+                HumanMessage(f"I had {grams} g of {name.split(',')[0].lower()}"),
+                AIMessage("", tool_calls=[call]),
+                ToolMessage(
+                    json.dumps(
+                        {
+                            "cols": ["fdc_id", "food", "kcal", "p", "f", "c"],
+                            "rows": rows,
+                        }
+                    ),
+                    tool_call_id=call["id"],
+                ),
+                AIMessage(
+                    f"{grams} g of {name}: {kcal * grams / 100:.0f} kcal, "
+                    f"{protein * grams / 100:.1f} g protein. Shall I save it?"
+                ),
+            ]
+            for message in steps:
+                messages.append(message)
+                yield list(messages)
+
+    def run_saver(serde, threads: int, turns: int, seed: int):
+        """Writes every step of the synthetic threads, then reads each thread back."""
+        path = os.path.join(tempfile.mkdtemp(), "bench.db")
+        saver = SqliteSaver(sqlite3.connect(path, check_same_thread=False), serde=serde)
+        writes, reads = [], []
+        for t in range(threads):
+            config = {"configurable": {"thread_id": str(t), "checkpoint_ns": ""}}
+            for step, messages in enumerate(synthetic_thread(seed + t, turns)):
+                checkpoint = empty_checkpoint()
+                checkpoint["id"] = f"{step:08d}"
+                checkpoint["channel_values"] = {"messages": messages}
+                start = time.perf_counter()
+                config = saver.put(config, checkpoint, {"step": step}, {})
+                writes.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            saver.get_tuple(config)
+            reads.append(time.perf_counter() - start)
+        saver.conn.execute("VACUUM")
+        return writes, reads, os.path.getsize(path)
+
+    parser = argparse.ArgumentParser(prog="checkpoint_compression")
+    parser.add_argument("command", choices=["train", "bench"])
+    parser.add_argument("--db", help="Checkpoint DB to train on (default: synthetic)")
+    parser.add_argument("--dict", default="checkpoint_zstd.dict")
+    parser.add_argument("--threads", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=25)
+    args = parser.parse_args()
+
+    if args.command == "train":
+        if args.db:
+            samples = stored_blobs(args.db)
+        else:
+            plain = JsonPlusSerializer()
+            samples = [
+                plain.dumps_typed({"messages": messages})[1]
+                for seed in range(1000, 1100)
+                for messages in synthetic_thread(seed, 8)
+            ]
+        with open(args.dict, "wb") as f:
+            f.write(train_dictionary(samples))
+        print(f"📚 Trained {args.dict} on {len(samples)} blobs")
+    else:
+        serializers = {
+            "plain msgpack": JsonPlusSerializer(),
+            "zlib": compressed_serializer("zlib"),
+            "zstd": compressed_serializer("zstd"),
+        }
+        if os.path.exists(args.dict):
+            serializers["zstd + dict"] = compressed_serializer("zstd", 3, args.dict)
+        baseline = None
+        for label, serde in serializers.items():
+            writes, reads, size = run_saver(serde, args.threads, args.turns, seed=0)
+            baseline = baseline or size
+            print(
+                f"📊 {label:14} write p50 {statistics.median(writes) * 1e3:6.2f} ms | "
+                f"read p50 {statistics.median(reads) * 1e3:6.2f} ms | "
+                f"{size / 1e6:7.2f} MB ({size / baseline:.0%})"
+            )
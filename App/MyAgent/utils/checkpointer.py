@@ -1,8 +1,54 @@
 import sqlite3
+from functools import lru_cache
+from typing import Optional
 
+import aiosqlite
 from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from App.config import config
+
+from .checkpoint_compression import compressed_serializer
 
 DB_PATH = "agent_checkpoints.db"
-conn = sqlite3.connect(DB_PATH, check_same_thread=False)
 
-memory = SqliteSaver(conn)
+
+def _serializer():
+    # Blobs are compressed; checkpoints written before that are still read as they are
+    return compressed_serializer(
+        config.CHECKPOINT_COMPRESSION,
+        config.CHECKPOINT_ZSTD_LEVEL,
+        config.CHECKPOINT_ZSTD_DICT,
+    )
+
+
+# Opened on first use instead of at import time
+@lru_cache()
+def get_checkpointer() -> SqliteSaver:
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    return SqliteSaver(conn, serde=_serializer())
+
+
+_async_checkpointer: Optional[AsyncSqliteSaver] = None
+
+
+def get_async_checkpointer() -> AsyncSqliteSaver:
+    """Checkpointer for graph.ainvoke, bound to the running event loop.
+
+    Must be first called from inside that loop (the API server's); the connection
+    itself is opened by the saver on first use.
+    """
+    global _async_checkpointer
+    if _async_checkpointer is None:
+        _async_checkpointer = AsyncSqliteSaver(
+            aiosqlite.connect(DB_PATH), serde=_serializer()
+        )
+    return _async_checkpointer
+
+
+async def close_async_checkpointer() -> None:
+    """Closes the async checkpointer's connection (its thread keeps the process alive)."""
+    global _async_checkpointer
+    if _async_checkpointer is not None:
+        await _async_checkpointer.conn.close()
+        _async_checkpointer = None
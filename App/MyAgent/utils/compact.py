@@ -0,0 +1,245 @@
+import json
+import uuid
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+from App.config import config
+from App.MyAgent.clients.usda_cache import FoodCache
+
+# Tool results become ToolMessages: they are re-sent to the LLM on every later turn and
+# stored in every checkpoint. So they are returned as tables (column names once, then
+# rows), with only the fields the agents use and rounded numbers.
+
+USDA_COLUMNS = ["fdc_id", "food", "kcal", "p", "f", "c"]
+ENTRY_COLUMNS = ["id", "time", "meal", "food", "qty", "unit", "kcal", "p", "f", "c"]
+
+# USDA nutrient names → column (the search returns nutrients keyed by name)
+_USDA_NUTRIENT_COLUMNS = {
+    "Energy": "kcal",
+    "Protein": "p",
+    "Total lipid (fat)": "f",
+    "Carbohydrate, by difference": "c",
+}
+
+_RESULTS_NAMESPACE = "tool_results"
+
+
+def compact_json(payload: Any) -> str:
+    """JSON without the spaces ToolNode's default json.dumps puts after , and :"""
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+
+
+def _num(value: Optional[float], digits: int = 1):
+    """Rounds, and drops the ".0" of whole numbers (2 instead of 2.0)."""
+    if value is None:
+        return None
+    value = round(value, digits)
+    return int(value) if value == int(value) else value
+
+
+# -------------------------------------------
+# USDA SEARCH RESULTS
+# -------------------------------------------
+
+
+def compact_usda_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Search results as one row per food with per-100 g kcal/protein/fat/carbs.
+
+    Brand and nutrient units are dropped (searches only return generic reference
+    foods, always in kcal and g). Error results are returned unchanged.
+    """
+    if len(results) == 1 and "error" in results[0]:
+        return results[0]
+
+    rows = []
+    for item in results:
+        values = {
+            column: _num((item["nutrients"].get(name) or {}).get("value"))
+            for name, column in _USDA_NUTRIENT_COLUMNS.items()
+        }
+        rows.append(
+            [item["fdc_id"], item["description"]]
+            + [values[column] for column in USDA_COLUMNS[2:]]
+        )
+
+    table: Dict[str, Any] = {"cols": USDA_COLUMNS, "rows": rows}
+    # Results served from the local cache while USDA is down
+    sources = {item["source"] for item in results if "source" in item}
+    if sources:
+        table["source"] = sources.pop()
+    return table
+
+
+# -------------------------------------------
+# FOOD LOG ENTRIES
+# -------------------------------------------
+
+
+def entry_rows(entries: Sequence[Dict[str, Any]]) -> List[List[Any]]:
+    """Entry dicts (as built by the data review tools) → ENTRY_COLUMNS rows."""
+    return [
+        [
+            e["id"],
+            e["created_at"][:16].replace("T", " "),
+            e["meal_type"],
+            e["food_description"],
+            _num(e["quantity"], 2),
+            e["unit"],
+            _num(e["calories"], 0),
+            _num(e["protein_g"]),
+            _num(e["fat_g"]),
+            _num(e["carbs_g"]),
+        ]
+        for e in entries
+    ]
+
+
+def compact_entries(
+    data: Dict[str, Any], user_id: int, max_rows: Optional[int] = None
+) -> str:
+    """The query_food_entries payload of `user_id` as a table of at most `max_rows` rows.
+
+    When there are more, all rows are stored out of band and the result carries a
+    handle (see `load_rows`) instead of the rows themselves.
+    """
+    max_rows = max_rows or config.TOOL_RESULT_MAX_ROWS
+    rows = entry_rows(data["entries"])
+    payload: Dict[str, Any] = {
+        "summary": data["summary"],
+        "count": data["count"],
+        "totals": {k: _num(v) for k, v in data["totals"].items()},
+        "cols": ENTRY_COLUMNS,
+        "rows": rows[:max_rows],
+    }
+    if len(rows) > max_rows:
+        payload["more"] = {"handle": store_rows(rows, user_id), "next_offset": max_rows}
+    return compact_json(payload)
+
+
+# -------------------------------------------
+# OUT-OF-BAND RESULTS
+# -------------------------------------------
+
+
+# Shares the USDA cache file: every API worker sees the handles of the others
+@lru_cache()
+def get_result_store() -> FoodCache:
+    return FoodCache(config.USDA_CACHE_PATH, max_items=256, pool_size=2)
+
+
+def store_rows(rows: List[List[Any]], user_id: int) -> str:
+    """Keeps a large result of `user_id` out of the conversation and returns its handle."""
+    store = get_result_store()
+    store.prune(_RESULTS_NAMESPACE, config.TOOL_RESULT_TTL_S)
+    handle = f"res_{uuid.uuid4().hex[:12]}"
+    store.put(_RESULTS_NAMESPACE, handle, {"user_id": user_id, "rows": rows})
+    return handle
+
+
+def load_rows(
+    handle: str, user_id: int, offset: int, limit: int
+) -> Optional[Dict[str, Any]]:
+    """A page of a stored result, or None if the handle is unknown, expired or
+    belongs to another user (the store is shared by every user and worker)."""
+    stored = get_result_store().get(_RESULTS_NAMESPACE, handle)
+    # Handles stored before rows carried their owner (a bare list) are treated as expired
+    if not isinstance(stored, dict) or stored["user_id"] != user_id:
+        return None
+    rows = stored["rows"]
+    page: Dict[str, Any] = {
+        "cols": ENTRY_COLUMNS,
+        "rows": rows[offset : offset + limit],
+    }
+    if offset + limit < len(rows):
+        page["next_offset"] = offset + limit
+    return page
+
+
+# Measures the saving on a long synthetic thread: python -m App.MyAgent.utils.compact
+if __name__ == "__main__":
+    import os
+    import tempfile
+    from datetime import datetime, timedelta
+
+    from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+    from langchain_core.messages.utils import count_tokens_approximately
+    from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+    def usda_result(i: int) -> List[Dict[str, Any]]:
+        return [
+            {
+                "fdc_id": 170000 + i * 10 + k,
+                "description": f"Chicken, broilers or fryers, breast, meat only, cooked {k}",
+                "brand": "Generic",
+                "nutrients": {
+                    "Energy": {"value": 165.0 + k, "unit": "KCAL"},
+                    "Protein": {"value": 31.02 + k, "unit": "G"},
+                    "Total lipid (fat)": {"value": 3.57, "unit": "G"},
+                    "Carbohydrate, by difference": {"value": 0.0, "unit": "G"},
+                },
+            }
+            for k in range(5)
+        ]
+
+    def entries_result(count: int) -> Dict[str, Any]:
+        now = datetime(2026, 10, 19, 12, 0)
+        entries = [
+            {
+                "id": 1000 + n,
+                "food_description": "Oatmeal with banana and honey",
+                "calories": 312.456,
+                "protein_g": 9.8765,
+                "fat_g": 5.4321,
+                "carbs_g": 58.1234,
+                "quantity": 1.0,
+                "unit": "bowl",
+                "meal_type": "breakfast",
+                "source": "usda",
+                "created_at": (now - timedelta(hours=5 * n)).isoformat(),
+            }
+            for n in range(count)
+        ]
+        return {
+            "summary": f"Found {count} entries.",
+            "entries": entries,
+            "count": count,
+            "totals": {"calories": 312.5 * count, "protein_g": 9.9 * count},
+        }
+
+    def thread(compact: bool, turns: int = 30):
+        messages = []
+        for i in range(turns):
+            messages.append(HumanMessage(f"Log 200 g of chicken breast #{i}"))
+            search = usda_result(i)
+            content = (
+                compact_json(compact_usda_results(search))
+                if compact
+                else json.dumps(search, ensure_ascii=False)
+            )
+            messages.append(AIMessage("", tool_calls=[]))
+            messages.append(ToolMessage(content, tool_call_id=f"s{i}"))
+            if i % 3 == 0:
+                data = entries_result(40)
+                if compact:
+                    content = compact_entries(data, user_id=1, max_rows=20)
+                else:
+                    data["entries"] = data["entries"][:20]
+                    content = json.dumps(data, ensure_ascii=False)
+                messages.append(ToolMessage(content, tool_call_id=f"q{i}"))
+            messages.append(AIMessage("Logged it."))
+        return messages
+
+    # Handles go to a throwaway store, not the shared food_cache.db
+    config.USDA_CACHE_PATH = os.path.join(
+        tempfile.mkdtemp(prefix="compact_"), "cache.db"
+    )
+
+    serde = JsonPlusSerializer()
+    for label, compact in (("full", False), ("compact", True)):
+        messages = thread(compact)
+        _, blob = serde.dumps_typed({"messages": messages})
+        tokens = count_tokens_approximately(messages)
+        print(
+            f"📏 {label:8} {tokens:7,} prompt tokens (approx.) | "
+            f"{len(blob):8,} checkpoint bytes"
+        )
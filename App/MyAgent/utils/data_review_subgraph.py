@@ -1,15 +1,31 @@
+from functools import lru_cache
+
 from langchain_core.messages import SystemMessage
 from langgraph.graph import START, StateGraph
 from langgraph.prebuilt import ToolNode, tools_condition
 
-from App.MyAgent.clients.model import get_model
+from App.MyAgent.clients.model import get_node_model
 
 from .state import AgentState
-from .tools import export_food_csv, query_food_entries
+from .tools import (
+    export_food_csv,
+    get_more_entries,
+    query_food_entries,
+    set_my_timezone,
+)
+
+# Bind the read-only data review tools (plus the time zone setting) to the model
+data_review_tools = [
+    query_food_entries,
+    get_more_entries,
+    export_food_csv,
+    set_my_timezone,
+]
 
-# Bind read-only data review tools to the model
-data_review_tools = [query_food_entries, export_food_csv]
-data_review_model = get_model(temperature=0.3).bind_tools(data_review_tools)
+
+@lru_cache()
+def get_data_review_model():
+    return get_node_model("data_review", temperature=0.3).bind_tools(data_review_tools)
 
 
 def data_review_agent_node(state: AgentState):
@@ -31,6 +47,9 @@ def data_review_agent_node(state: AgentState):
 - For "today": use start_date and end_date as today's date (YYYY-MM-DD format)
 - For "this week": calculate the date range accordingly
 - ALWAYS query the database first — NEVER guess or fabricate data
+- Results are tables: "cols" names the columns of each row (p/f/c = protein/fat/carbs in g)
+- If the result has "more" and the user needs those entries, call 'get_more_entries' with its
+  handle and next_offset instead of querying again
 
 ### Step 3: Present Results
 - Summarize the totals (calories, protein, fat, carbs)
@@ -41,7 +60,13 @@ def data_review_agent_node(state: AgentState):
 ### Step 4: CSV Export
 - If the user explicitly asks to export or download their data, use 'export_food_csv'
 - For large result sets (20+ entries), mention that CSV export is available
-- Return the file path to the user
+- Return the file path to the user, or if the tool replied "Job #N queued", tell them
+  the file is being prepared and will be sent automatically
+
+### Time Zone
+- Dates are the user's local days. If the user tells you their time zone or city, or
+  their "today" looks off, call 'set_my_timezone' with the IANA name
+  (e.g. "Europe/Madrid" for Madrid)
 
 ## RULES:
 - You are READ-ONLY. You cannot add, edit, or delete food entries.
@@ -52,7 +77,7 @@ def data_review_agent_node(state: AgentState):
     )
 
     messages = [system_msg] + list(state["messages"])
-    response = data_review_model.invoke(messages)
+    response = get_data_review_model().invoke(messages)
 
     return {"messages": [response]}
 
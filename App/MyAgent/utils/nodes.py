@@ -1,10 +1,17 @@
+from functools import lru_cache
 from typing import Literal, cast
 
-from App.MyAgent.clients.model import get_instructor, get_model
+from App.MyAgent.clients.model import get_instructor, get_node_model
 
 from .state import AgentState, RouterChoice
 
-model = get_model()
+
+# Built on first use so importing the graph doesn't create API clients
+@lru_cache()
+def get_chatbot_model():
+    return get_node_model("chatbot")
+
+
 # -------------------------------------------
 # NODES
 # -------------------------------------------
@@ -40,7 +47,7 @@ def pick_node(
 
 # --- CHATBOT NODE ---
 def chatbot(state: AgentState):
-    answer = model.invoke(state["messages"])
+    answer = get_chatbot_model().invoke(state["messages"])
     return {"messages": [answer]}
 
 
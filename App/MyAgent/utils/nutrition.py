@@ -0,0 +1,309 @@
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Order of the macro columns in every nutrient vector/matrix of this module
+MACRO_KEYS = ("calories", "protein_g", "fat_g", "carbs_g")
+
+# USDA nutrient IDs → our macro keys.
+# Foundation foods often report energy only as Atwater factors (2047/2048) instead of 1008.
+_NUTRIENT_ID_TO_MACRO = {
+    1008: "calories",
+    2047: "calories",
+    2048: "calories",
+    1003: "protein_g",
+    1004: "fat_g",
+    1005: "carbs_g",
+}
+
+# Mass and volume units that can be converted without looking at USDA portions
+_MASS_UNITS_TO_GRAMS = {
+    "g": 1.0,
+    "gr": 1.0,
+    "gram": 1.0,
+    "grams": 1.0,
+    "kg": 1000.0,
+    "kilogram": 1000.0,
+    "kilograms": 1000.0,
+    "mg": 0.001,
+    "oz": 28.3495,
+    "ounce": 28.3495,
+    "ounces": 28.3495,
+    "lb": 453.592,
+    "lbs": 453.592,
+    "pound": 453.592,
+    "pounds": 453.592,
+}
+_VOLUME_UNITS_TO_ML = {
+    "ml": 1.0,
+    "milliliter": 1.0,
+    "milliliters": 1.0,
+    "l": 1000.0,
+    "liter": 1000.0,
+    "liters": 1000.0,
+}
+
+# Household measures that must match a USDA portion (never guessed as "one item")
+_MEASURE_WORDS = {"cup", "tbsp", "tsp", "slice", "bowl"}
+# Spellings of the same measure, applied to user units and USDA portion labels alike
+# ("2 tablespoons" matches a "1 tbsp" portion)
+_UNIT_SYNONYMS = {
+    "tablespoon": "tbsp",
+    "tbs": "tbsp",
+    "tbl": "tbsp",
+    "teaspoon": "tsp",
+    "ounce": "oz",
+}
+# Preferred USDA portion modifiers for count-like units, in order
+_COUNT_PORTION_PREFERENCE = ("medium", "large", "small", "piece", "whole", "serving")
+# Word endings whose plural adds "es" rather than "s"
+_ES_ENDINGS = ("ch", "sh", "ss", "x", "z", "o")
+
+# Fractions first: "1/2" must not stop at the "1"
+_QUANTITY_PATTERN = re.compile(
+    r"^\s*(?P<quantity>\d+/\d+|\d+(?:[.,]\d+)?)\s*(?P<rest>.*)$"
+)
+
+
+class PortionResolutionError(ValueError):
+    """Raised when a quantity/unit pair cannot be converted to grams."""
+
+
+# -------------------------------------------
+# PARSING
+# -------------------------------------------
+
+
+def parse_quantity(text: str) -> Tuple[float, str]:
+    """Splits a free-text amount into (quantity, unit).
+
+    Examples: "2 eggs" → (2.0, "eggs"), "150g" → (150.0, "g"), "1/2 cup rice" → (0.5, "cup rice").
+    Text without a leading number is treated as a single unit (e.g. "banana" → (1.0, "banana")).
+    """
+    match = _QUANTITY_PATTERN.match(text)
+    if not match:
+        return 1.0, text.strip().lower()
+
+    raw_quantity = match.group("quantity")
+    if "/" in raw_quantity:
+        numerator, denominator = raw_quantity.split("/")
+        quantity = float(numerator) / float(denominator)
+    else:
+        quantity = float(raw_quantity.replace(",", "."))
+
+    return quantity, match.group("rest").strip().lower()
+
+
+def _normalize_unit(unit: str) -> str:
+    """Lowercases, singularizes and canonicalizes a unit word ('Tablespoons' → 'tbsp')."""
+    unit = unit.strip().lower().rstrip(".")
+    # "-es" plurals: "pinches", "dishes", "glasses", "boxes", "tomatoes"
+    if len(unit) > 3 and unit.endswith("es") and unit[:-2].endswith(_ES_ENDINGS):
+        unit = unit[:-2]
+    elif len(unit) > 2 and unit.endswith("s") and not unit.endswith("ss"):
+        unit = unit[:-1]
+    return _UNIT_SYNONYMS.get(unit, unit)
+
+
+def extract_macros_per_100g(food_nutrients: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Extracts per-100 g macros from a USDA `foodNutrients` list.
+
+    Handles both the search format ({"nutrientId", "value"}) and the
+    food details format ({"nutrient": {"id"}, "amount"}).
+    """
+    macros: Dict[str, float] = {}
+    for n in food_nutrients:
+        if "nutrient" in n:
+            nutrient_id = n["nutrient"].get("id")
+            value = n.get("amount")
+        else:
+            nutrient_id = n.get("nutrientId")
+            value = n.get("value")
+
+        key = _NUTRIENT_ID_TO_MACRO.get(nutrient_id)
+        # Keep the first energy value found (1008 comes before the Atwater variants)
+        if key is None or value is None or key in macros:
+            continue
+        macros[key] = float(value)
+
+    return {key: macros.get(key, 0.0) for key in MACRO_KEYS}
+
+
+# -------------------------------------------
+# UNIT → GRAMS RESOLUTION
+# -------------------------------------------
+
+
+def _portion_grams_per_unit(portion: Dict[str, Any]) -> Tuple[str, float]:
+    """Returns (normalized measure, grams for one measure) from a cached portion entry."""
+    amount_text, _, measure = portion["label"].partition(" ")
+    try:
+        amount = float(amount_text) or 1.0
+    except ValueError:
+        amount, measure = 1.0, portion["label"]
+    return _normalize_unit(measure), float(portion["gram_weight"]) / amount
+
+
+def _measure_words(measure: str) -> List[str]:
+    """Singular words of a portion measure ("cups, chopped" → ["cup", "chopped"])."""
+    return [_normalize_unit(word) for word in re.findall(r"[a-z]+", measure.lower())]
+
+
+def resolve_grams(
+    quantity: float,
+    unit: str,
+    portions: Optional[List[Dict[str, Any]]] = None,
+) -> float:
+    """Converts a quantity in any unit to grams.
+
+    Mass units are converted directly. Everything else ("cup", "slice", "large", "eggs")
+    is matched against the USDA portion weights returned by `USDAClient.get_food_portions`.
+    Volumes without a matching portion fall back to 1 g/ml.
+
+    Raises:
+        PortionResolutionError: if the unit is unknown and no portion matches.
+    """
+    # Only the first word is the unit ("cup rice" → "cup", "large eggs" → "large")
+    raw_unit = unit.strip().lower().split(" ", 1)[0]
+    if raw_unit in _MASS_UNITS_TO_GRAMS:
+        return quantity * _MASS_UNITS_TO_GRAMS[raw_unit]
+
+    normalized = _normalize_unit(raw_unit)
+    per_unit = dict(_portion_grams_per_unit(p) for p in (portions or []))
+
+    # 1) Exact measure match ("cup" → "1 cup", "ml" → "100 ml")
+    if normalized in per_unit:
+        return quantity * per_unit[normalized]
+
+    # 2) Volumes without an exact USDA portion: assume water density. Checked before
+    # word matching so that "l" never matches a portion like "1 large"
+    if raw_unit in _VOLUME_UNITS_TO_ML:
+        return quantity * _VOLUME_UNITS_TO_ML[raw_unit]
+
+    # 3) Whole-word match ("cup" → "1 cup, chopped", "egg" → "1 large egg")
+    for measure, grams in per_unit.items():
+        if normalized in _measure_words(measure):
+            return quantity * grams
+
+    # 4) Count-like units ("2 eggs", "1 piece") → the most typical single-item portion
+    if per_unit and normalized not in _MEASURE_WORDS:
+        for preferred in _COUNT_PORTION_PREFERENCE:
+            for measure, grams in per_unit.items():
+                if preferred in measure:
+                    return quantity * grams
+        return quantity * next(iter(per_unit.values()))
+
+    raise PortionResolutionError(
+        f"Cannot convert '{quantity} {unit}' to grams: no matching USDA portion."
+    )
+
+
+# -------------------------------------------
+# VECTORIZED MEAL SCALING
+# -------------------------------------------
+
+
+def scale_meal(
+    items: List[Dict[str, Any]],
+    get_portions: Callable[[int], Dict[str, Any]],
+) -> Dict[str, Any]:
+    """Scales per-100 g macros to the user's quantities for a whole meal in one pass.
+
+    Each item needs `quantity` and `unit`, plus either an `fdc_id` (portions and
+    nutrients come from `get_portions`) or explicit per-100 g macros
+    (`calories`, `protein_g`, `fat_g`, `carbs_g`) which override the USDA values.
+
+    Returns:
+        Dict with `items` (ready-to-save values for `save_food_to_db`), `totals`
+        and `errors` (items that could not be resolved, by index).
+    """
+    grams: List[float] = []
+    per_100g_rows: List[List[float]] = []
+    resolved: List[Dict[str, Any]] = []
+    errors: List[Dict[str, Any]] = []
+
+    for index, item in enumerate(items):
+        fdc_id = item.get("fdc_id")
+        details: Dict[str, Any] = {}
+        if fdc_id is not None:
+            details = get_portions(fdc_id) or {}
+            if "error" in details:
+                errors.append({"index": index, "error": details["error"]})
+                continue
+
+        per_100g = dict(details.get("nutrients_per_100g") or {})
+        per_100g.update(
+            {k: float(item[k]) for k in MACRO_KEYS if item.get(k) is not None}
+        )
+        if not per_100g:
+            errors.append({"index": index, "error": "No per-100 g nutrient data."})
+            continue
+
+        try:
+            item_grams = resolve_grams(
+                float(item["quantity"]), item["unit"], details.get("portions")
+            )
+        except PortionResolutionError as e:
+            errors.append({"index": index, "error": str(e)})
+            continue
+
+        grams.append(item_grams)
+        per_100g_rows.append([per_100g.get(k, 0.0) for k in MACRO_KEYS])
+        resolved.append(
+            {
+                "food_description": item.get("food_description")
+                or details.get("description")
+                or "",
+                "quantity": float(item["quantity"]),
+                "unit": item["unit"],
+                "fdc_id": fdc_id,
+                "source": "usda" if fdc_id is not None else "llm_estimation",
+            }
+        )
+
+    if not resolved:
+        return {
+            "items": [],
+            "totals": {k: 0.0 for k in MACRO_KEYS},
+            "errors": errors,
+        }
+
+    # (n, 4) per-100 g matrix scaled row-wise by grams / 100
+    gram_vector = np.asarray(grams, dtype=float)
+    scaled = np.asarray(per_100g_rows, dtype=float) * (gram_vector / 100.0)[:, None]
+    scaled = np.round(scaled, 1)
+    totals = np.round(scaled.sum(axis=0), 1)
+
+    for entry, row, item_grams in zip(resolved, scaled.tolist(), gram_vector.tolist()):
+        entry.update(dict(zip(MACRO_KEYS, row)))
+        entry["grams"] = round(item_grams, 1)
+
+    return {
+        "items": resolved,
+        "totals": dict(zip(MACRO_KEYS, totals.tolist())),
+        "errors": errors,
+    }
+
+
+# Simple test block
+if __name__ == "__main__":
+    fake_portions = {
+        747997: {
+            "fdc_id": 747997,
+            "description": "Eggs, Grade A, Large, egg whole",
+            "portions": [{"label": "1 large", "gram_weight": 50.0}],
+            "nutrients_per_100g": {
+                "calories": 148.0,
+                "protein_g": 12.4,
+                "fat_g": 9.96,
+                "carbs_g": 0.96,
+            },
+        },
+    }
+    meal = [
+        {"fdc_id": 747997, "quantity": 2, "unit": "eggs"},
+        {"fdc_id": 747997, "quantity": 150, "unit": "g"},
+    ]
+    print(parse_quantity("1 cup rice"))
+    print(scale_meal(meal, fake_portions.__getitem__))
@@ -1,4 +1,4 @@
-from typing import Annotated, Literal, TypedDict
+from typing import Annotated, Literal, Optional, TypedDict
 
 from langchain_core.messages import SystemMessage
 from langgraph.graph.message import add_messages
@@ -28,8 +28,36 @@ class RouterChoice(BaseModel):
         ...,
         description=(
             "food_entry: User mentions eating/consuming food\n"
-            "data_review: User wants to review their history data (e.g., 'How many burgers I ate this week?')\n"
+            "data_review: User wants to review their history data (e.g., 'How many burgers I ate this week?') "
+            "or set their time zone (e.g., 'I live in Madrid')\n"
             "chart_request: User requests a chart/graph of their data (e.g., 'Show me a graph of my calorie intake this month')\n"
             "chatbot: General conversation"
         ),
     )
+
+
+# --- Meal item for deterministic nutrition scaling ---
+class MealItem(BaseModel):
+    food_description: str = Field(
+        ..., description="Name of the food as it will be saved"
+    )
+    quantity: float = Field(..., description="Amount the user ate (e.g., 2, 1.5, 150)")
+    unit: str = Field(
+        ...,
+        description="Unit as the user said it (e.g., 'g', 'cup', 'slice', 'eggs', 'large')",
+    )
+    fdc_id: Optional[int] = Field(
+        None, description="USDA FoodData Central ID from search_usda_foods, if found"
+    )
+    calories: Optional[float] = Field(
+        None, description="Per-100 g calories, ONLY for estimated foods without fdc_id"
+    )
+    protein_g: Optional[float] = Field(
+        None, description="Per-100 g protein, ONLY for estimated foods without fdc_id"
+    )
+    fat_g: Optional[float] = Field(
+        None, description="Per-100 g fat, ONLY for estimated foods without fdc_id"
+    )
+    carbs_g: Optional[float] = Field(
+        None, description="Per-100 g carbs, ONLY for estimated foods without fdc_id"
+    )
@@ -1,20 +1,47 @@
+from functools import lru_cache
+
 from langchain_core.messages import SystemMessage, ToolMessage
 from langgraph.graph import START, StateGraph
 from langgraph.prebuilt import ToolNode, tools_condition
 
-from App.MyAgent.clients.model import get_model
+from App.MyAgent.clients.model import get_node_model
 
 from .state import AgentState
-from .tools import save_food_to_db, search_usda_foods
-
-# Using default model and binding food-related tools
-tools = [search_usda_foods, save_food_to_db]
-food_model = get_model(temperature=0.3).bind_tools(tools)
+from .tools import (
+    calculate_meal_nutrition,
+    create_recipe,
+    find_my_recipes,
+    log_recipe,
+    log_repeat_foods,
+    recall_my_foods,
+    recall_my_meal,
+    save_food_to_db,
+    search_usda_foods,
+)
+
+# Binding food-related tools (the food node runs on the strong model tier)
+tools = [
+    recall_my_foods,
+    recall_my_meal,
+    log_repeat_foods,
+    find_my_recipes,
+    log_recipe,
+    create_recipe,
+    search_usda_foods,
+    calculate_meal_nutrition,
+    save_food_to_db,
+]
+
+
+@lru_cache()
+def get_food_model():
+    return get_node_model("food", temperature=0.3).bind_tools(tools)
 
 
 def food_agent_node(state: AgentState):
     """
-    Subgraph node for handling food_entries using a specialized food model with tools."""
+    Subgraph node for handling food_entries using a specialized food model with tools.
+    """
 
     # When this subgraph node is invoked,
     # the last message must be always a food_entry request.
@@ -33,20 +60,36 @@ def food_agent_node(state: AgentState):
 - **DON'T** ask for exact weights or specific types repeatedly
 - **DO** make smart assumptions
 
+### Step 1b: Check the user's food memory FIRST
+- For a repeated meal ("same lunch as yesterday", "what I had for breakfast on Monday"), call 'recall_my_meal'
+- Otherwise call 'recall_my_foods' with each food name (e.g. "my usual oatmeal" → "oatmeal")
+- **If a past entry matches with the same quantity and unit** (or a whole multiple of it): present it and
+  ASK FOR CONFIRMATION, then save it with 'log_repeat_foods' (entry ids, servings) — skip Steps 2-4
+- If it matches but the quantity differs and it has an fdc_id: call 'calculate_meal_nutrition' with that
+  fdc_id directly (no USDA search needed), then continue with Step 3
+- For a home-made dish ("my chili", "a bowl of my meal-prep curry"), call 'find_my_recipes': if it
+  matches, ASK FOR CONFIRMATION of the servings, then save it with 'log_recipe' (ONE entry) — skip Steps 2-4
+- No match → continue with Step 2
+
+### Recipes (when the user wants to SAVE a dish, e.g. "save my chili recipe, it makes 6 servings")
+- Search each ingredient with 'search_usda_foods', present the ingredient list and ASK FOR CONFIRMATION
+- Then call 'create_recipe' ONCE with ALL ingredients of the batch and the number of servings
+- Only log it as eaten (with 'log_recipe') if the user also says they ate it
+
 ### Step 2: Search for Food Data
 - Use 'search_usda_foods' **SEPARATELY for each food item**
 - Example: For "2 eggs and a raspberry smoothie", search for "eggs" first, then "raspberry smoothie"
-- Review the results carefully for each item
+- Review the results carefully for each item (each row: fdc_id, food, kcal, p, f, c per 100 g)
 
 ### Step 3: Handle Search Results
 **If results found:**
 - Select the most relevant match for each food item
-- Calculate nutrition based on the user's QUANTITY (not the default serving size)
+- Call 'calculate_meal_nutrition' ONCE with ALL items (fdc_id, quantity, unit) — NEVER do the math yourself
 - Present ALL food items to the user and ASK FOR CONFIRMATION before saving
 
-**If NO results found (empty list):**
+**If NO results found (no rows):**
 - Inform the user that the food wasn't found in USDA database
-- Provide your best ESTIMATION of the nutritional values
+- Provide your best ESTIMATION of the per-100 g values and pass them to 'calculate_meal_nutrition' (without fdc_id)
 - Clearly state it's an estimation and ASK FOR CONFIRMATION before saving
 
 ### Step 4: Save (ONLY after user confirms)
@@ -57,18 +100,19 @@ def food_agent_node(state: AgentState):
 - Use:
   - The user's specified quantity for each item
   - source='usda' if from search, source='llm_estimation' if estimated
-  - Accurate nutritional values adjusted for quantity
+  - The exact values returned by 'calculate_meal_nutrition'
   - meal_type: If the user mentions a meal context (e.g., "for breakfast", "lunch"), set meal_type accordingly (breakfast/lunch/dinner/snack). Otherwise, leave it as null.
 
 ### Step 5: Confirm
 - Tell the user ALL foods have been logged with a summary of each
 
 ## IMPORTANT RULES:
-- **NEVER combine multiple foods into a single database entry**
+- **NEVER combine multiple foods into a single database entry** (a saved recipe logged with 'log_recipe' is the only exception)
 - **ALWAYS search and save each food item SEPARATELY**
 - NEVER save without asking the user to confirm first
-- ALWAYS adjust nutrition values based on user's quantity
+- ALWAYS use 'calculate_meal_nutrition' to adjust nutrition values to the user's quantity
 - ALWAYS wait for search results before deciding next steps
+- Prefer the user's food memory over a new USDA search for foods they have logged before
 - If user says "yes", "confirm", "ok", "save it" → proceed to save ALL items
 - If user says "no", "cancel", "wrong" → ask what to change
 
@@ -83,7 +127,7 @@ def food_agent_node(state: AgentState):
     messages = [system_msg] + list(state["messages"])
 
     # Create a new message list with the system message and the food request
-    response = food_model.invoke(messages)
+    response = get_food_model().invoke(messages)
 
     # Check if this response is calling save_food_to_db tool
     # has_save_call = (
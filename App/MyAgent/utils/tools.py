@@ -1,29 +1,55 @@
+import asyncio
 import csv
+import importlib.util
 import os
-from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional, Sequence, Tuple
 
-import matplotlib
-
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
-from sqlalchemy import Date
-from sqlalchemy import cast as sa_cast
-
-from App.database import FoodEntry, get_db_session
-from App.MyAgent.clients.usda_api import USDAClient
-
-usda_client = USDAClient()
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import Session
+
+from App.config import config
+from App.database import (
+    FoodEntry,
+    Recipe,
+    apply_food_search,
+    async_get_db_session,
+    created_on_days,
+    daily_metric_series,
+    find_user_recipes,
+    get_db_session,
+    get_user_timezone,
+    recall_user_foods,
+    recall_user_meal,
+    recipe_summary,
+    set_user_timezone,
+    user_today,
+)
+from App.MyAgent.clients.usda_api import get_usda_client
+from App.MyAgent.utils.charts import (
+    METRIC_CONFIG,
+    render_dashboard_chart,
+    render_nutrition_chart,
+)
+from App.MyAgent.utils.compact import (
+    compact_entries,
+    compact_json,
+    compact_usda_results,
+    load_rows,
+)
+from App.MyAgent.utils.nutrition import scale_meal
+from App.MyAgent.utils.state import MealItem
+from App.service.jobs import get_job_queue, job_handler, submit_job
 
 
 # --- USDA SEARCH TOOL ---
 @tool
-def search_usda_foods(query: str, limit: int = 5) -> List[Dict[str, Any]]:
+def search_usda_foods(query: str, limit: int = 5) -> str:
     """
     Search USDA FoodData Central for food items.
-    Returns a list of dictionaries matching foods with nutritional data.
+    Returns matching foods as a table with their nutrition per 100 g.
 
     Args:
         query: Food description to search (e.g., "chicken breast", "banana")
@@ -31,14 +57,46 @@ def search_usda_foods(query: str, limit: int = 5) -> List[Dict[str, Any]]:
         limit: Max results (default: 5)
 
     Returns:
-        List of dictonary food items with nutrition info, or empty list [] if not found.
-        If empty, you should estimate the nutrition values instead.
+        JSON {"cols": [...], "rows": [[...], ...]}, one row per food with columns
+        fdc_id, food, kcal, p (protein g), f (fat g), c (carbs g), all per 100 g.
+        No rows means not found: you should estimate the nutrition values instead.
+        A "source" key means the rows come from the local cache because USDA was unavailable.
+        An {"error": ...} result means USDA is down: estimate the values instead.
     """
-    results = usda_client.search_food(query, limit)
+    client = get_usda_client()
+    results = client.search_food(query, limit)
 
     if isinstance(results, list):
-        return results
-    return []
+        # The user usually confirms one of the top hits: have its portions cached by then
+        client.prefetch_portions(
+            r["fdc_id"] for r in results[: config.USDA_PREFETCH_SEARCH_RESULTS]
+        )
+        return compact_json(compact_usda_results(results))
+    return compact_json(results)
+
+
+# --- NUTRITION SCALING TOOL ---
+@tool
+def calculate_meal_nutrition(items: List[MealItem]) -> Dict[str, Any]:
+    """
+    Calculate the exact nutrition for ALL food items of a meal in one call.
+    Converts each quantity/unit to grams using USDA portion weights and scales
+    the per-100 g macros. Do NOT do this arithmetic yourself.
+
+    Args:
+        items: One entry per food item with food_description, quantity, unit and
+               the fdc_id from search_usda_foods. For foods not found in USDA,
+               omit fdc_id and give your estimated per-100 g macros instead.
+
+    Returns:
+        Dict with "items" (values ready for save_food_to_db, including grams),
+        "totals" for the whole meal, and "errors" for items that could not be resolved.
+    """
+    payload = [
+        item.model_dump() if isinstance(item, MealItem) else dict(item)
+        for item in items
+    ]
+    return scale_meal(payload, get_usda_client().get_food_portions)
 
 
 # ! NOT USED ANYMORE
@@ -56,6 +114,35 @@ def search_usda_foods(query: str, limit: int = 5) -> List[Dict[str, Any]]:
 
 
 # --- USDA SAVE TOOL ---
+def _new_food_entry(
+    food_description: str,
+    calories: float,
+    protein_g: float,
+    fat_g: float,
+    carbs_g: float,
+    quantity: float,
+    unit: str,
+    user_id: int,
+    fdc_id: Optional[int],
+    source: str,
+    meal_type: Optional[str],
+) -> FoodEntry:
+    """Builds the row saved by save_food_to_db (shared by its sync and async paths)."""
+    return FoodEntry(
+        user_id=user_id,
+        food_description=food_description,
+        calories=calories,
+        protein_g=protein_g,
+        fat_g=fat_g,
+        carbs_g=carbs_g,
+        quantity=quantity,
+        unit=unit,
+        fdc_id=fdc_id,
+        source=source,
+        meal_type=meal_type,
+    )
+
+
 @tool
 def save_food_to_db(
     food_description: str,
@@ -91,19 +178,7 @@ def save_food_to_db(
     Returns:
         "Success" if saved successfully
     """
-    entry = FoodEntry(
-        user_id=user_id,
-        food_description=food_description,
-        calories=calories,
-        protein_g=protein_g,
-        fat_g=fat_g,
-        carbs_g=carbs_g,
-        quantity=quantity,
-        unit=unit,
-        fdc_id=fdc_id,
-        source=source,
-        meal_type=meal_type,
-    )
+    entry = _new_food_entry(**locals())
 
     with get_db_session() as session:
         session.add(entry)
@@ -114,57 +189,339 @@ def save_food_to_db(
     return "Success"
 
 
+async def _asave_food_to_db(
+    food_description: str,
+    calories: float,
+    protein_g: float,
+    fat_g: float,
+    carbs_g: float,
+    quantity: float,
+    unit: str,
+    user_id: int = 1,
+    fdc_id: Optional[int] = None,
+    source: Literal["usda", "llm_estimation"] = "usda",
+    meal_type: Optional[Literal["breakfast", "lunch", "dinner", "snack"]] = None,
+):
+    """Async path of save_food_to_db (used when the graph runs with ainvoke)."""
+    entry = _new_food_entry(**locals())
+
+    async with async_get_db_session() as session:
+        session.add(entry)
+
+    print(
+        f"💾 SAVED: {food_description} | {calories} kcal | {quantity} {unit} | meal: {meal_type}"
+    )
+    return "Success"
+
+
 # -------------------------------------------
-# DATA REVIEW TOOLS (read-only)
+# PERSONAL FOOD MEMORY TOOLS
 # -------------------------------------------
 
 
-def _fetch_food_entries(
+@tool
+def recall_my_foods(
+    query: Optional[str] = None, user_id: int = 1, limit: int = 5
+) -> List[Dict[str, Any]]:
+    """
+    Look up foods the user has logged before (their personal food memory). Check this
+    BEFORE searching USDA: repeat foods can be logged again with 'log_repeat_foods'.
+
+    Args:
+        query: Food name to look for (typo-tolerant, e.g. "oatmeal"). If None, returns
+               the user's most frequently logged foods.
+        user_id: User identifier (default: 1)
+        limit: Max foods (default: 5)
+
+    Returns:
+        List of past foods with the values of their latest entry: entry_id, food_description,
+        quantity, unit, calories, protein_g, fat_g, carbs_g, fdc_id, source, meal_type,
+        times_logged and last_logged. Empty list if the user never logged anything similar.
+    """
+    with get_db_session(read_only=True) as session:
+        return recall_user_foods(session, user_id, query, limit)
+
+
+async def _arecall_my_foods(
+    query: Optional[str] = None, user_id: int = 1, limit: int = 5
+) -> List[Dict[str, Any]]:
+    """Async path of recall_my_foods."""
+    async with async_get_db_session(read_only=True) as session:
+        return await session.run_sync(recall_user_foods, user_id, query, limit)
+
+
+def _resolve_day(session: Session, user_id: int, day: str):
+    if day in ("today", "yesterday"):
+        today = user_today(session, user_id)
+        return today if day == "today" else today - timedelta(days=1)
+    return datetime.strptime(day, "%Y-%m-%d").date()
+
+
+@tool
+def recall_my_meal(
+    day: str = "yesterday",
+    meal_type: Optional[Literal["breakfast", "lunch", "dinner", "snack"]] = None,
     user_id: int = 1,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
-    meal_type: Optional[str] = None,
-    food_keyword: Optional[str] = None,
 ) -> Dict[str, Any]:
-    """Shared query logic for data review tools. Returns dict with summary, entries, count, totals."""
+    """
+    Get everything the user logged for a meal on a given day, e.g. for
+    "same lunch as yesterday". Log it again with 'log_repeat_foods' and the entry ids.
+
+    Args:
+        day: "today", "yesterday" or a date (YYYY-MM-DD) in the user's time zone
+        meal_type: breakfast, lunch, dinner or snack. If None, the whole day.
+        user_id: User identifier (default: 1)
+
+    Returns:
+        Dict with summary text, entries (with their ids), count and macro totals.
+    """
+    with get_db_session(read_only=True) as session:
+        entries = recall_user_meal(
+            session, user_id, _resolve_day(session, user_id, day), meal_type
+        )
+        return _summarize_entries(entries)
+
 
+@tool
+def log_repeat_foods(
+    entry_ids: List[int],
+    user_id: int = 1,
+    servings: float = 1.0,
+    meal_type: Optional[Literal["breakfast", "lunch", "dinner", "snack"]] = None,
+):
+    """
+    Logs previously saved entries again (from 'recall_my_foods' or 'recall_my_meal'),
+    copying their values. No USDA search or nutrition calculation is needed.
+
+    IMPORTANT: Only call this AFTER the user has confirmed the food entry!
+
+    Args:
+        entry_ids: Ids of the past entries to log again (one new entry each)
+        user_id: User identifier (default: 1)
+        servings: Multiplier for quantity and macros (e.g. 2 for a double portion)
+        meal_type: Meal category for the new entries. If None, keeps each entry's meal type.
+
+    Returns:
+        "Success" if all entries were saved
+    """
     with get_db_session() as session:
-        query = session.query(FoodEntry).filter(FoodEntry.user_id == user_id)
+        past = session.scalars(
+            select(FoodEntry).where(
+                FoodEntry.user_id == user_id, FoodEntry.id.in_(entry_ids)
+            )
+        ).all()
+        missing = set(entry_ids) - {e.id for e in past}
+        if missing:
+            return f"Error: entries {sorted(missing)} not found for this user. Nothing saved."
+
+        for e in past:
+            session.add(
+                FoodEntry(
+                    user_id=user_id,
+                    food_description=e.food_description,
+                    calories=round(e.calories * servings, 1),
+                    protein_g=round(e.protein_g * servings, 1),
+                    fat_g=round(e.fat_g * servings, 1),
+                    carbs_g=round(e.carbs_g * servings, 1),
+                    quantity=round(e.quantity * servings, 2),
+                    unit=e.unit,
+                    fdc_id=e.fdc_id,
+                    source=e.source,
+                    meal_type=meal_type or e.meal_type,
+                )
+            )
+            print(
+                f"💾 SAVED (repeat): {e.food_description} x{servings} | meal: {meal_type or e.meal_type}"
+            )
+    return "Success"
 
-        if start_date:
-            query = query.filter(
-                sa_cast(FoodEntry.created_at, Date)
-                >= datetime.strptime(start_date, "%Y-%m-%d").date()
+
+# -------------------------------------------
+# RECIPE TOOLS
+# -------------------------------------------
+
+
+@tool
+def create_recipe(
+    name: str, ingredients: List[MealItem], servings: float = 1.0, user_id: int = 1
+) -> Dict[str, Any]:
+    """
+    Save a home-made dish once so it can later be logged in one step with 'log_recipe'.
+    Saving under an existing recipe name replaces that recipe.
+
+    IMPORTANT: Only call this AFTER the user has confirmed the ingredients!
+
+    Args:
+        name: Recipe name as the user calls it (e.g., "meal-prep chicken curry")
+        ingredients: ALL ingredients for the whole batch, in the same format as
+                     'calculate_meal_nutrition' (fdc_id from search_usda_foods, or
+                     estimated per-100 g macros without fdc_id)
+        servings: How many servings the batch makes (default: 1)
+        user_id: User identifier (default: 1)
+
+    Returns:
+        Dict with recipe_id, servings, per_serving macros and ingredients,
+        or "errors" (nothing saved) if some ingredients could not be resolved.
+    """
+    if servings <= 0:
+        return {"errors": ["servings must be greater than 0"]}
+    payload = [
+        item.model_dump() if isinstance(item, MealItem) else dict(item)
+        for item in ingredients
+    ]
+    meal = scale_meal(payload, get_usda_client().get_food_portions)
+    if meal["errors"] or not meal["items"]:
+        return {"errors": meal["errors"] or ["No ingredients given."]}
+
+    per_serving = {k: round(v / servings, 1) for k, v in meal["totals"].items()}
+    with get_db_session() as session:
+        # Same name in any letter case, as find_my_recipes matches it
+        recipe = session.scalar(
+            select(Recipe).where(
+                Recipe.user_id == user_id, func.lower(Recipe.name) == name.lower()
             )
-        if end_date:
-            query = query.filter(
-                sa_cast(FoodEntry.created_at, Date)
-                <= datetime.strptime(end_date, "%Y-%m-%d").date()
+        )
+        if recipe is None:
+            recipe = Recipe(user_id=user_id, name=name)
+            session.add(recipe)
+        recipe.servings = servings
+        recipe.ingredients = meal["items"]
+        for key, value in per_serving.items():
+            setattr(recipe, key, value)
+        session.flush()
+        summary = recipe_summary(recipe)
+
+    print(
+        f"📒 RECIPE SAVED: {name} | {servings} servings | {per_serving['calories']} kcal/serving"
+    )
+    return summary
+
+
+@tool
+def find_my_recipes(
+    query: Optional[str] = None, user_id: int = 1, limit: int = 5
+) -> List[Dict[str, Any]]:
+    """
+    Look up the user's saved recipes. Check this when the user mentions a home-made
+    dish ("my chili", "a bowl of my meal-prep curry") BEFORE searching USDA.
+
+    Args:
+        query: Recipe name to look for (typo-tolerant). If None, the newest recipes.
+        user_id: User identifier (default: 1)
+        limit: Max recipes (default: 5)
+
+    Returns:
+        List of recipes with recipe_id, name, servings, per_serving macros and
+        ingredients. Empty list if nothing matches.
+    """
+    with get_db_session(read_only=True) as session:
+        return find_user_recipes(session, user_id, query, limit)
+
+
+@tool
+def log_recipe(
+    recipe_id: int,
+    servings: float = 1.0,
+    user_id: int = 1,
+    meal_type: Optional[Literal["breakfast", "lunch", "dinner", "snack"]] = None,
+):
+    """
+    Logs servings of a saved recipe as ONE food entry using its precomputed macros.
+    No USDA search or nutrition calculation is needed.
+
+    IMPORTANT: Only call this AFTER the user has confirmed the food entry!
+
+    Args:
+        recipe_id: Id from 'find_my_recipes' or 'create_recipe'
+        servings: Servings eaten (e.g. 1.5)
+        user_id: User identifier (default: 1)
+        meal_type: Meal category if mentioned (breakfast, lunch, dinner, snack).
+
+    Returns:
+        "Success" if saved successfully
+    """
+    if servings <= 0:
+        return "Error: servings must be greater than 0. Nothing saved."
+    with get_db_session() as session:
+        recipe = session.scalar(
+            select(Recipe).where(Recipe.id == recipe_id, Recipe.user_id == user_id)
+        )
+        if recipe is None:
+            return f"Error: recipe {recipe_id} not found for this user. Nothing saved."
+
+        session.add(
+            FoodEntry(
+                user_id=user_id,
+                food_description=recipe.name,
+                calories=round(recipe.calories * servings, 1),
+                protein_g=round(recipe.protein_g * servings, 1),
+                fat_g=round(recipe.fat_g * servings, 1),
+                carbs_g=round(recipe.carbs_g * servings, 1),
+                quantity=servings,
+                unit="serving",
+                source="recipe",
+                meal_type=meal_type,
             )
-        if meal_type:
-            query = query.filter(FoodEntry.meal_type == meal_type)
-        if food_keyword:
-            query = query.filter(FoodEntry.food_description.ilike(f"%{food_keyword}%"))
-
-        entries = query.order_by(FoodEntry.created_at.desc()).all()
-
-        # list comprehension to convert SQLAlchemy objects to dicts for LLM consumption
-        entry_list = [
-            {
-                "id": e.id,
-                "food_description": e.food_description,
-                "calories": e.calories,
-                "protein_g": e.protein_g,
-                "fat_g": e.fat_g,
-                "carbs_g": e.carbs_g,
-                "quantity": e.quantity,
-                "unit": e.unit,
-                "meal_type": e.meal_type,
-                "source": e.source,
-                "created_at": e.created_at.isoformat(),
-            }
-            for e in entries
-        ]
+        )
+        print(f"💾 SAVED (recipe): {recipe.name} x{servings} | meal: {meal_type}")
+    return "Success"
+
+
+# -------------------------------------------
+# DATA REVIEW TOOLS (read-only)
+# -------------------------------------------
+
+
+def _food_entries_stmt(
+    session: Session,
+    tz_name: str,
+    user_id: int = 1,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    meal_type: Optional[str] = None,
+    food_keyword: Optional[str] = None,
+) -> Select:
+    """Builds the filtered data review query, shared by the sync and async paths.
+
+    Dates are local days in `tz_name` (the user's time zone).
+    """
+    stmt = select(FoodEntry).where(FoodEntry.user_id == user_id)
+
+    stmt = stmt.where(
+        *created_on_days(
+            datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None,
+            datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else None,
+            tz_name,
+        )
+    )
+    if meal_type:
+        stmt = stmt.where(FoodEntry.meal_type == meal_type)
+    if food_keyword:
+        # Indexed, typo-tolerant search ranked by relevance (then most recent first)
+        stmt = apply_food_search(stmt, session, food_keyword)
+
+    return stmt.order_by(FoodEntry.created_at.desc())
+
+
+def _summarize_entries(entries: Sequence[FoodEntry]) -> Dict[str, Any]:
+    """Converts FoodEntry rows to the dict returned by the data review tools."""
+    # list comprehension to convert SQLAlchemy objects to dicts for LLM consumption
+    entry_list = [
+        {
+            "id": e.id,
+            "food_description": e.food_description,
+            "calories": e.calories,
+            "protein_g": e.protein_g,
+            "fat_g": e.fat_g,
+            "carbs_g": e.carbs_g,
+            "quantity": e.quantity,
+            "unit": e.unit,
+            "meal_type": e.meal_type,
+            "source": e.source,
+            "created_at": e.created_at.isoformat(),
+        }
+        for e in entries
+    ]
 
     count = len(entry_list)
     totals = {
@@ -184,6 +541,46 @@ def _fetch_food_entries(
     }
 
 
+def _fetch_food_entries(
+    user_id: int = 1,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    meal_type: Optional[str] = None,
+    food_keyword: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Shared query logic for data review tools. Returns dict with summary, entries, count, totals."""
+
+    with get_db_session(read_only=True) as session:
+        tz_name = get_user_timezone(session, user_id)
+        stmt = _food_entries_stmt(
+            session, tz_name, user_id, start_date, end_date, meal_type, food_keyword
+        )
+        return _summarize_entries(session.scalars(stmt).all())
+
+
+async def _afetch_food_entries(
+    user_id: int = 1,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    meal_type: Optional[str] = None,
+    food_keyword: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Async counterpart of _fetch_food_entries."""
+
+    async with async_get_db_session(read_only=True) as session:
+        tz_name = await session.run_sync(get_user_timezone, user_id)
+        stmt = _food_entries_stmt(
+            session.sync_session,
+            tz_name,
+            user_id,
+            start_date,
+            end_date,
+            meal_type,
+            food_keyword,
+        )
+        return _summarize_entries((await session.scalars(stmt)).all())
+
+
 @tool
 def query_food_entries(
     user_id: int = 1,
@@ -191,7 +588,7 @@ def query_food_entries(
     end_date: Optional[str] = None,
     meal_type: Optional[str] = None,
     food_keyword: Optional[str] = None,
-) -> Dict[str, Any]:
+) -> str:
     """
     Query the user's food log entries with optional filters. READ-ONLY.
 
@@ -200,10 +597,13 @@ def query_food_entries(
         start_date: Filter entries from this date (YYYY-MM-DD). If None, no lower bound.
         end_date: Filter entries up to this date (YYYY-MM-DD). If None, no upper bound.
         meal_type: Filter by meal type (breakfast, lunch, dinner, snack). If None, all meals.
-        food_keyword: Search food descriptions containing this keyword (case-insensitive).
+        food_keyword: Search food descriptions for this keyword (case-insensitive, tolerates typos,
+                      most relevant matches first).
 
     Returns:
-        Dict with summary text, list of entries (max 20), total count, and macro totals.
+        JSON with summary, count, macro totals and the entries as a table ("cols" +
+        "rows": id, time, meal, food, qty, unit, kcal, p, f, c), at most 20 rows.
+        If there are more, "more" has a handle for 'get_more_entries'.
     """
     data = _fetch_food_entries(
         user_id=user_id,
@@ -212,44 +612,53 @@ def query_food_entries(
         meal_type=meal_type,
         food_keyword=food_keyword,
     )
-    # Cap entries at 20 for the LLM context window
-    if data["count"] > 20:
-        data["entries"] = data["entries"][:20]
-        data["summary"] += " Showing the 20 most recent."
-    return data
+    return compact_entries(data, user_id)
 
 
-@tool
-def export_food_csv(
+async def _aquery_food_entries(
     user_id: int = 1,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     meal_type: Optional[str] = None,
     food_keyword: Optional[str] = None,
 ) -> str:
-    """
-    Export the user's food log entries to a CSV file with optional filters. READ-ONLY.
-
-    Args:
-        user_id: User identifier (default: 1)
-        start_date: Filter entries from this date (YYYY-MM-DD). If None, no lower bound.
-        end_date: Filter entries up to this date (YYYY-MM-DD). If None, no upper bound.
-        meal_type: Filter by meal type (breakfast, lunch, dinner, snack). If None, all meals.
-        food_keyword: Search food descriptions containing this keyword (case-insensitive).
-
-    Returns:
-        The file path of the exported CSV.
-    """
-    data = _fetch_food_entries(
+    """Async path of query_food_entries."""
+    data = await _afetch_food_entries(
         user_id=user_id,
         start_date=start_date,
         end_date=end_date,
         meal_type=meal_type,
         food_keyword=food_keyword,
     )
+    return compact_entries(data, user_id)
+
 
+@tool
+def get_more_entries(
+    handle: str, user_id: int = 1, offset: int = 20, limit: int = 20
+) -> str:
+    """
+    Get more rows of a large 'query_food_entries' result, without querying again. READ-ONLY.
+
+    Args:
+        handle: The "handle" from the "more" field of the query_food_entries result.
+        user_id: User identifier (default: 1), the same as in query_food_entries.
+        offset: First row to return (the "next_offset" of the previous result).
+        limit: Max rows (default: 20)
+
+    Returns:
+        JSON table with the same columns, plus "next_offset" if rows are left.
+    """
+    page = load_rows(handle, user_id, offset, min(limit, config.TOOL_RESULT_MAX_ROWS))
+    if page is None:
+        return "Error: this result has expired or is not available. Call query_food_entries again."
+    return compact_json(page)
+
+
+def _write_entries_csv(data: Dict[str, Any]) -> str:
+    """Writes fetched entries to exports/ and returns the file path."""
     if data["count"] == 0:
-        return "No entries found matching the filters. Nothing to export."
+        raise ValueError("No entries found matching the filters. Nothing to export.")
 
     exports_dir = "exports"
     os.makedirs(exports_dir, exist_ok=True)
@@ -277,7 +686,142 @@ def export_food_csv(
         # Use _fetch_food_entries with no cap — entry_list already has all entries
         writer.writerows(data["entries"])
 
-    return f"CSV exported successfully to: {file_path} ({data['count']} entries)"
+    return file_path
+
+
+@job_handler("export_csv")
+def _export_csv_job(params: Dict[str, Any]) -> str:
+    return _write_entries_csv(_fetch_food_entries(**params))
+
+
+def _queue_job(
+    kind: str, params: Dict[str, Any], run_config: RunnableConfig
+) -> Optional[int]:
+    """Queues an artifact job when this process runs the job queue.
+
+    Returns:
+        The job id, or None when the artifact must be built inline (no workers
+        here, e.g. a script invoking the graph directly).
+    """
+    if not get_job_queue().running:
+        return None
+    thread_id = run_config.get("configurable", {}).get("thread_id")
+    return submit_job(kind, params, params["user_id"], thread_id)
+
+
+_EXPORT_QUEUED = (
+    "Job #{job_id} queued: the CSV file will be sent as soon as it is ready."
+)
+
+
+@tool
+def export_food_csv(
+    run_config: RunnableConfig,
+    user_id: int = 1,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    meal_type: Optional[str] = None,
+    food_keyword: Optional[str] = None,
+) -> str:
+    """
+    Export the user's food log entries to a CSV file with optional filters. READ-ONLY.
+
+    Args:
+        user_id: User identifier (default: 1)
+        start_date: Filter entries from this date (YYYY-MM-DD). If None, no lower bound.
+        end_date: Filter entries up to this date (YYYY-MM-DD). If None, no upper bound.
+        meal_type: Filter by meal type (breakfast, lunch, dinner, snack). If None, all meals.
+        food_keyword: Search food descriptions containing this keyword (case-insensitive).
+
+    Returns:
+        A job number (the file is sent to the user when ready), or the file path.
+    """
+    params = {
+        "user_id": user_id,
+        "start_date": start_date,
+        "end_date": end_date,
+        "meal_type": meal_type,
+        "food_keyword": food_keyword,
+    }
+    job_id = _queue_job("export_csv", params, run_config)
+    if job_id is not None:
+        return _EXPORT_QUEUED.format(job_id=job_id)
+    try:
+        file_path = _export_csv_job(params)
+    except ValueError as e:
+        return str(e)
+    return f"CSV exported successfully to: {file_path}"
+
+
+async def _aexport_food_csv(
+    run_config: RunnableConfig,
+    user_id: int = 1,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    meal_type: Optional[str] = None,
+    food_keyword: Optional[str] = None,
+) -> str:
+    """Async path of export_food_csv: queuing and file writing stay off the event loop."""
+    params = {
+        "user_id": user_id,
+        "start_date": start_date,
+        "end_date": end_date,
+        "meal_type": meal_type,
+        "food_keyword": food_keyword,
+    }
+    job_id = await asyncio.to_thread(_queue_job, "export_csv", params, run_config)
+    if job_id is not None:
+        return _EXPORT_QUEUED.format(job_id=job_id)
+    data = await _afetch_food_entries(**params)
+    try:
+        file_path = await asyncio.to_thread(_write_entries_csv, data)
+    except ValueError as e:
+        return str(e)
+    return f"CSV exported successfully to: {file_path}"
+
+
+# Give the DB tools a native coroutine: ToolNode awaits it under graph.ainvoke (the
+# API server and Telegram bot, see ainvoke_agent), so DB I/O overlaps with LLM/USDA
+# calls instead of blocking a worker thread. Without asyncpg (the `async` extra)
+# ainvoke runs the sync tools in a thread as before.
+if importlib.util.find_spec("asyncpg") is not None:
+    save_food_to_db.coroutine = _asave_food_to_db
+    query_food_entries.coroutine = _aquery_food_entries
+    recall_my_foods.coroutine = _arecall_my_foods
+    export_food_csv.coroutine = _aexport_food_csv
+
+
+# -------------------------------------------
+# USER SETTINGS TOOLS
+# -------------------------------------------
+
+
+@tool
+def set_my_timezone(time_zone: str, user_id: int = 1) -> str:
+    """
+    Sets the user's time zone. It decides where their days start and end for
+    "today", daily totals, charts and weekly reports.
+
+    Args:
+        time_zone: IANA time zone name (e.g. "Europe/Madrid", "America/New_York")
+        user_id: User identifier (default: 1)
+
+    Returns:
+        Confirmation with the user's current local date, or an error if the
+        time zone name is unknown.
+    """
+    try:
+        with get_db_session() as session:
+            set_user_timezone(session, user_id, time_zone)
+    except ValueError:
+        return (
+            f"Error: unknown time zone {time_zone!r}. Use an IANA name such as "
+            "'Europe/Madrid' or 'America/New_York'. Nothing saved."
+        )
+    with get_db_session(read_only=True) as session:
+        today = user_today(session, user_id)
+    print(f"🌍 TIME ZONE SET: {time_zone} | user {user_id}")
+    return f"Time zone set to {time_zone}. It is now {today.isoformat()} there."
 
 
 # -------------------------------------------
@@ -285,136 +829,195 @@ def export_food_csv(
 # -------------------------------------------
 
 
+MAX_CHART_DAYS = 366
+
+
+def _chart_range(
+    session: Session,
+    user_id: int,
+    days: int,
+    start_date: Optional[str],
+    end_date: Optional[str],
+):
+    """Local-day range of a chart: [start_date, end_date], or the last `days` days."""
+    end = (
+        datetime.strptime(end_date, "%Y-%m-%d").date()
+        if end_date
+        else user_today(session, user_id)
+    )
+    start = (
+        datetime.strptime(start_date, "%Y-%m-%d").date()
+        if start_date
+        else end - timedelta(days=days - 1)
+    )
+    if start > end or (end - start).days >= MAX_CHART_DAYS:
+        raise ValueError(f"Date range must be 1 to {MAX_CHART_DAYS} days.")
+    return start, end
+
+
+def _chart_path(name: str) -> str:
+    exports_dir = "exports"
+    os.makedirs(exports_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(exports_dir, f"chart_{name}_{timestamp}.png")
+
+
+def _render_metric_chart(
+    metric: str,
+    period: str = "weekly",
+    user_id: int = 1,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> str:
+    """Renders a generate_nutrition_chart chart and returns its path."""
+    days = 7 if period == "weekly" else 30
+
+    # Per-day sums and zero-fill are computed in SQL, with day boundaries in the user's time zone
+    with get_db_session(read_only=True) as session:
+        start, end = _chart_range(session, user_id, days, start_date, end_date)
+        series = daily_metric_series(session, user_id, start, end, metrics=[metric])
+
+    dates = [day for day, _ in series]
+    values = [totals[metric] for _, totals in series]
+
+    # Save to exports/
+    custom = start_date is not None or end_date is not None
+    file_path = _chart_path(f"{metric}_{'custom' if custom else period}")
+    title = None
+    if custom:
+        label = METRIC_CONFIG[metric]["label"]
+        title = f"{label} — {start:%b %d} to {end:%b %d, %Y}"
+    render_nutrition_chart(
+        dates, values, metric, file_path, title=title, annotate=len(dates) <= 7
+    )
+    return file_path
+
+
+def _render_dashboard(
+    days: int = 7,
+    user_id: int = 1,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> Tuple[str, str]:
+    """Renders a generate_nutrition_dashboard chart; returns its path and totals."""
+    # All four metrics come from one grouped query
+    with get_db_session(read_only=True) as session:
+        start, end = _chart_range(session, user_id, days, start_date, end_date)
+        series = daily_metric_series(session, user_id, start, end)
+
+    dates = [day for day, _ in series]
+    values = {m: [totals[m] for _, totals in series] for m in METRIC_CONFIG}
+    file_path = _chart_path("dashboard")
+    render_dashboard_chart(dates, values, file_path)
+
+    totals = {m: round(sum(v), 1) for m, v in values.items()}
+    return file_path, f"{start} to {end} totals: {totals}"
+
+
+@job_handler("chart")
+def _chart_job(params: Dict[str, Any]) -> str:
+    return _render_metric_chart(**params)
+
+
+@job_handler("dashboard")
+def _dashboard_job(params: Dict[str, Any]) -> str:
+    return _render_dashboard(**params)[0]
+
+
+def _queue_chart(
+    kind: str, params: Dict[str, Any], days: int, run_config: RunnableConfig
+) -> Optional[str]:
+    """Queues a chart job; returns the tool's reply, or None to render inline."""
+    # Bad ranges are reported now rather than by a failed job
+    with get_db_session(read_only=True) as session:
+        start, end = _chart_range(
+            session, params["user_id"], days, params["start_date"], params["end_date"]
+        )
+    job_id = _queue_job(kind, params, run_config)
+    if job_id is None:
+        return None
+    return (
+        f"Job #{job_id} queued: the chart for {start} to {end} "
+        "will be sent as soon as it is ready."
+    )
+
+
 @tool
 def generate_nutrition_chart(
+    run_config: RunnableConfig,
     metric: Literal["calories", "protein_g", "fat_g", "carbs_g"],
-    period: Literal["weekly", "monthly"],
+    period: Literal["weekly", "monthly"] = "weekly",
     user_id: int = 1,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
 ) -> str:
     """
-    Generate a bar chart of a nutrition metric over time and save it as a PNG image.
+    Generate a line chart of ONE nutrition metric over time and save it as a PNG image.
 
     Args:
         metric: The nutrition metric to chart — one of "calories", "protein_g", "fat_g", "carbs_g".
         period: Time range — "weekly" (last 7 days) or "monthly" (last 30 days).
+                Ignored when start_date is given.
         user_id: User identifier (default: 1).
+        start_date: First day of a custom range (YYYY-MM-DD), e.g. "since March 1st".
+        end_date: Last day of a custom range (YYYY-MM-DD). If None, today.
 
     Returns:
-        The file path of the generated chart image, or an error message if no data is found.
+        A job number (the image is sent to the user when ready), the file path of
+        the chart image, or an error message.
     """
-    days = 7 if period == "weekly" else 30
-    end_date = datetime.now().date()
-    start_date = end_date - timedelta(days=days - 1)
-
-    data = _fetch_food_entries(
-        user_id=user_id,
-        start_date=start_date.strftime("%Y-%m-%d"),
-        end_date=end_date.strftime("%Y-%m-%d"),
-    )
-
-    # Group entries by date, summing the chosen metric per day
-    daily_totals: Dict[str, float] = defaultdict(float)
-    for entry in data["entries"]:
-        entry_date = entry["created_at"][:10]  # string slicing: YYYY-MM-DD portion
-        daily_totals[entry_date] += float(entry[metric])
-
-    # Build continuous date range with zero-fill for missing days
-    dates = []
-    values = []
-    current = start_date
-    while current <= end_date:
-        date_str = current.strftime("%Y-%m-%d")
-        dates.append(current)
-        values.append(round(daily_totals.get(date_str, 0.0), 1))
-        current += timedelta(days=1)
-
-    # Format labels and title
-    metric_config = {
-        "calories": {"label": "Calories (kcal)", "color": "#FF6B6B"},  # Coral red
-        "protein_g": {"label": "Protein (g)", "color": "#4ECDC4"},  # Teal
-        "fat_g": {"label": "Fat (g)", "color": "#FFE66D"},  # Yellow
-        "carbs_g": {"label": "Carbs (g)", "color": "#A78BFA"},  # Purple
+    params = {
+        "metric": metric,
+        "period": period,
+        "user_id": user_id,
+        "start_date": start_date,
+        "end_date": end_date,
     }
-    y_label = metric_config[metric]["label"]
-    line_color = metric_config[metric]["color"]
-    title = f"{y_label} — Last {days} Days"
-
-    # Set up black background
-    plt.style.use("dark_background")
-
-    # Plot line chart
-    fig, ax = plt.subplots(figsize=(12, 6), facecolor="#0D0D0D")  # Dark gray background
-    ax.set_facecolor("#0D0D0D")  # Dark gray background for the plot area
-
-    # Plot line chart with markers and gradient fill
-    ax.plot(
-        dates,
-        values,
-        color=line_color,
-        linewidth=2.5,
-        marker="o",
-        markersize=6,
-        markerfacecolor=line_color,
-        markeredgecolor="#FFFFFF",
-        markeredgewidth=1.5,
-    )
-
-    # Add subtle fill under the line
-    ax.fill_between(dates, values, alpha=0.15, color=line_color)
-
-    # Title and labels with modern font styling
-    ax.set_title(
-        title,
-        fontsize=18,
-        fontweight="bold",
-        color="#FFFFFF",
-        pad=20,
-        fontfamily="sans-serif",
-    )
-    ax.set_xlabel("Date", fontsize=12, color="#AAAAAA", labelpad=10)
-    ax.set_ylabel(y_label, fontsize=12, color="#AAAAAA", labelpad=10)
-
-    # Style the grid
-    ax.grid(axis="y", color="#333333", linestyle="--", linewidth=0.5, alpha=0.7)
-    ax.grid(axis="x", color="#333333", linestyle="--", linewidth=0.5, alpha=0.3)
-
-    # Style the spines (borders)
-    for spine in ax.spines.values():
-        spine.set_color("#333333")
-        spine.set_linewidth(0.5)
-
-    # Style tick labels
-    ax.tick_params(axis="both", colors="#AAAAAA", labelsize=10)
-
-    # Format x-axis dates
-    fig.autofmt_xdate(rotation=45)
-
-    # Add value annotations on data points (only for weekly to avoid clutter)
-    if period == "weekly":
-        for x, y in zip(dates, values):
-            if y > 0:
-                ax.annotate(
-                    f"{y:.0f}",
-                    (x, y),
-                    textcoords="offset points",
-                    xytext=(0, 10),
-                    ha="center",
-                    fontsize=9,
-                    color="#FFFFFF",
-                    fontweight="bold",
-                )
+    try:
+        queued = _queue_chart(
+            "chart", params, 7 if period == "weekly" else 30, run_config
+        )
+        if queued is not None:
+            return queued
+        return f"Chart saved to: {_render_metric_chart(**params)}"
+    except ValueError as e:
+        return f"Error: {e}"
 
-    fig.tight_layout()
 
-    # Save to exports/
-    exports_dir = "exports"
-    os.makedirs(exports_dir, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    file_path = os.path.join(exports_dir, f"chart_{metric}_{period}_{timestamp}.png")
-    fig.savefig(file_path, dpi=150, facecolor="#0D0D0D", edgecolor="none")
-    plt.close(fig)
+@tool
+def generate_nutrition_dashboard(
+    run_config: RunnableConfig,
+    days: int = 7,
+    user_id: int = 1,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> str:
+    """
+    Generate ONE dashboard chart with calories, protein, fat and carbs together.
+    Use this instead of several 'generate_nutrition_chart' calls whenever the user
+    wants more than one metric, "all macros", or an overview.
 
-    # Reset style to default for other plots
-    plt.style.use("default")
+    Args:
+        days: Number of days up to today (default: 7). Ignored when start_date is given.
+        user_id: User identifier (default: 1).
+        start_date: First day of a custom range (YYYY-MM-DD).
+        end_date: Last day of a custom range (YYYY-MM-DD). If None, today.
 
-    return f"Chart saved to: {file_path}"
+    Returns:
+        A job number (the image is sent to the user when ready), the file path of
+        the dashboard image, or an error message.
+    """
+    params = {
+        "days": days,
+        "user_id": user_id,
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+    try:
+        queued = _queue_chart("dashboard", params, days, run_config)
+        if queued is not None:
+            return queued
+        file_path, totals = _render_dashboard(**params)
+        return f"Chart saved to: {file_path} | {totals}"
+    except ValueError as e:
+        return f"Error: {e}"
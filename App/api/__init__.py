@@ -1,14 +1,23 @@
+import asyncio
 import logging
 import os
+import sys
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
-from App.bot.telegram_bot import create_telegram_app
+from App.config import config
+from App.service.jobs import get_job_queue
+from App.service.warmup import run_warmup, warmup_state
 
+from .chart_routes import router as chart_router
+from .data_routes import router as data_router
+from .job_routes import router as job_router
 from .routes import router
+from .telegram_webhook import TELEGRAM_WEBHOOK_PATH
+from .telegram_webhook import router as telegram_router
 
 logger = logging.getLogger(__name__)
 
@@ -16,21 +25,88 @@ logger = logging.getLogger(__name__)
 # turn on and shut down telegram bot when the API server starts and stops, respectively
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    telegram_app = create_telegram_app()
+    # Warm-up runs in the background; GET /api/ready reports 503 until it finishes
+    if config.WARMUP_ON_STARTUP:
+        warmup_state.enabled = True
+        app.state.warmup_task = asyncio.create_task(asyncio.to_thread(run_warmup))
+
+    # Upcoming food_entries partitions are created now and then once a day
+    app.state.partition_task = asyncio.create_task(_maintain_partitions())
+
+    # Export/chart jobs queued by the agent run on this worker's thread pool
+    job_queue = get_job_queue()
+    if config.JOB_WORKERS > 0:
+        job_queue.start()
+
+    telegram_app = None
+    if config.TELEGRAM_MODE != "off":
+        telegram_app = await _start_telegram(app)
+    yield
+    app.state.partition_task.cancel()
+    await asyncio.to_thread(job_queue.stop)
+    if telegram_app is not None:
+        if telegram_app.updater is not None:
+            await telegram_app.updater.stop()
+        await telegram_app.stop()
+        await telegram_app.shutdown()
+        logger.info("Telegram bot stopped")
+    if "App.MyAgent.utils.checkpointer" in sys.modules:
+        # Only loaded once an agent turn (or the warm-up) imported the graph
+        from App.MyAgent.utils.checkpointer import close_async_checkpointer
+
+        await close_async_checkpointer()
+
+
+async def _maintain_partitions():
+    # Creates empty upcoming months only: moving rows out of the DEFAULT partition
+    # locks food_entries, so it is left to `python main.py partitions`
+    from App.database import get_db_session
+    from App.database.partitions import ensure_partitions
+
+    def run():
+        with get_db_session() as session:
+            ensure_partitions(session, config.PARTITION_MONTHS_AHEAD)
+
+    while True:
+        try:
+            await asyncio.to_thread(run)
+        except Exception:
+            logger.exception("food_entries partition maintenance failed")
+        await asyncio.sleep(24 * 3600)
+
+
+async def _start_telegram(app: FastAPI):
+    # Lazy import: python-telegram-bot is only needed once the server starts
+    from App.bot.telegram_bot import create_telegram_app, job_delivery
+
+    polling = config.TELEGRAM_MODE == "polling"
+    if not polling and not config.TELEGRAM_WEBHOOK_URL:
+        raise RuntimeError("TELEGRAM_MODE=webhook needs TELEGRAM_WEBHOOK_URL")
+
+    telegram_app = create_telegram_app(use_updater=polling)
     await telegram_app.initialize()
     await telegram_app.start()
+    # The webhook route feeds updates into this worker's application
+    app.state.telegram_app = telegram_app
+    # Finished jobs of Telegram chats are sent from here, whichever worker ran them
+    listener, owns = job_delivery(telegram_app, asyncio.get_running_loop())
+    get_job_queue().add_listener(listener, owns)
 
-    if telegram_app.updater is None:
-        logger.error("Telegram bot updater is not initialized")
-        raise RuntimeError("Telegram bot updater is not initialized")
+    if polling:
+        if telegram_app.updater is None:
+            logger.error("Telegram bot updater is not initialized")
+            raise RuntimeError("Telegram bot updater is not initialized")
 
-    await telegram_app.updater.start_polling(drop_pending_updates=True)
-    logger.info("Telegram bot started polling")
-    yield
-    await telegram_app.updater.stop()
-    await telegram_app.stop()
-    await telegram_app.shutdown()
-    logger.info("Telegram bot stopped")
+        await telegram_app.updater.start_polling(drop_pending_updates=True)
+        logger.info("Telegram bot started polling")
+    else:
+        # Every worker registers the same URL, so the call is idempotent
+        url = f"{config.TELEGRAM_WEBHOOK_URL.rstrip('/')}{TELEGRAM_WEBHOOK_PATH}"
+        await telegram_app.bot.set_webhook(
+            url=url, secret_token=config.TELEGRAM_WEBHOOK_SECRET
+        )
+        logger.info("Telegram webhook set to %s", url)
+    return telegram_app
 
 
 app = FastAPI(title="Pachico", lifespan=lifespan)
@@ -49,6 +125,10 @@ app.add_middleware(
 )
 
 app.include_router(router)
+app.include_router(data_router)
+app.include_router(chart_router)
+app.include_router(job_router)
+app.include_router(telegram_router)
 
 os.makedirs("exports", exist_ok=True)
 app.mount("/exports", StaticFiles(directory="exports"), name="exports")
@@ -0,0 +1,32 @@
+import hashlib
+from typing import Callable
+
+from fastapi import Request, Response
+
+# Clients may keep a copy but must revalidate it (cheap: a 304 carries no body)
+REVALIDATE = "private, no-cache"
+
+
+def make_etag(version: str, request: Request) -> str:
+    """Strong ETag for a data version: same data and same query → same representation."""
+    digest = hashlib.sha1(f"{version}|{request.url.query}".encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def conditional_response(
+    request: Request,
+    etag: str,
+    build: Callable[[], Response],
+    cache_control: str = REVALIDATE,
+) -> Response:
+    """304 when If-None-Match already names this ETag, else `build()` with cache headers.
+
+    `build` only runs on a miss, so a revalidation costs just the version lookup.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    response = build()
+    response.headers.update(headers)
+    return response
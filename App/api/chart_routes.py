@@ -0,0 +1,178 @@
+import asyncio
+import io
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+
+from App.database import (
+    SERIES_METRICS,
+    daily_metric_series,
+    get_db_session,
+    user_data_version,
+    user_today,
+)
+from App.MyAgent.utils.charts import (
+    CHART_SIZES,
+    METRIC_CONFIG,
+    render_dashboard_chart,
+    render_nutrition_chart,
+)
+
+from .caching import conditional_response, make_etag
+
+# Live charts for the web app, rendered without going through the agent
+router = APIRouter(prefix="/api/charts", tags=["charts"])
+
+MAX_CHART_DAYS = 366
+MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+Metric = Literal["calories", "protein_g", "fat_g", "carbs_g"]
+
+
+@lru_cache(maxsize=128)
+def _render_chart(
+    user_id: int,
+    metric: str,
+    start: date,
+    end: date,
+    image_format: str,
+    size: str,
+    title: Optional[str],
+    version: str,
+) -> bytes:
+    """Queries and renders one chart ("dashboard" for all metrics at once). `version`
+    is only part of the cache key, so an unchanged log is served from memory to every
+    client, new entries re-render."""
+    dashboard = metric == "dashboard"
+    with get_db_session(read_only=True) as session:
+        series = daily_metric_series(
+            session,
+            user_id,
+            start,
+            end,
+            metrics=SERIES_METRICS if dashboard else [metric],
+        )
+
+    figsize, dpi = CHART_SIZES[size]
+    dates = [day for day, _ in series]
+    buffer = io.BytesIO()
+    if dashboard:
+        # Two stacked panels need more height than a single chart
+        render_dashboard_chart(
+            dates,
+            {m: [totals[m] for _, totals in series] for m in SERIES_METRICS},
+            buffer,
+            title=title,
+            image_format=image_format,
+            figsize=(figsize[0], figsize[1] * 4 / 3),
+            dpi=dpi,
+        )
+    else:
+        render_nutrition_chart(
+            dates,
+            [totals[metric] for _, totals in series],
+            metric,
+            buffer,
+            title=title,
+            image_format=image_format,
+            figsize=figsize,
+            dpi=dpi,
+        )
+    return buffer.getvalue()
+
+
+def _chart_response(
+    request: Request,
+    metric: str,
+    user_id: int,
+    days: int,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    image_format: str,
+    size: str,
+) -> Response:
+    with get_db_session(read_only=True) as session:
+        end = end_date or user_today(session, user_id)
+        start = start_date or end - timedelta(days=days - 1)
+        if start > end or (end - start).days >= MAX_CHART_DAYS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Range must be 1 to {MAX_CHART_DAYS} days",
+            )
+        version = f"{user_data_version(session, user_id)}|{start}|{end}"
+
+    title = None
+    if (start_date or end_date) and metric != "dashboard":
+        label = METRIC_CONFIG[metric]["label"]
+        title = f"{label} — {start:%b %d} to {end:%b %d, %Y}"
+
+    return conditional_response(
+        request,
+        make_etag(version, request),
+        lambda: Response(
+            _render_chart(
+                user_id, metric, start, end, image_format, size, title, version
+            ),
+            media_type=MEDIA_TYPES[image_format],
+        ),
+    )
+
+
+# Declared before /{metric} so "dashboard" is not parsed as a metric
+@router.get("/dashboard")
+async def nutrition_dashboard(
+    request: Request,
+    user_id: int,
+    days: int = Query(7, ge=1, le=MAX_CHART_DAYS),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    image_format: Literal["svg", "png"] = Query("svg", alias="format"),
+    size: Literal["small", "medium", "large"] = "medium",
+):
+    """Calories and all macros in one figure, from a single query and render.
+
+    Same range, format, size and ETag rules as the single-metric chart.
+    """
+    return await asyncio.to_thread(
+        _chart_response,
+        request,
+        "dashboard",
+        user_id,
+        days,
+        start_date,
+        end_date,
+        image_format,
+        size,
+    )
+
+
+@router.get("/{metric}")
+async def nutrition_chart(
+    request: Request,
+    metric: Metric,
+    user_id: int,
+    days: int = Query(7, ge=1, le=MAX_CHART_DAYS),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    image_format: Literal["svg", "png"] = Query("svg", alias="format"),
+    size: Literal["small", "medium", "large"] = "medium",
+):
+    """Daily chart of one metric, as SVG (default) or PNG.
+
+    The range is the last `days` local days, or [start_date, end_date]. The ETag
+    follows the user's data version, so embedded charts revalidate with a 304
+    until something new is logged.
+    """
+    return await asyncio.to_thread(
+        _chart_response,
+        request,
+        metric,
+        user_id,
+        days,
+        start_date,
+        end_date,
+        image_format,
+        size,
+    )
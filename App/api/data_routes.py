@@ -0,0 +1,246 @@
+import asyncio
+import base64
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import and_, or_, select
+
+from App.database import (
+    SERIES_METRICS,
+    FoodEntry,
+    daily_metric_series,
+    get_db_session,
+    user_data_version,
+    user_day_bounds,
+    user_today,
+)
+
+from .caching import conditional_response, make_etag
+
+# Direct data access for the web frontend and dashboards (no LLM round trip)
+router = APIRouter(prefix="/api/entries", tags=["data"])
+
+MAX_PAGE_SIZE = 200
+MAX_BATCH_SIZE = 500
+MAX_AGGREGATE_DAYS = 366
+
+MealType = Literal["breakfast", "lunch", "dinner", "snack"]
+
+
+class EntryIn(BaseModel):
+    food_description: str = Field(..., min_length=1)
+    calories: float = Field(..., ge=0)
+    protein_g: float = Field(..., ge=0)
+    fat_g: float = Field(..., ge=0)
+    carbs_g: float = Field(..., ge=0)
+    quantity: float = Field(1.0, gt=0)
+    unit: str = Field("serving", max_length=50)
+    fdc_id: Optional[int] = None
+    source: str = Field("api", max_length=20)
+    meal_type: Optional[MealType] = None
+    # Defaults to now; aware timestamps are converted to UTC
+    created_at: Optional[datetime] = None
+
+
+class EntryBatch(BaseModel):
+    user_id: int
+    entries: List[EntryIn] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+def _entry_dict(e: FoodEntry) -> Dict[str, Any]:
+    return {
+        "id": e.id,
+        "food_description": e.food_description,
+        "calories": e.calories,
+        "protein_g": e.protein_g,
+        "fat_g": e.fat_g,
+        "carbs_g": e.carbs_g,
+        "quantity": e.quantity,
+        "unit": e.unit,
+        "fdc_id": e.fdc_id,
+        "source": e.source,
+        "meal_type": e.meal_type,
+        "created_at": e.created_at.isoformat(),
+    }
+
+
+# ----- Pagination cursors (keyset on created_at, id) ----- #
+
+
+def _encode_cursor(entry: FoodEntry) -> str:
+    raw = f"{entry.created_at.isoformat()}|{entry.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str):
+    try:
+        created_at, entry_id = base64.urlsafe_b64decode(cursor).decode().split("|")
+        return datetime.fromisoformat(created_at), int(entry_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# -------------------------------------------
+# ENDPOINTS
+# -------------------------------------------
+
+
+@router.get("")
+async def list_entries(
+    request: Request,
+    user_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    meal_type: Optional[MealType] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    """The user's entries, newest first, `limit` per page.
+
+    Dates are local days in the user's time zone. Pass the returned `next_cursor`
+    to get the following page; it stays stable while new entries are logged.
+    """
+    after = _decode_cursor(cursor) if cursor else None
+
+    def load() -> Response:
+        with get_db_session(read_only=True) as session:
+            etag = make_etag(user_data_version(session, user_id), request)
+
+            def build() -> Dict[str, Any]:
+                stmt = select(FoodEntry).where(FoodEntry.user_id == user_id)
+                if start_date:
+                    start_utc, _ = user_day_bounds(
+                        session, user_id, start_date, start_date
+                    )
+                    stmt = stmt.where(FoodEntry.created_at >= start_utc)
+                if end_date:
+                    _, end_utc = user_day_bounds(session, user_id, end_date, end_date)
+                    stmt = stmt.where(FoodEntry.created_at < end_utc)
+                if meal_type:
+                    stmt = stmt.where(FoodEntry.meal_type == meal_type)
+                if after:
+                    stmt = stmt.where(
+                        or_(
+                            FoodEntry.created_at < after[0],
+                            and_(
+                                FoodEntry.created_at == after[0],
+                                FoodEntry.id < after[1],
+                            ),
+                        )
+                    )
+                # One extra row tells whether there is a next page
+                entries = session.scalars(
+                    stmt.order_by(
+                        FoodEntry.created_at.desc(), FoodEntry.id.desc()
+                    ).limit(limit + 1)
+                ).all()
+                page = entries[:limit]
+                return {
+                    "entries": [_entry_dict(e) for e in page],
+                    "next_cursor": (
+                        _encode_cursor(page[-1]) if len(entries) > limit else None
+                    ),
+                }
+
+            return conditional_response(request, etag, lambda: JSONResponse(build()))
+
+    return await asyncio.to_thread(load)
+
+
+@router.get("/aggregates")
+async def entry_aggregates(
+    request: Request,
+    user_id: int,
+    period: Literal["day", "week"] = "day",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+):
+    """Macro totals per local day, or per Monday–Sunday week, summed in SQL.
+
+    Defaults to the last 7 days (day) or the last 4 full-or-current weeks (week).
+    Weeks also report `days_logged` and the `daily_average` over those days.
+    """
+
+    def load() -> Response:
+        with get_db_session(read_only=True) as session:
+            end = end_date or user_today(session, user_id)
+            if period == "week":
+                end = end + timedelta(days=6 - end.weekday())  # through Sunday
+                start = start_date or end - timedelta(days=27)
+                start = start - timedelta(days=start.weekday())  # from Monday
+            else:
+                start = start_date or end - timedelta(days=6)
+            if start > end or (end - start).days >= MAX_AGGREGATE_DAYS:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Range must be 1 to {MAX_AGGREGATE_DAYS} days",
+                )
+            # The default range moves with the user's day, so it is part of the version
+            version = f"{user_data_version(session, user_id)}|{start}|{end}"
+            etag = make_etag(version, request)
+
+            def build() -> Dict[str, Any]:
+                series = daily_metric_series(session, user_id, start, end)
+                if period == "day":
+                    buckets = [
+                        {"date": day.isoformat(), **values} for day, values in series
+                    ]
+                else:
+                    buckets = _weekly_buckets(series)
+                return {
+                    "period": period,
+                    "start_date": start.isoformat(),
+                    "end_date": end.isoformat(),
+                    "buckets": buckets,
+                }
+
+            return conditional_response(request, etag, lambda: JSONResponse(build()))
+
+    return await asyncio.to_thread(load)
+
+
+def _weekly_buckets(series) -> List[Dict[str, Any]]:
+    """Folds a Monday-aligned daily series into weeks."""
+    weeks = []
+    for i in range(0, len(series), 7):
+        days = series[i : i + 7]
+        totals = {m: round(sum(v[m] for _, v in days), 1) for m in SERIES_METRICS}
+        days_logged = sum(1 for _, v in days if v["calories"] > 0)
+        weeks.append(
+            {
+                "week_start": days[0][0].isoformat(),
+                **totals,
+                "days_logged": days_logged,
+                "daily_average": {
+                    m: round(totals[m] / max(days_logged, 1), 1) for m in SERIES_METRICS
+                },
+            }
+        )
+    return weeks
+
+
+@router.post("", status_code=201)
+async def create_entries(batch: EntryBatch):
+    """Inserts up to MAX_BATCH_SIZE entries for one user in a single transaction."""
+
+    def save() -> List[int]:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        entries = []
+        for item in batch.entries:
+            values = item.model_dump()
+            created_at = values.pop("created_at") or now
+            if created_at.tzinfo is not None:
+                created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+            entries.append(
+                FoodEntry(user_id=batch.user_id, created_at=created_at, **values)
+            )
+        with get_db_session() as session:
+            session.add_all(entries)
+            session.flush()  # one multi-row INSERT ... RETURNING id
+            return [e.id for e in entries]
+
+    ids = await asyncio.to_thread(save)
+    return {"created": len(ids), "ids": ids}
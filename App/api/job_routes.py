@@ -0,0 +1,66 @@
+import asyncio
+from typing import Any, Dict, List, Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from sqlalchemy import select
+
+from App.database import Job, get_db_session
+from App.service.jobs import get_job_queue, job_counts, job_dict
+
+# Status of the background jobs (CSV exports, charts) queued by the agent tools.
+# Clients poll a job until it is "done", then download its `file_url`.
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+MAX_PAGE_SIZE = 100
+
+JobStatus = Literal["queued", "running", "done", "failed"]
+
+
+@router.get("/stats")
+async def jobs_stats():
+    """Jobs per status, and this worker's queue."""
+
+    def load() -> Dict[str, Any]:
+        # The primary, not the replica: statuses change by the second
+        with get_db_session() as session:
+            counts = job_counts(session)
+        return {"jobs": counts, "queue": get_job_queue().stats()}
+
+    return await asyncio.to_thread(load)
+
+
+@router.get("")
+async def list_jobs(
+    thread_id: Optional[str] = None,
+    user_id: Optional[int] = None,
+    status: Optional[JobStatus] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+):
+    """Most recent jobs first, optionally of one conversation, user or status."""
+
+    def load() -> List[Dict[str, Any]]:
+        stmt = select(Job)
+        if thread_id is not None:
+            stmt = stmt.where(Job.thread_id == thread_id)
+        if user_id is not None:
+            stmt = stmt.where(Job.user_id == user_id)
+        if status is not None:
+            stmt = stmt.where(Job.status == status)
+        with get_db_session() as session:
+            jobs = session.scalars(stmt.order_by(Job.id.desc()).limit(limit)).all()
+            return [job_dict(job) for job in jobs]
+
+    return {"jobs": await asyncio.to_thread(load)}
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: int):
+    def load() -> Optional[Dict[str, Any]]:
+        with get_db_session() as session:
+            job = session.get(Job, job_id)
+            return job_dict(job) if job is not None else None
+
+    job = await asyncio.to_thread(load)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
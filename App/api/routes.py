@@ -1,9 +1,12 @@
 import asyncio
 
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
-from App.service import invoke_agent
+from App.database import get_pool_stats
+from App.service import ainvoke_agent
+from App.service.warmup import warmup_state
 
 router = APIRouter(prefix="/api")
 
@@ -16,9 +19,54 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     text: str
     file_paths: list[str]
+    # Pending artifacts: poll GET /api/jobs/{id} for their file_url
+    job_ids: list[int]
 
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
-    response = await asyncio.to_thread(invoke_agent, request.message, request.thread_id)
-    return ChatResponse(text=response.text, file_paths=response.file_paths)
+    response = await ainvoke_agent(request.message, request.thread_id)
+    return ChatResponse(
+        text=response.text, file_paths=response.file_paths, job_ids=response.job_ids
+    )
+
+
+@router.get("/db/pool")
+async def db_pool():
+    """Connection pool status and checkout wait times (primary and read replica)."""
+    return get_pool_stats()
+
+
+@router.get("/models/usage")
+async def models_usage():
+    """LLM calls per graph node: which model tier served them, fallbacks and latency."""
+    from App.MyAgent.clients.model import model_usage
+
+    return model_usage.snapshot()
+
+
+@router.get("/usda/stats")
+async def usda_stats():
+    """USDA request scheduler, cache and speculative search statistics."""
+    from App.MyAgent.clients.usda_api import get_usda_client
+
+    client = get_usda_client()
+    return {
+        "scheduler": client.scheduler.stats(),
+        "cache": await asyncio.to_thread(client.cache.stats),
+        "speculation": client.speculation_report(),
+    }
+
+
+@router.get("/health")
+async def health():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def ready():
+    """Readiness: 200 once the background warm-up has finished, 503 before."""
+    return JSONResponse(
+        warmup_state.as_dict(), status_code=200 if warmup_state.ready else 503
+    )
@@ -0,0 +1,43 @@
+import asyncio
+import hmac
+import logging
+
+from fastapi import APIRouter, HTTPException, Request
+
+from App.config import config
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_WEBHOOK_PATH = "/api/telegram/webhook"
+
+router = APIRouter()
+
+# Keep references so in-flight updates aren't garbage collected before they finish
+_pending_updates: set[asyncio.Task] = set()
+
+
+@router.post(TELEGRAM_WEBHOOK_PATH)
+async def telegram_webhook(request: Request):
+    """Receives Telegram updates (TELEGRAM_MODE=webhook) and feeds them to the bot handlers.
+
+    Answers right away and processes the update in the background: Telegram
+    re-sends updates that aren't acknowledged quickly, and an agent turn can
+    take several seconds.
+    """
+    telegram_app = getattr(request.app.state, "telegram_app", None)
+    if telegram_app is None or config.TELEGRAM_MODE != "webhook":
+        raise HTTPException(status_code=404, detail="Telegram webhook is not enabled")
+
+    if config.TELEGRAM_WEBHOOK_SECRET and not hmac.compare_digest(
+        request.headers.get("X-Telegram-Bot-Api-Secret-Token", ""),
+        config.TELEGRAM_WEBHOOK_SECRET,
+    ):
+        raise HTTPException(status_code=403, detail="Invalid secret token")
+
+    from telegram import Update
+
+    update = Update.de_json(await request.json(), telegram_app.bot)
+    task = asyncio.create_task(telegram_app.process_update(update))
+    _pending_updates.add(task)
+    task.add_done_callback(_pending_updates.discard)
+    return {"ok": True}
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Any, AsyncContextManager, Awaitable, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _ChatBuffer:
+    texts: List[str] = field(default_factory=list)
+    last_update: Any = None
+    first_at: float = 0.0
+    arrived: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+FlushCallback = Callable[[int, str, Any], Awaitable[None]]
+
+
+class MessageCoalescer:
+    """Merges bursts of messages from the same chat into one agent turn.
+
+    Each chat gets one worker task. It waits until the chat has been quiet for
+    `window_s` (but never longer than `max_wait_s` after the first buffered message),
+    then calls `on_flush(chat_id, merged_text, last_update)`. Messages that arrive
+    while a turn is running are buffered and flushed as the next turn, so turns of
+    a chat never overlap within this process. With several processes (webhook mode,
+    API_WORKERS > 1) a chat's updates can land on any of them: pass `turn_lock` to
+    serialize its turns across processes too.
+
+    Args:
+        on_flush: Coroutine that runs the agent turn for the merged text.
+        window_s: Quiet period that ends a burst.
+        max_wait_s: Upper bound on how long the first message of a burst waits.
+        on_start: Optional callback run when a chat's worker starts. It returns a
+            coroutine function awaited when the worker stops (e.g. to end a typing
+            indicator that should stay on through the window and the turn).
+        turn_lock: Optional factory of a per-chat async context manager held around
+            each `on_flush` call (e.g. a cross-process lock on the chat id).
+    """
+
+    def __init__(
+        self,
+        on_flush: FlushCallback,
+        window_s: float = 1.5,
+        max_wait_s: float = 5.0,
+        on_start: Callable[[int, Any], Callable[[], Awaitable[None]]] | None = None,
+        turn_lock: Callable[[int], AsyncContextManager[Any]] | None = None,
+    ) -> None:
+        self.on_flush = on_flush
+        self.window_s = window_s
+        self.max_wait_s = max_wait_s
+        self.on_start = on_start
+        self.turn_lock = turn_lock
+        self._buffers: Dict[int, _ChatBuffer] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+        self.stats = {"messages": 0, "turns": 0}
+
+    def add(self, chat_id: int, text: str, update: Any) -> None:
+        """Buffers a message; starts the chat's worker if it isn't running."""
+        self.stats["messages"] += 1
+        buffer = self._buffers.setdefault(chat_id, _ChatBuffer())
+        if not buffer.texts:
+            buffer.first_at = time.monotonic()
+        buffer.texts.append(text)
+        buffer.last_update = update
+        buffer.arrived.set()
+
+        if chat_id not in self._workers:
+            task = asyncio.create_task(self._run(chat_id))
+            self._workers[chat_id] = task
+
+    async def _wait_for_quiet(self, buffer: _ChatBuffer) -> None:
+        while True:
+            buffer.arrived.clear()
+            remaining = self.max_wait_s - (time.monotonic() - buffer.first_at)
+            if remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(
+                    buffer.arrived.wait(), timeout=min(self.window_s, remaining)
+                )
+            except asyncio.TimeoutError:
+                return  # quiet for a full window
+
+    async def _run(self, chat_id: int) -> None:
+        buffer = self._buffers[chat_id]
+        stop = self.on_start(chat_id, buffer.last_update) if self.on_start else None
+        try:
+            while buffer.texts:
+                await self._wait_for_quiet(buffer)
+                texts, update = buffer.texts, buffer.last_update
+                buffer.texts = []
+                if len(texts) > 1:
+                    logger.info(
+                        "Coalesced %d messages from chat %s into one turn",
+                        len(texts),
+                        chat_id,
+                    )
+                self.stats["turns"] += 1
+                lock = self.turn_lock(chat_id) if self.turn_lock else nullcontext()
+                try:
+                    async with lock:
+                        await self.on_flush(chat_id, "\n".join(texts), update)
+                except Exception:
+                    logger.exception("Error handling coalesced messages")
+        finally:
+            self._workers.pop(chat_id, None)
+            self._buffers.pop(chat_id, None)
+            if stop is not None:
+                await stop()
@@ -1,6 +1,10 @@
 import asyncio
 import logging
+import os
+from contextlib import nullcontext
+from typing import Any, Awaitable, Callable, Dict, Tuple
 
+from sqlalchemy import and_, func
 from telegram import Update
 from telegram.constants import ChatAction
 from telegram.ext import (
@@ -11,12 +15,18 @@ from telegram.ext import (
     filters,
 )
 
+from App.bot.coalescer import MessageCoalescer
 from App.config import config
-from App.service import invoke_agent
+from App.service import ainvoke_agent
+from App.service.jobs import JobListener, ThreadFilter
 
 logger = logging.getLogger(__name__)
 
 MAX_MESSAGE_LENGTH = 4096
+# The agent's tools log every chat as user 1 (single-user bot); /report follows suit
+BOT_USER_ID = 1
+# Advisory lock namespace of chat turns (see chat_turn_lock)
+CHAT_TURN_LOCK_NAMESPACE = 41
 
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -36,28 +46,54 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
             'Review data: "How many calories did I eat today?"\n'
             'Charts: "Show me a calorie chart for this week"\n'
             'Export: "Export my food log as CSV"\n'
+            "Weekly report: /report\n\n"
+            "Charts and exports are sent as soon as they are ready."
         )
 
 
-async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    if update.message is None or update.effective_chat is None:
-        return  # Ignore non-message updates
-    text = update.message.text
-    chat_id = update.effective_chat.id
+async def report_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Sends the user's latest weekly report (kept private, never served over HTTP)."""
+    if update.message is None:
+        return
+    # Lazy import: numpy and the chart helpers are only needed for reports
+    from App.reports.weekly import load_latest_report
+
+    report = await asyncio.to_thread(load_latest_report, BOT_USER_ID)
+    if report is None:
+        await update.message.reply_text(
+            "No weekly report yet. Reports are built every Monday for the past week."
+        )
+        return
+
+    average = report["daily_average"]
+    await update.message.reply_text(
+        f"Week of {report['week_start']} to {report['week_end']}\n"
+        f"Days logged: {report['days_logged']} ({report['entries']} entries)\n"
+        f"Daily average: {average['calories']} kcal | P {average['protein_g']} g | "
+        f"F {average['fat_g']} g | C {average['carbs_g']} g\n"
+        f"Highest-calorie day: {report['peak_day']}"
+    )
+    chart = report.get("chart")
+    if chart and os.path.isfile(chart):
+        with open(chart, "rb") as f:
+            await update.message.reply_photo(photo=f)
+
+
+def start_typing(bot, chat_id: int) -> Callable[[], Awaitable[None]]:
+    """Starts a typing indicator that refreshes every 4 seconds.
 
-    # Start a typing indicator that refreshes every 4 seconds
-    # This lets the user know the bot is working on a response, especially for longer operations.
-    # Visual example: Pachico is typing...
-    stop_typing = (
-        asyncio.Event()
-    )  # Create an event to signal when to stop the typing indicator
+    This lets the user know the bot is working on a response, especially for longer
+    operations. Visual example: Pachico is typing...
+
+    Returns:
+        A coroutine function that stops the indicator.
+    """
+    stop_typing = asyncio.Event()  # Signals when to stop the typing indicator
 
     async def typing_loop() -> None:
         while not stop_typing.is_set():
             try:
-                await context.bot.send_chat_action(
-                    chat_id=chat_id, action=ChatAction.TYPING
-                )
+                await bot.send_chat_action(chat_id=chat_id, action=ChatAction.TYPING)
             except Exception:
                 pass
             try:
@@ -67,8 +103,17 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
     typing_task = asyncio.create_task(typing_loop())
 
+    async def stop() -> None:
+        stop_typing.set()
+        await typing_task
+
+    return stop
+
+
+async def reply_with_agent(chat_id: int, text: str, update: Update) -> None:
+    """Runs one agent turn for `text` and replies to the update's message."""
     try:
-        response = await asyncio.to_thread(invoke_agent, text, str(chat_id))
+        response = await ainvoke_agent(text, str(chat_id))
 
         # Send file attachments
         for path in response.file_paths:
@@ -88,17 +133,101 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         await update.message.reply_text(
             "Sorry, something went wrong. Please try again."
         )
-    finally:
-        stop_typing.set()
-        await typing_task
 
 
-def create_telegram_app() -> Application:
-    """Build and return the Telegram Application (does not start polling)."""
-    app = Application.builder().token(config.TELEGRAM_BOT_TOKEN).build()
+def chat_turn_lock(chat_id: int):
+    """Serializes the agent turns of a chat across API workers (webhook mode).
+
+    Any worker may receive a chat's next update while another one is still running
+    its previous turn: both would read and write the same checkpoint thread.
+    """
+    # Lazy import: the DB engine is only needed once a turn runs
+    from App.database import advisory_lock
+
+    return advisory_lock(CHAT_TURN_LOCK_NAMESPACE, str(chat_id))
+
+
+def job_delivery(
+    app: Application, loop: asyncio.AbstractEventLoop
+) -> Tuple[JobListener, ThreadFilter]:
+    """Job queue listener sending finished exports/charts to their Telegram chat.
+
+    Returns:
+        The listener, called from a job worker thread, and the SQL filter selecting
+        the threads that are Telegram chats (their thread_id is the chat id).
+    """
+
+    async def send(job: Dict[str, Any]) -> None:
+        chat_id = int(job["thread_id"])
+        if job["status"] != "done":
+            await app.bot.send_message(
+                chat_id, f"Sorry, I couldn't create that file: {job['error']}"
+            )
+        elif job["result_path"].endswith(".png"):
+            with open(job["result_path"], "rb") as f:
+                await app.bot.send_photo(chat_id, photo=f)
+        else:
+            with open(job["result_path"], "rb") as f:
+                await app.bot.send_document(chat_id, document=f)
+
+    def listener(job: Dict[str, Any]) -> None:
+        asyncio.run_coroutine_threadsafe(send(job), loop).result(timeout=60)
+
+    def owns(thread_id):
+        # An optional minus sign, then digits (ltrim with a set: Postgres and SQLite)
+        digits = func.ltrim(thread_id, "-")
+        return and_(digits != "", func.ltrim(digits, "0123456789") == "")
+
+    return listener, owns
+
+
+async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    if update.message is None or update.effective_chat is None:
+        return  # Ignore non-message updates
+    text = update.message.text
+    chat_id = update.effective_chat.id
+
+    # Bursts ("2 eggs" / "and toast" / "for breakfast") are merged into one turn;
+    # the coalescer replies to the last message once the chat goes quiet
+    coalescer = context.application.bot_data.get("coalescer")
+    if coalescer is not None:
+        coalescer.add(chat_id, text, update)
+        return
+
+    turn_lock = context.application.bot_data.get("turn_lock")
+    stop_typing = start_typing(context.bot, chat_id)
+    try:
+        async with turn_lock(chat_id) if turn_lock else nullcontext():
+            await reply_with_agent(chat_id, text, update)
+    finally:
+        await stop_typing()
+
+
+def create_telegram_app(use_updater: bool = True) -> Application:
+    """Build and return the Telegram Application (does not start polling).
+
+    Pass use_updater=False in webhook mode: updates are fed in by the API route instead.
+    """
+    builder = Application.builder().token(config.TELEGRAM_BOT_TOKEN)
+    if not use_updater:
+        builder = builder.updater(None)
+    app = builder.build()
+    # Polling runs in a single process; webhook updates are spread over the workers
+    turn_lock = None if use_updater else chat_turn_lock
+    app.bot_data["turn_lock"] = turn_lock
+
+    if config.TELEGRAM_COALESCE_WINDOW_S > 0:
+        app.bot_data["coalescer"] = MessageCoalescer(
+            on_flush=reply_with_agent,
+            window_s=config.TELEGRAM_COALESCE_WINDOW_S,
+            max_wait_s=config.TELEGRAM_COALESCE_MAX_WAIT_S,
+            on_start=lambda chat_id, update: start_typing(update.get_bot(), chat_id),
+            turn_lock=turn_lock,
+        )
 
     app.add_handler(CommandHandler("start", start_command))
     app.add_handler(CommandHandler("help", help_command))
+    app.add_handler(CommandHandler("report", report_command))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
 
     return app
@@ -1,7 +1,25 @@
+from App.config import config
 from App.service import invoke_agent
+from App.service.jobs import get_job_queue
+
+CLI_THREAD_ID = "cli-1"
+
+
+def print_job(job: dict) -> None:
+    """Job queue listener: reports the CLI's finished exports and charts."""
+    if job["status"] == "done":
+        print(f"\n📦 Job #{job['id']} ready: {job['result_path']}")
+    else:
+        print(f"\n❌ Job #{job['id']} failed: {job['error']}")
 
 
 def run_cli() -> None:
+    # Exports and charts are built in the background while the conversation goes on
+    job_queue = get_job_queue()
+    if config.JOB_WORKERS > 0:
+        job_queue.add_listener(print_job, lambda thread_id: thread_id == CLI_THREAD_ID)
+        job_queue.start()
+
     print("Pachico CLI — type 'quit' to exit")
     while True:
         try:
@@ -10,7 +28,7 @@ def run_cli() -> None:
                 print("Goodbye!")
                 break
 
-            response = invoke_agent(user_input, "cli-1")
+            response = invoke_agent(user_input, CLI_THREAD_ID)
             print(f"Assistant: {response.text}")
 
             for path in response.file_paths:
@@ -19,3 +37,4 @@ def run_cli() -> None:
         except (EOFError, KeyboardInterrupt):
             print("\nGoodbye!")
             break
+    job_queue.stop()
@@ -0,0 +1,492 @@
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import ColumnElement, Select, and_, or_, select
+
+from App.database import (
+    FoodEntry,
+    created_on_days,
+    get_db_session,
+    get_user_timezone,
+    timezone_groups,
+)
+
+# Columns written by the exporter, in file order
+EXPORT_COLUMNS = [
+    "id",
+    "user_id",
+    "food_description",
+    "calories",
+    "protein_g",
+    "fat_g",
+    "carbs_g",
+    "quantity",
+    "unit",
+    "fdc_id",
+    "source",
+    "meal_type",
+    "created_at",
+]
+_USER_INDEX = EXPORT_COLUMNS.index("user_id")
+# Partitioned exports carry user_id in the directory name instead
+_PARTITION_COLUMNS = [c for c in EXPORT_COLUMNS if c != "user_id"]
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet", "arrow")
+FILE_EXTENSIONS = {
+    "csv": ".csv",
+    "jsonl": ".jsonl",
+    "parquet": ".parquet",
+    "arrow": ".arrow",
+}
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise RuntimeError(
+            "Parquet/Arrow exports need pyarrow: install it with `uv sync --extra export`"
+        ) from e
+    return pa
+
+
+# -------------------------------------------
+# STREAMING READER
+# -------------------------------------------
+
+
+def _local_days_filter(
+    user_id: Optional[int], start_date: Optional[str], end_date: Optional[str]
+) -> List[ColumnElement[bool]]:
+    """created_at conditions for [start_date, end_date] in each user's own time zone."""
+    start = datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None
+    end = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else None
+    if start is None and end is None:
+        return []
+    with get_db_session(read_only=True) as session:
+        if user_id is not None:
+            return created_on_days(start, end, get_user_timezone(session, user_id))
+        groups = timezone_groups(session)
+    # Still plain created_at ranges (one per time zone), so partitions are pruned
+    return [
+        or_(
+            *(
+                and_(users, *created_on_days(start, end, tz_name))
+                for tz_name, users in groups
+            )
+        )
+    ]
+
+
+def entries_stmt(
+    user_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    meal_type: Optional[str] = None,
+) -> Select:
+    """Selects the export columns (not ORM objects), ordered by user then time.
+
+    Dates are local days in each user's time zone.
+    """
+    stmt = select(*(getattr(FoodEntry, c) for c in EXPORT_COLUMNS))
+    if user_id is not None:
+        stmt = stmt.where(FoodEntry.user_id == user_id)
+    stmt = stmt.where(*_local_days_filter(user_id, start_date, end_date))
+    if meal_type:
+        stmt = stmt.where(FoodEntry.meal_type == meal_type)
+    return stmt.order_by(FoodEntry.user_id, FoodEntry.created_at, FoodEntry.id)
+
+
+def iter_entry_batches(stmt: Select, batch_size: int = 10_000) -> Iterator[List[tuple]]:
+    """Yields lists of row tuples without loading the whole result.
+
+    `yield_per` streams from a server-side cursor on Postgres, so memory stays
+    bounded by one batch however many rows are exported.
+    """
+    with get_db_session(read_only=True) as session:
+        result = session.execute(stmt.execution_options(yield_per=batch_size))
+        for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+
+
+# -------------------------------------------
+# WRITERS (one batch at a time)
+# -------------------------------------------
+
+
+class CsvBatchWriter:
+    def __init__(self, path: str, columns: Sequence[str] = EXPORT_COLUMNS) -> None:
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+
+    def write_batch(self, rows: Sequence[tuple]) -> None:
+        self._writer.writerows(
+            [
+                [
+                    "" if v is None else v.isoformat() if isinstance(v, datetime) else v
+                    for v in row
+                ]
+                for row in rows
+            ]
+        )
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class JsonlBatchWriter:
+    def __init__(self, path: str, columns: Sequence[str] = EXPORT_COLUMNS) -> None:
+        self._file = open(path, "w", encoding="utf-8")
+        self._columns = columns
+
+    def write_batch(self, rows: Sequence[tuple]) -> None:
+        self._file.write(
+            "".join(
+                json.dumps(dict(zip(self._columns, row)), default=datetime.isoformat)
+                + "\n"
+                for row in rows
+            )
+        )
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def arrow_schema(columns: Sequence[str] = EXPORT_COLUMNS):
+    """Typed schema of the export (keeps floats, nullable ints and timestamps as such)."""
+    pa = _require_pyarrow()
+    schema = pa.schema(
+        [
+            ("id", pa.int64()),
+            ("user_id", pa.int64()),
+            ("food_description", pa.string()),
+            ("calories", pa.float64()),
+            ("protein_g", pa.float64()),
+            ("fat_g", pa.float64()),
+            ("carbs_g", pa.float64()),
+            ("quantity", pa.float64()),
+            ("unit", pa.string()),
+            ("fdc_id", pa.int64()),
+            ("source", pa.string()),
+            ("meal_type", pa.string()),
+            ("created_at", pa.timestamp("us")),
+        ]
+    )
+    return pa.schema([schema.field(c) for c in columns])
+
+
+class ParquetBatchWriter:
+    """Writes every batch as one Parquet row group (zstd-compressed columns)."""
+
+    def __init__(self, path: str, columns: Sequence[str] = EXPORT_COLUMNS) -> None:
+        import pyarrow.parquet as pq
+
+        self._schema = arrow_schema(columns)
+        self._writer = pq.ParquetWriter(path, self._schema, compression="zstd")
+
+    def write_batch(self, rows: Sequence[tuple]) -> None:
+        self._writer.write_table(_rows_to_table(rows, self._schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class ArrowBatchWriter:
+    """Writes an Arrow IPC file (record batch per DB batch; memory-mappable)."""
+
+    def __init__(self, path: str, columns: Sequence[str] = EXPORT_COLUMNS) -> None:
+        import pyarrow.ipc as ipc
+
+        self._schema = arrow_schema(columns)
+        self._writer = ipc.new_file(
+            path, self._schema, options=ipc.IpcWriteOptions(compression="zstd")
+        )
+
+    def write_batch(self, rows: Sequence[tuple]) -> None:
+        self._writer.write_table(_rows_to_table(rows, self._schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+def _rows_to_table(rows: Sequence[tuple], schema):
+    import pyarrow as pa
+
+    columns = list(zip(*rows)) if rows else [()] * len(schema)
+    return pa.Table.from_arrays(
+        [pa.array(col, type=field.type) for col, field in zip(columns, schema)],
+        schema=schema,
+    )
+
+
+_WRITERS = {
+    "csv": CsvBatchWriter,
+    "jsonl": JsonlBatchWriter,
+    "parquet": ParquetBatchWriter,
+    "arrow": ArrowBatchWriter,
+}
+
+
+def open_batch_writer(
+    path: str, file_format: str, columns: Sequence[str] = EXPORT_COLUMNS
+):
+    """Returns a writer with `write_batch(rows)` and `close()` for the format."""
+    if file_format not in _WRITERS:
+        raise ValueError(f"Unknown export format {file_format!r} ({EXPORT_FORMATS})")
+    if file_format in ("parquet", "arrow"):
+        _require_pyarrow()
+    return _WRITERS[file_format](path, columns)
+
+
+# -------------------------------------------
+# EXPORTS
+# -------------------------------------------
+
+
+def export_food_log(
+    path: str,
+    file_format: str = "parquet",
+    user_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    meal_type: Optional[str] = None,
+    batch_size: int = 10_000,
+) -> Dict[str, Any]:
+    """Streams filtered food entries into one file, a batch at a time.
+
+    Returns:
+        Dict with the path, `rows`, file `bytes` and `seconds`.
+    """
+    started = time.perf_counter()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    stmt = entries_stmt(user_id, start_date, end_date, meal_type)
+
+    rows = 0
+    writer = open_batch_writer(path, file_format)
+    try:
+        for batch in iter_entry_batches(stmt, batch_size):
+            writer.write_batch(batch)
+            rows += len(batch)
+    finally:
+        writer.close()
+
+    stats = {
+        "path": path,
+        "rows": rows,
+        "bytes": os.path.getsize(path),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    print(f"📤 Exported {rows:,} entries to {path} ({stats['bytes']:,} bytes)")
+    return stats
+
+
+def export_all_users(
+    output_dir: str,
+    file_format: str = "parquet",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    batch_size: int = 10_000,
+) -> Dict[str, Any]:
+    """Exports every user's entries into Hive-style partitions in a single pass.
+
+    Layout: `<output_dir>/user_id=<id>/food_entries<ext>`, which pyarrow, DuckDB,
+    Spark and pandas read back as one dataset partitioned by user. As usual for
+    Hive partitions, `user_id` lives in the path only, not in the files.
+
+    Returns:
+        Dict with the output directory, `users`, `rows`, total `bytes` and `seconds`.
+    """
+    started = time.perf_counter()
+    extension = FILE_EXTENSIONS[file_format]
+    stmt = entries_stmt(start_date=start_date, end_date=end_date)
+
+    stats = {"output_dir": output_dir, "users": 0, "rows": 0, "bytes": 0}
+    writer, current_user, current_path = None, None, None
+
+    def close_current() -> None:
+        if writer is not None:
+            writer.close()
+            stats["bytes"] += os.path.getsize(current_path)
+
+    try:
+        for batch in iter_entry_batches(stmt, batch_size):
+            # Rows are ordered by user, so each user is one contiguous run
+            for user_id, rows in groupby(batch, key=itemgetter(_USER_INDEX)):
+                if user_id != current_user:
+                    close_current()
+                    partition = os.path.join(output_dir, f"user_id={user_id}")
+                    os.makedirs(partition, exist_ok=True)
+                    current_path = os.path.join(partition, f"food_entries{extension}")
+                    writer = open_batch_writer(
+                        current_path, file_format, _PARTITION_COLUMNS
+                    )
+                    current_user = user_id
+                    stats["users"] += 1
+                writer.write_batch(
+                    [row[:_USER_INDEX] + row[_USER_INDEX + 1 :] for row in rows]
+                )
+            stats["rows"] += len(batch)
+    finally:
+        close_current()
+
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    print(f"📤 Bulk export: {stats}")
+    return stats
+
+
+# -------------------------------------------
+# BENCHMARK
+# -------------------------------------------
+
+
+def synthetic_batches(n_rows: int, batch_size: int = 10_000) -> Iterator[List[tuple]]:
+    """Food-log-like rows (repetitive descriptions, few distinct units), no DB needed."""
+    import random
+
+    rng = random.Random(42)
+    foods = [
+        "Chicken breast, roasted",
+        "Egg, whole, boiled",
+        "Rice, white, cooked",
+        "Banana, raw",
+        "Oatmeal with milk",
+        "Greek yogurt, plain",
+    ]
+    units = ["g", "cup", "piece", "serving"]
+    meals = ["breakfast", "lunch", "dinner", "snack", None]
+    start = datetime(2025, 1, 1)
+    for offset in range(0, n_rows, batch_size):
+        yield [
+            (
+                i + 1,
+                i % 500 + 1,
+                rng.choice(foods),
+                round(rng.uniform(20, 900), 1),
+                round(rng.uniform(0, 60), 1),
+                round(rng.uniform(0, 40), 1),
+                round(rng.uniform(0, 120), 1),
+                round(rng.uniform(0.5, 300), 1),
+                rng.choice(units),
+                rng.choice([None, rng.randint(100000, 2000000)]),
+                rng.choice(["usda", "llm_estimation"]),
+                rng.choice(meals),
+                start + timedelta(minutes=7 * i),
+            )
+            for i in range(offset, min(offset + batch_size, n_rows))
+        ]
+
+
+def _read_back(path: str, file_format: str) -> int:
+    if file_format == "csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            return sum(1 for _ in csv.DictReader(f))
+    if file_format == "jsonl":
+        with open(path, encoding="utf-8") as f:
+            return sum(1 for line in f if json.loads(line))
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+
+        return pq.read_table(path).num_rows
+    import pyarrow.ipc as ipc
+
+    with ipc.open_file(path) as reader:
+        return reader.read_all().num_rows
+
+
+def benchmark(n_rows: int = 200_000, batch_size: int = 10_000) -> Dict[str, Dict]:
+    """Compares file size, write and read throughput of every format against CSV."""
+    formats = list(EXPORT_FORMATS)
+    try:
+        _require_pyarrow()
+    except RuntimeError as e:
+        print(f"⚠️ {e}; benchmarking text formats only")
+        formats = ["csv", "jsonl"]
+
+    output_dir = tempfile.mkdtemp(prefix="export_benchmark_")
+    results: Dict[str, Dict] = {}
+    for file_format in formats:
+        path = os.path.join(output_dir, f"entries{FILE_EXTENSIONS[file_format]}")
+        batches = list(synthetic_batches(n_rows, batch_size))
+
+        started = time.perf_counter()
+        writer = open_batch_writer(path, file_format)
+        for batch in batches:
+            writer.write_batch(batch)
+        writer.close()
+        written = time.perf_counter()
+        assert _read_back(path, file_format) == n_rows
+        read = time.perf_counter()
+
+        results[file_format] = {
+            "mb": round(os.path.getsize(path) / 1e6, 2),
+            "write_rows_per_s": round(n_rows / (written - started)),
+            "read_rows_per_s": round(n_rows / (read - written)),
+        }
+
+    csv_size = results["csv"]["mb"]
+    for file_format, result in results.items():
+        result["size_vs_csv"] = round(result["mb"] / csv_size, 2)
+        print(f"⏱️ {file_format:8} {result}")
+    return results
+
+
+def run_export(argv: List[str]) -> None:
+    """Entry point for `python main.py export [options]`."""
+    parser = argparse.ArgumentParser(
+        prog="main.py export",
+        description="Export food_entries as CSV, JSON Lines, Parquet or Arrow.",
+    )
+    parser.add_argument(
+        "--format", choices=EXPORT_FORMATS, default="parquet", dest="file_format"
+    )
+    parser.add_argument("--user-id", type=int, help="Export a single user")
+    parser.add_argument(
+        "--all-users",
+        action="store_true",
+        help="Export every user into user_id=<id>/ partitions under --output",
+    )
+    parser.add_argument("--start-date", help="YYYY-MM-DD")
+    parser.add_argument("--end-date", help="YYYY-MM-DD")
+    parser.add_argument("--output", help="File (or directory with --all-users)")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument(
+        "--benchmark",
+        type=int,
+        metavar="ROWS",
+        help="Compare formats on synthetic rows instead of exporting",
+    )
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        benchmark(n_rows=args.benchmark, batch_size=args.batch_size)
+    elif args.all_users:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        export_all_users(
+            args.output or os.path.join("exports", f"food_entries_{timestamp}"),
+            file_format=args.file_format,
+            start_date=args.start_date,
+            end_date=args.end_date,
+            batch_size=args.batch_size,
+        )
+    else:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        extension = FILE_EXTENSIONS[args.file_format]
+        export_food_log(
+            args.output
+            or os.path.join("exports", f"food_entries_{timestamp}{extension}"),
+            file_format=args.file_format,
+            user_id=args.user_id,
+            start_date=args.start_date,
+            end_date=args.end_date,
+            batch_size=args.batch_size,
+        )
@@ -0,0 +1,284 @@
+import argparse
+import csv
+import hashlib
+import io
+import json
+import time
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from App.database import FoodEntry
+from App.database.session import engine
+
+# Columns written by the importer, in COPY order
+IMPORT_COLUMNS = [
+    "user_id",
+    "food_description",
+    "calories",
+    "protein_g",
+    "fat_g",
+    "carbs_g",
+    "quantity",
+    "unit",
+    "fdc_id",
+    "source",
+    "meal_type",
+    "created_at",
+    "import_key",
+]
+
+_REQUIRED_FIELDS = ("food_description", "calories", "protein_g", "fat_g", "carbs_g")
+_MEAL_TYPES = {"breakfast", "lunch", "dinner", "snack"}
+
+
+class ImportRowError(ValueError):
+    """Raised when a source row cannot be mapped to a food entry."""
+
+
+# -------------------------------------------
+# STREAMING PARSERS
+# -------------------------------------------
+
+
+def iter_csv_rows(path: str) -> Iterator[Dict[str, Any]]:
+    """Yields one dict per CSV row without loading the file into memory."""
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+def iter_jsonl_rows(path: str) -> Iterator[Dict[str, Any]]:
+    """Yields one dict per non-empty JSON Lines row."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def _parse_created_at(value: Any) -> datetime:
+    if not value:
+        raise ImportRowError("missing created_at")
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    # created_at is a naive column: store aware timestamps as UTC
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def normalize_row(raw: Dict[str, Any], user_id: Optional[int] = None) -> Dict[str, Any]:
+    """Maps a raw source row to `food_entries` columns and computes its import key.
+
+    The import key is a hash of the row content, so re-running the same import
+    (or overlapping exports from another tracker) never creates duplicates.
+    """
+    missing = [f for f in _REQUIRED_FIELDS if raw.get(f) in (None, "")]
+    if missing:
+        raise ImportRowError(f"missing {', '.join(missing)}")
+
+    row_user_id = user_id if user_id is not None else raw.get("user_id")
+    if row_user_id in (None, ""):
+        raise ImportRowError("missing user_id (pass --user-id or add a user_id column)")
+
+    meal_type = (raw.get("meal_type") or "").strip().lower() or None
+    if meal_type is not None and meal_type not in _MEAL_TYPES:
+        meal_type = None
+
+    fdc_id = raw.get("fdc_id")
+    row = {
+        "user_id": int(row_user_id),
+        "food_description": str(raw["food_description"]).strip(),
+        "calories": float(raw["calories"]),
+        "protein_g": float(raw["protein_g"]),
+        "fat_g": float(raw["fat_g"]),
+        "carbs_g": float(raw["carbs_g"]),
+        "quantity": float(raw.get("quantity") or 1),
+        "unit": str(raw.get("unit") or "serving")[:50],
+        "fdc_id": int(fdc_id) if fdc_id not in (None, "") else None,
+        "source": str(raw.get("source") or "import")[:20],
+        "meal_type": meal_type,
+        "created_at": _parse_created_at(raw.get("created_at")),
+    }
+
+    fingerprint = "|".join(
+        str(row[c])
+        for c in (
+            "user_id",
+            "created_at",
+            "food_description",
+            "calories",
+            "quantity",
+            "unit",
+        )
+    )
+    row["import_key"] = hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+    return row
+
+
+def _chunks(
+    rows: Iterable[Dict[str, Any]], size: int
+) -> Iterator[List[Dict[str, Any]]]:
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+# -------------------------------------------
+# WRITERS
+# -------------------------------------------
+
+
+def _copy_chunk_postgres(raw_conn, chunk: List[Dict[str, Any]]) -> int:
+    """COPYs a chunk into a temp staging table, then merges it with ON CONFLICT DO NOTHING."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in chunk:
+        writer.writerow(["" if row[c] is None else row[c] for c in IMPORT_COLUMNS])
+    buffer.seek(0)
+
+    columns = ", ".join(IMPORT_COLUMNS)
+    with raw_conn.cursor() as cursor:
+        cursor.execute("TRUNCATE food_entries_import_stage")
+        cursor.copy_expert(
+            f"COPY food_entries_import_stage ({columns}) FROM STDIN WITH (FORMAT csv, NULL '')",
+            buffer,
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO food_entries ({columns})
+            SELECT {columns} FROM food_entries_import_stage
+            ON CONFLICT (user_id, import_key, created_at) DO NOTHING
+            """
+        )
+        inserted = cursor.rowcount
+    raw_conn.commit()
+    return inserted
+
+
+def _executemany_chunk(conn, chunk: List[Dict[str, Any]]) -> int:
+    """Inserts a chunk with a single executemany, skipping rows already imported."""
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        stmt = pg_insert(FoodEntry).on_conflict_do_nothing(
+            index_elements=["user_id", "import_key", "created_at"]
+        )
+    elif dialect == "sqlite":
+        stmt = sqlite_insert(FoodEntry).on_conflict_do_nothing(
+            index_elements=["user_id", "import_key", "created_at"]
+        )
+    else:
+        stmt = insert(FoodEntry)
+
+    with conn.begin():
+        result = conn.execute(stmt, chunk)
+    return max(result.rowcount, 0)
+
+
+def import_food_log(
+    path: str,
+    file_format: Optional[str] = None,
+    user_id: Optional[int] = None,
+    chunk_size: int = 10_000,
+    use_copy: bool = True,
+) -> Dict[str, int]:
+    """Streams a CSV or JSON Lines food log into `food_entries`.
+
+    Rows are parsed lazily and written in chunks, via Postgres COPY when
+    available and chunked executemany otherwise. Re-importing a file is a no-op.
+
+    Returns:
+        Dict with `read`, `inserted`, `duplicates` and `invalid` row counts.
+    """
+    file_format = file_format or (
+        "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+    )
+    raw_rows = iter_jsonl_rows(path) if file_format == "jsonl" else iter_csv_rows(path)
+
+    stats = {"read": 0, "inserted": 0, "duplicates": 0, "invalid": 0}
+
+    def valid_rows() -> Iterator[Dict[str, Any]]:
+        for line_number, raw in enumerate(raw_rows, start=1):
+            stats["read"] += 1
+            try:
+                yield normalize_row(raw, user_id)
+            except (ImportRowError, ValueError, TypeError) as e:
+                stats["invalid"] += 1
+                if stats["invalid"] <= 10:
+                    print(f"⚠️ Skipping row {line_number}: {e}")
+
+    started = time.perf_counter()
+    use_copy = use_copy and engine.dialect.name == "postgresql"
+
+    if use_copy:
+        raw_conn = engine.raw_connection()
+        try:
+            with raw_conn.cursor() as cursor:
+                # Same column types as food_entries, but no defaults, constraints or indexes
+                cursor.execute(
+                    "CREATE TEMP TABLE IF NOT EXISTS food_entries_import_stage AS "
+                    f"SELECT {', '.join(IMPORT_COLUMNS)} FROM food_entries WITH NO DATA"
+                )
+            for chunk in _chunks(valid_rows(), chunk_size):
+                inserted = _copy_chunk_postgres(raw_conn, chunk)
+                stats["inserted"] += inserted
+                stats["duplicates"] += len(chunk) - inserted
+                _report_progress(stats, started)
+        finally:
+            raw_conn.close()
+    else:
+        with engine.connect() as conn:
+            for chunk in _chunks(valid_rows(), chunk_size):
+                inserted = _executemany_chunk(conn, chunk)
+                stats["inserted"] += inserted
+                stats["duplicates"] += len(chunk) - inserted
+                _report_progress(stats, started)
+
+    _report_progress(stats, started, final=True)
+    return stats
+
+
+def _report_progress(
+    stats: Dict[str, int], started: float, final: bool = False
+) -> None:
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    prefix = "✅ Import finished" if final else "📥 Importing"
+    print(
+        f"{prefix}: {stats['read']:,} read | {stats['inserted']:,} inserted | "
+        f"{stats['duplicates']:,} duplicates | {stats['invalid']:,} invalid | "
+        f"{stats['read'] / elapsed:,.0f} rows/s"
+    )
+
+
+def run_import(argv: List[str]) -> None:
+    """Entry point for `python main.py import <file> [options]`."""
+    parser = argparse.ArgumentParser(
+        prog="main.py import",
+        description="Bulk import a CSV or JSON Lines food log into food_entries.",
+    )
+    parser.add_argument("path", help="Path to the .csv or .jsonl file")
+    parser.add_argument("--format", choices=["csv", "jsonl"], dest="file_format")
+    parser.add_argument(
+        "--user-id",
+        type=int,
+        help="Assign all rows to this user (otherwise a user_id column is required)",
+    )
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument(
+        "--no-copy",
+        action="store_true",
+        help="Use chunked executemany instead of Postgres COPY",
+    )
+    args = parser.parse_args(argv)
+
+    import_food_log(
+        args.path,
+        file_format=args.file_format,
+        user_id=args.user_id,
+        chunk_size=args.chunk_size,
+        use_copy=not args.no_copy,
+    )
@@ -1,8 +1,8 @@
 from functools import lru_cache
-from typing import Optional
+from typing import Dict, Literal, Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from sqlalchemy import URL
+from sqlalchemy import URL, make_url
 
 
 class BaseConfig(BaseSettings):
@@ -18,6 +18,76 @@ class GlobalConfig(BaseConfig):
     TELEGRAM_BOT_TOKEN: str
     DATABASE_URL: str = "sqlite:///nutrition_logs.db"
     DB_FORCE_ROLL_BACK: bool = False
+    # "polling" runs the bot inside a single API process; "webhook" lets Telegram POST
+    # updates to /api/telegram/webhook so the API can run several workers/replicas
+    TELEGRAM_MODE: Literal["polling", "webhook", "off"] = "polling"
+    TELEGRAM_WEBHOOK_URL: Optional[str] = None  # public base URL of the API
+    TELEGRAM_WEBHOOK_SECRET: Optional[str] = None
+    # Messages of a chat sent within this many seconds of each other become one
+    # agent turn (0 disables); a burst is never held longer than the max wait
+    TELEGRAM_COALESCE_WINDOW_S: float = 1.5
+    TELEGRAM_COALESCE_MAX_WAIT_S: float = 5.0
+    API_WORKERS: int = 1
+
+    # LLM model tiers (OpenRouter model ids) and which tier each graph node uses.
+    # A call that errors out or exceeds its node's latency SLO is retried on MODEL_FALLBACK.
+    MODEL_FAST: str = "google/gemini-2.5-flash-lite"
+    MODEL_STRONG: str = "x-ai/grok-4-fast"
+    MODEL_FALLBACK: str = "openai/gpt-4o-mini"
+    NODE_MODEL_TIERS: Dict[str, Literal["fast", "strong"]] = {
+        "router": "fast",
+        "chart": "fast",
+        "data_review": "fast",
+        "food": "strong",
+        "chatbot": "strong",
+    }
+    NODE_LATENCY_SLO_S: Dict[str, float] = {
+        "router": 3.0,
+        "chart": 15.0,
+        "data_review": 15.0,
+        "food": 30.0,
+        "chatbot": 20.0,
+    }
+
+    # USDA FoodData Central request scheduling
+    USDA_BASE_URL: str = "https://api.nal.usda.gov/fdc/v1"
+    USDA_HOURLY_QUOTA: int = 1000  # FDC's default per API key
+    USDA_TIMEOUT_S: float = 10.0
+    USDA_MAX_RETRIES: int = 2
+    USDA_HEDGE_AFTER_S: Optional[float] = None  # e.g. 1.5 to hedge slow requests
+    USDA_CIRCUIT_FAILURES: int = 5
+    USDA_CIRCUIT_RESET_S: float = 60.0
+    # Shared USDA cache file (default: food_cache.db in the repo root)
+    USDA_CACHE_PATH: Optional[str] = None
+    # Portion cache prefetching: most logged foods at startup, top results after a
+    # search. Only spare quota is used: 25 requests at once with the default 50-token
+    # bucket, half of it reserved for interactive requests.
+    USDA_PREFETCH_TOP_N: int = 25
+    USDA_PREFETCH_SEARCH_RESULTS: int = 3
+    # Start USDA searches for food-log messages while the router is still classifying them
+    USDA_SPECULATIVE_SEARCH: bool = True
+    # Background jobs (CSV exports, charts): worker threads per process, polling the
+    # jobs table. A running job whose heartbeat is older than the timeout is retried
+    # (its worker died); failed deliveries are retried up to JOB_MAX_ATTEMPTS too.
+    JOB_WORKERS: int = 2
+    JOB_POLL_INTERVAL_S: float = 2.0
+    JOB_TIMEOUT_S: float = 600.0
+    JOB_MAX_ATTEMPTS: int = 3
+
+    # Agent checkpoints: blob compression ("none" writes plain msgpack; old blobs stay
+    # readable either way) and an optional trained zstd dictionary file. Keep the
+    # dictionary for as long as checkpoints written with it must be readable.
+    CHECKPOINT_COMPRESSION: Literal["zstd", "zlib", "none"] = "zstd"
+    CHECKPOINT_ZSTD_LEVEL: int = 3
+    CHECKPOINT_ZSTD_DICT: Optional[str] = None
+    # Tool results: rows shown to the LLM inline, the rest kept out of band behind a handle
+    TOOL_RESULT_MAX_ROWS: int = 20
+    TOOL_RESULT_TTL_S: int = 86400
+
+    # Warm up DB pool, LLM clients and graph in the background on API startup
+    WARMUP_ON_STARTUP: bool = True
+    # Fallback time zone for users without a user_settings row
+    DEFAULT_TIMEZONE: str = "UTC"
 
     # PostgreSQL connection fields
     POSTGRE_USER: str
@@ -26,6 +96,18 @@ class GlobalConfig(BaseConfig):
     POSTGRE_NAME: str = "food_db"
     POSTGRE_PORT: int = 5432
 
+    # Optional read replica (full SQLAlchemy URL) for read-only queries
+    DATABASE_REPLICA_URL: Optional[str] = None
+
+    # Connection pool sizing (applied to both the primary and the replica)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 1800  # seconds
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a free connection
+
+    # Monthly food_entries partitions created ahead of time (Postgres, checked daily)
+    PARTITION_MONTHS_AHEAD: int = 3
+
 
 class DevConfig(GlobalConfig):
     model_config = SettingsConfigDict(env_prefix="DEV_")
@@ -58,16 +140,41 @@ class DatabaseConfig:
     """Database configuration class to manage database connection settings."""
 
     DRIVER = "postgresql+psycopg2"
+    ASYNC_DRIVER = "postgresql+asyncpg"
     ECHO = False  # Set to False in production
 
     @classmethod
-    def get_database_url(cls) -> URL:
+    def get_database_url(cls, driver: Optional[str] = None) -> URL:
         """Constructs the database URL from environment variables."""
         return URL.create(
-            drivername=cls.DRIVER,
+            drivername=driver or cls.DRIVER,
             username=config.POSTGRE_USER,
             password=config.POSTGRE_PASSWORD,
             host=config.POSTGRE_HOST,
             database=config.POSTGRE_NAME,
             port=config.POSTGRE_PORT,
         )
+
+    @classmethod
+    def get_async_database_url(cls) -> URL:
+        """Same database through the asyncpg driver."""
+        return cls.get_database_url(driver=cls.ASYNC_DRIVER)
+
+    @classmethod
+    def get_replica_url(cls, driver: Optional[str] = None) -> Optional[URL]:
+        """Read replica URL, or None when reads should go to the primary."""
+        if not config.DATABASE_REPLICA_URL:
+            return None
+        url = make_url(config.DATABASE_REPLICA_URL)
+        return url.set(drivername=driver) if driver else url
+
+    @classmethod
+    def get_pool_options(cls) -> dict:
+        """Pool sizing keyword arguments for create_engine / create_async_engine."""
+        return {
+            "pool_size": config.DB_POOL_SIZE,
+            "max_overflow": config.DB_MAX_OVERFLOW,
+            "pool_recycle": config.DB_POOL_RECYCLE,
+            "pool_timeout": config.DB_POOL_TIMEOUT,
+            "pool_pre_ping": True,
+        }
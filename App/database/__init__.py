@@ -1,4 +1,57 @@
-from .models import Base, FoodEntry
-from .session import get_db_session
+from .models import Base, FoodEntry, Job, Recipe, UserSettings
+from .queries import (
+    SERIES_METRICS,
+    apply_food_search,
+    created_on_days,
+    daily_metric_series,
+    default_timezone,
+    find_user_recipes,
+    get_user_timezone,
+    local_day,
+    local_days_utc,
+    most_logged_fdc_ids,
+    recall_user_foods,
+    recall_user_meal,
+    recipe_summary,
+    set_user_timezone,
+    timezone_groups,
+    user_data_version,
+    user_day_bounds,
+    user_today,
+)
+from .session import (
+    advisory_lock,
+    async_get_db_session,
+    get_db_session,
+    get_pool_stats,
+)
 
-__all__ = ["Base", "FoodEntry", "get_db_session"]
+__all__ = [
+    "SERIES_METRICS",
+    "Base",
+    "FoodEntry",
+    "Job",
+    "Recipe",
+    "UserSettings",
+    "advisory_lock",
+    "apply_food_search",
+    "async_get_db_session",
+    "created_on_days",
+    "daily_metric_series",
+    "default_timezone",
+    "find_user_recipes",
+    "get_db_session",
+    "get_pool_stats",
+    "get_user_timezone",
+    "local_day",
+    "local_days_utc",
+    "most_logged_fdc_ids",
+    "recall_user_foods",
+    "recall_user_meal",
+    "recipe_summary",
+    "set_user_timezone",
+    "timezone_groups",
+    "user_data_version",
+    "user_day_bounds",
+    "user_today",
+]
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Float, Integer, String, Text, func
+from sqlalchemy import JSON, Float, Index, Integer, String, Text, func, text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -10,9 +10,26 @@ class Base(DeclarativeBase):
 
 class FoodEntry(Base):
     __tablename__ = "food_entries"
+    __table_args__ = (
+        # Idempotent bulk imports: the same source row can only be imported once per user.
+        # created_at is part of import_key's hash; it is in the index because unique
+        # indexes of a partitioned table must include the partition key.
+        Index(
+            "uq_food_entries_user_import_key",
+            "user_id",
+            "import_key",
+            "created_at",
+            unique=True,
+        ),
+        # Every read is one user's recent window
+        Index("ix_food_entries_user_created_at", "user_id", "created_at"),
+    )
 
+    # On Postgres the table is range-partitioned by month on created_at (see
+    # App/database/partitions.py) and its physical primary key is (id, created_at);
+    # ids still come from a single sequence, so `id` alone identifies an entry.
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    user_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
     food_description: Mapped[str] = mapped_column(Text, nullable=False)
     calories: Mapped[float] = mapped_column(Float, nullable=False)
     protein_g: Mapped[float] = mapped_column(Float, nullable=False)
@@ -26,6 +43,85 @@ class FoodEntry(Base):
     created_at: Mapped[datetime] = mapped_column(
         nullable=False, server_default=func.now()
     )
+    # Content hash of imported rows (NULL for entries logged through the agent)
+    import_key: Mapped[str | None] = mapped_column(String(64), nullable=True)
 
     def __repr__(self) -> str:
         return f"<FoodEntry(id={self.id}, user_id={self.user_id}, food={self.food_description!r})>"
+
+
+class UserSettings(Base):
+    __tablename__ = "user_settings"
+
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # IANA time zone name (e.g. "Europe/Madrid") used for day boundaries
+    timezone: Mapped[str] = mapped_column(String(64), nullable=False, default="UTC")
+
+    def __repr__(self) -> str:
+        return f"<UserSettings(user_id={self.user_id}, timezone={self.timezone!r})>"
+
+
+class Recipe(Base):
+    __tablename__ = "recipes"
+    __table_args__ = (
+        # Saving a recipe under an existing name (in any letter case) updates it
+        Index("uq_recipes_user_name", "user_id", text("lower(name)"), unique=True),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    name: Mapped[str] = mapped_column(String(200), nullable=False)
+    # Number of servings the ingredients make
+    servings: Mapped[float] = mapped_column(Float, nullable=False, default=1.0)
+    # Resolved ingredients (description, quantity, unit, grams, fdc_id and macros)
+    ingredients: Mapped[list] = mapped_column(JSON, nullable=False)
+    # Precomputed macros of ONE serving
+    calories: Mapped[float] = mapped_column(Float, nullable=False)
+    protein_g: Mapped[float] = mapped_column(Float, nullable=False)
+    fat_g: Mapped[float] = mapped_column(Float, nullable=False)
+    carbs_g: Mapped[float] = mapped_column(Float, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now()
+    )
+
+    def __repr__(self) -> str:
+        return f"<Recipe(id={self.id}, user_id={self.user_id}, name={self.name!r})>"
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Workers claim the oldest queued job
+        Index("ix_jobs_status_id", "status", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # Registered handler name, e.g. "export_csv", "chart", "dashboard"
+    kind: Mapped[str] = mapped_column(String(30), nullable=False)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Conversation to deliver the artifact to (the Telegram chat id for the bot)
+    thread_id: Mapped[str | None] = mapped_column(
+        String(100), nullable=True, index=True
+    )
+    params: Mapped[dict] = mapped_column(JSON, nullable=False)
+    # queued → running → done | failed
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="queued")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    result_path: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now()
+    )
+    started_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    # Refreshed while the job runs: a stale heartbeat means its worker died
+    heartbeat_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    # Set once a listener has sent the result; failed sends are retried
+    delivered_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    delivery_attempts: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    delivery_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<Job(id={self.id}, kind={self.kind!r}, status={self.status!r})>"
@@ -0,0 +1,242 @@
+import logging
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# food_entries is range-partitioned by month on created_at (Postgres only): one
+# food_entries_pYYYY_MM table per month, plus a DEFAULT partition that catches rows
+# outside every month created so far, so inserts never fail.
+PARENT_TABLE = "food_entries"
+DEFAULT_PARTITION = "food_entries_default"
+ARCHIVE_SCHEMA = "archive"
+
+# Serializes partition maintenance between API workers and cron runs
+_MAINTENANCE_LOCK_ID = 4_920_260_401
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_p{month:%Y_%m}"
+
+
+def is_partitioned(session: Session) -> bool:
+    """True when food_entries is a partitioned Postgres table."""
+    if session.get_bind().dialect.name != "postgresql":
+        return False
+    return bool(
+        session.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table p "
+                "JOIN pg_class c ON c.oid = p.partrelid "
+                "WHERE c.relname = :name AND pg_table_is_visible(c.oid)"
+            ),
+            {"name": PARENT_TABLE},
+        ).first()
+    )
+
+
+def list_partitions(session: Session) -> List[Dict[str, Any]]:
+    """Attached partitions with their bounds and estimated row counts, oldest first."""
+    rows = session.execute(
+        text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), "
+            "greatest(c.reltuples, 0)::bigint, pg_total_relation_size(c.oid) "
+            "FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :name AND pg_table_is_visible(p.oid) "
+            "ORDER BY c.relname"
+        ),
+        {"name": PARENT_TABLE},
+    ).all()
+    return [
+        {"name": name, "bounds": bounds, "rows_estimate": rows, "bytes": size}
+        for name, bounds, rows, size in rows
+    ]
+
+
+def _create_partition(session: Session, month: date, move_stray: bool) -> bool:
+    """Creates the month's partition; returns False if it already exists or is skipped.
+
+    Postgres refuses to create a partition while the DEFAULT partition holds rows of
+    its range (rows that landed there because the month was missing). With
+    `move_stray` those rows are moved into the new partition. That detaches and
+    reattaches the default under ACCESS EXCLUSIVE locks, so inserts into
+    food_entries wait until the move commits: only the maintenance command
+    (`python main.py partitions`) does it. Otherwise the month is skipped.
+    """
+    name = partition_name(month)
+    if session.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar():
+        return False
+
+    bounds = {"lo": month, "hi": add_months(month, 1)}
+    in_range = "created_at >= :lo AND created_at < :hi"
+    create = (
+        f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ('{bounds['lo']}') TO ('{bounds['hi']}')"
+    )
+    stray = session.execute(
+        text(f"SELECT count(*) FROM {DEFAULT_PARTITION} WHERE {in_range}"), bounds
+    ).scalar()
+    if not stray:
+        session.execute(text(create))
+        return True
+    if not move_stray:
+        logger.warning(
+            "%s has %s rows of %s: run `python main.py partitions` to move them",
+            DEFAULT_PARTITION,
+            stray,
+            name,
+        )
+        return False
+
+    # Detaching keeps the default's rows out of the parent while they are moved
+    session.execute(
+        text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {DEFAULT_PARTITION}")
+    )
+    session.execute(text(create))
+    session.execute(
+        text(
+            f"INSERT INTO {PARENT_TABLE} "
+            f"SELECT * FROM {DEFAULT_PARTITION} WHERE {in_range}"
+        ),
+        bounds,
+    )
+    session.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_range}"), bounds)
+    session.execute(
+        text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+    )
+    logger.warning("Moved %s rows from %s into %s", stray, DEFAULT_PARTITION, name)
+    return True
+
+
+def ensure_partitions(
+    session: Session,
+    months_ahead: int = 3,
+    today: Optional[date] = None,
+    move_stray: bool = False,
+) -> List[str]:
+    """Creates the partitions of the current month and the next `months_ahead` ones.
+
+    Idempotent and safe to run from several processes at once (advisory lock). A
+    no-op unless food_entries is partitioned. Months whose rows already sit in the
+    DEFAULT partition are only created with `move_stray` (see _create_partition).
+
+    Returns:
+        Names of the partitions created.
+    """
+    if not is_partitioned(session):
+        return []
+    session.execute(
+        text("SELECT pg_advisory_xact_lock(:id)"), {"id": _MAINTENANCE_LOCK_ID}
+    )
+    current = month_start(today or datetime.now(timezone.utc).date())
+    created = [
+        partition_name(month)
+        for month in (add_months(current, n) for n in range(months_ahead + 1))
+        if _create_partition(session, month, move_stray)
+    ]
+    if created:
+        logger.info("Created food_entries partitions: %s", ", ".join(created))
+    return created
+
+
+def archive_partitions(session: Session, before: date, drop: bool = False) -> List[str]:
+    """Detaches every monthly partition older than `before`'s month.
+
+    Detached tables move to the `archive` schema (kept queryable, and re-attachable
+    with ALTER TABLE ... ATTACH PARTITION), or are dropped with `drop=True`. Both
+    are catalog-only operations: no row is read or rewritten.
+
+    Returns:
+        Names of the partitions detached.
+    """
+    if not is_partitioned(session):
+        return []
+    session.execute(
+        text("SELECT pg_advisory_xact_lock(:id)"), {"id": _MAINTENANCE_LOCK_ID}
+    )
+    cutoff = partition_name(month_start(before))
+    detached = [
+        p["name"]
+        for p in list_partitions(session)
+        if p["name"] != DEFAULT_PARTITION and p["name"] < cutoff
+    ]
+    if detached and not drop:
+        session.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+    for name in detached:
+        session.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+        if drop:
+            session.execute(text(f"DROP TABLE {name}"))
+        else:
+            session.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+            # Archived months take no inserts; the id default would otherwise tie
+            # them to food_entries_id_seq (and block dropping food_entries)
+            session.execute(
+                text(
+                    f"ALTER TABLE {ARCHIVE_SCHEMA}.{name} ALTER COLUMN id DROP DEFAULT"
+                )
+            )
+    if detached:
+        action = "Dropped" if drop else f"Archived to {ARCHIVE_SCHEMA}:"
+        logger.info("%s %s", action, ", ".join(detached))
+    return detached
+
+
+def run_partitions(argv: Optional[List[str]] = None) -> None:
+    """CLI entry point: python main.py partitions [--archive-before YYYY-MM [--drop]]."""
+    import argparse
+
+    from App.config import config
+
+    from .session import get_db_session
+
+    parser = argparse.ArgumentParser(
+        prog="main.py partitions",
+        description="Create upcoming food_entries partitions and archive old ones.",
+    )
+    parser.add_argument(
+        "--months-ahead", type=int, default=config.PARTITION_MONTHS_AHEAD
+    )
+    parser.add_argument(
+        "--archive-before",
+        type=lambda v: datetime.strptime(v, "%Y-%m").date(),
+        help="Detach partitions of months before this one (YYYY-MM)",
+    )
+    parser.add_argument(
+        "--drop", action="store_true", help="Drop detached partitions, don't archive"
+    )
+    args = parser.parse_args(argv)
+
+    with get_db_session() as session:
+        if not is_partitioned(session):
+            print(
+                "⚠️ food_entries is not partitioned (Postgres only, run alembic upgrade)"
+            )
+            return
+        created = ensure_partitions(session, args.months_ahead, move_stray=True)
+        detached = (
+            archive_partitions(session, args.archive_before, args.drop)
+            if args.archive_before
+            else []
+        )
+        partitions = list_partitions(session)
+
+    print(f"🗂️ Created {len(created)}, detached {len(detached)} partitions")
+    for p in partitions:
+        print(
+            f"   {p['name']:28} {p['bounds']:60} "
+            f"~{p['rows_estimate']:>9,} rows {p['bytes'] / 1e6:8.1f} MB"
+        )
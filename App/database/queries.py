@@ -0,0 +1,547 @@
+import re
+import sqlite3
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple, TypeVar
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import (
+    Date,
+    Select,
+    case,
+    column,
+    event,
+    func,
+    inspect,
+    literal,
+    literal_column,
+    or_,
+    select,
+    table,
+)
+from sqlalchemy import cast as sa_cast
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.orm import Query, Session
+
+from App.config import config
+
+from .models import FoodEntry, Recipe, UserSettings
+
+Searchable = TypeVar("Searchable", Query, Select)
+
+# Columns that can be summed into a daily series
+SERIES_METRICS = ("calories", "protein_g", "fat_g", "carbs_g")
+
+
+def _checked_timezone(tz_name: str) -> str:
+    """`tz_name` if it is a known IANA zone, else "UTC"."""
+    try:
+        ZoneInfo(tz_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return "UTC"
+    return tz_name
+
+
+def default_timezone() -> str:
+    """DEFAULT_TIMEZONE, or UTC if it is not a known zone."""
+    return _checked_timezone(config.DEFAULT_TIMEZONE)
+
+
+def get_user_timezone(session: Session, user_id: int) -> str:
+    """Returns the user's IANA time zone, falling back to DEFAULT_TIMEZONE."""
+    settings = session.get(UserSettings, user_id)
+    return _checked_timezone(settings.timezone) if settings else default_timezone()
+
+
+def set_user_timezone(session: Session, user_id: int, tz_name: str) -> None:
+    """Stores the user's IANA time zone (e.g. "Europe/Madrid").
+
+    Raises:
+        ValueError: if `tz_name` is not a known IANA time zone.
+    """
+    if _checked_timezone(tz_name) != tz_name:
+        raise ValueError(f"Unknown time zone {tz_name!r}")
+    settings = session.get(UserSettings, user_id)
+    if settings is None:
+        session.add(UserSettings(user_id=user_id, timezone=tz_name))
+    else:
+        settings.timezone = tz_name
+
+
+def user_today(session: Session, user_id: int) -> date:
+    """Today's date in the user's time zone (not the server clock)."""
+    return datetime.now(ZoneInfo(get_user_timezone(session, user_id))).date()
+
+
+def timezone_groups(session: Session) -> List[Tuple[str, ColumnElement[bool]]]:
+    """Splits all users by time zone, for queries over local days of many users.
+
+    Returns:
+        (IANA time zone, condition on FoodEntry.user_id) pairs covering every user:
+        DEFAULT_TIMEZONE first (users without a setting), then one per other zone.
+    """
+    default = default_timezone()
+    zones: Dict[str, List[int]] = {}
+    for user_id, tz_name in session.execute(
+        select(UserSettings.user_id, UserSettings.timezone)
+    ):
+        tz_name = _checked_timezone(tz_name)
+        if tz_name != default:
+            zones.setdefault(tz_name, []).append(user_id)
+
+    others = [user_id for user_ids in zones.values() for user_id in user_ids]
+    return [(default, FoodEntry.user_id.notin_(others))] + [
+        (tz_name, FoodEntry.user_id.in_(user_ids))
+        for tz_name, user_ids in zones.items()
+    ]
+
+
+def local_days_utc(
+    start_date: date, end_date: date, tz_name: str
+) -> Tuple[datetime, datetime]:
+    """Local [start 00:00, end+1 00:00) in `tz_name` as naive UTC datetimes (created_at is UTC)."""
+    tz = ZoneInfo(tz_name)
+    start_local = datetime.combine(start_date, time.min, tzinfo=tz)
+    end_local = datetime.combine(end_date + timedelta(days=1), time.min, tzinfo=tz)
+    return (
+        start_local.astimezone(timezone.utc).replace(tzinfo=None),
+        end_local.astimezone(timezone.utc).replace(tzinfo=None),
+    )
+
+
+def _offset_segments(
+    start_utc: datetime, end_utc: datetime, tz: ZoneInfo
+) -> List[Tuple[datetime, int]]:
+    """Splits [start_utc, end_utc) where `tz`'s UTC offset changes.
+
+    Returns:
+        (segment start as naive UTC, offset in minutes) pairs, in time order.
+    """
+
+    def offset(at: datetime) -> int:
+        local = at.replace(tzinfo=timezone.utc).astimezone(tz)
+        return int(local.utcoffset().total_seconds()) // 60
+
+    segments = [(start_utc, offset(start_utc))]
+    hour = start_utc
+    while hour < end_utc:
+        following = hour + timedelta(hours=1)
+        if offset(following) != segments[-1][1]:
+            # Transitions are on the minute: find it within the hour
+            at = hour
+            while offset(at) == segments[-1][1]:
+                at += timedelta(minutes=1)
+            segments.append((at, offset(at)))
+        hour = following
+    return segments
+
+
+def user_day_bounds(
+    session: Session, user_id: int, start_date: date, end_date: date
+) -> Tuple[datetime, datetime]:
+    """The user's local days [start_date, end_date] as a naive UTC created_at range."""
+    return local_days_utc(start_date, end_date, get_user_timezone(session, user_id))
+
+
+def created_on_days(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    tz_name: str = "UTC",
+) -> List[ColumnElement[bool]]:
+    """Conditions for the local days [start_date, end_date] in `tz_name` on created_at.
+
+    Plain range comparisons instead of CAST(created_at AS date), so Postgres prunes the
+    monthly partitions outside the window and can use the (user_id, created_at) index.
+    """
+    conditions = []
+    if start_date:
+        start_utc, _ = local_days_utc(start_date, start_date, tz_name)
+        conditions.append(FoodEntry.created_at >= start_utc)
+    if end_date:
+        _, end_utc = local_days_utc(end_date, end_date, tz_name)
+        conditions.append(FoodEntry.created_at < end_utc)
+    return conditions
+
+
+def local_day(
+    session: Session, tz_name: str, start_utc: datetime, end_utc: datetime
+) -> ColumnElement:
+    """SQL expression for the day in `tz_name` of FoodEntry.created_at.
+
+    Postgres returns a date, other dialects (SQLite) an ISO date string. Only valid
+    for rows in [start_utc, end_utc): on SQLite each row is shifted by the UTC offset
+    in force at its own time, from the offset changes (DST) within that window.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        # created_at is naive UTC → timestamptz → naive local time in the user's zone
+        local_ts = func.timezone(tz_name, func.timezone("UTC", FoodEntry.created_at))
+        return sa_cast(func.date_trunc("day", local_ts), Date)
+
+    segments = _offset_segments(start_utc, end_utc, ZoneInfo(tz_name))
+    shifted = [
+        func.date(FoodEntry.created_at, f"{minutes:+d} minutes")
+        for _, minutes in segments
+    ]
+    if len(segments) == 1:
+        return shifted[0]
+    return case(
+        *(
+            (FoodEntry.created_at < next_start, day)
+            for (next_start, _), day in zip(segments[1:], shifted)
+        ),
+        else_=shifted[-1],
+    )
+
+
+def daily_metric_series(
+    session: Session,
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    metrics: Sequence[str] = SERIES_METRICS,
+    tz_name: Optional[str] = None,
+) -> List[Tuple[date, Dict[str, float]]]:
+    """Returns one row per local day in [start_date, end_date], zero-filled, summed in SQL.
+
+    On Postgres the buckets come from `date_trunc` in the user's time zone joined to a
+    `generate_series` of days, so exactly (end - start + 1) rows come back.
+
+    Args:
+        session: Open DB session.
+        user_id: User identifier.
+        start_date: First local day (inclusive).
+        end_date: Last local day (inclusive).
+        metrics: Any subset of SERIES_METRICS.
+        tz_name: IANA time zone for day boundaries (default: the user's setting).
+
+    Returns:
+        List of (day, {metric: rounded sum}) tuples in date order.
+    """
+    unknown = set(metrics) - set(SERIES_METRICS)
+    if unknown:
+        raise ValueError(f"Unknown metrics: {', '.join(sorted(unknown))}")
+
+    tz_name = tz_name or get_user_timezone(session, user_id)
+    start_utc, end_utc = local_days_utc(start_date, end_date, tz_name)
+    in_range = (
+        FoodEntry.user_id == user_id,
+        FoodEntry.created_at >= start_utc,
+        FoodEntry.created_at < end_utc,
+    )
+
+    day = local_day(session, tz_name, start_utc, end_utc)
+
+    if session.get_bind().dialect.name == "postgresql":
+        agg = (
+            select(
+                day.label("day"),
+                *(func.sum(getattr(FoodEntry, m)).label(m) for m in metrics),
+            )
+            .where(*in_range)
+            .group_by(day)
+            .subquery()
+        )
+        days = select(
+            sa_cast(
+                func.generate_series(
+                    start_date, end_date, literal_column("interval '1 day'")
+                ),
+                Date,
+            ).label("day")
+        ).subquery()
+        stmt = (
+            select(days.c.day, *(func.coalesce(agg.c[m], 0.0) for m in metrics))
+            .select_from(days.outerjoin(agg, agg.c.day == days.c.day))
+            .order_by(days.c.day)
+        )
+        return [
+            (row[0], {m: round(float(v), 1) for m, v in zip(metrics, row[1:])})
+            for row in session.execute(stmt)
+        ]
+
+    # Other dialects (SQLite): group in SQL, zero-fill here
+    stmt = (
+        select(day, *(func.sum(getattr(FoodEntry, m)) for m in metrics))
+        .where(*in_range)
+        .group_by(day)
+    )
+    sums = {str(row[0]): row[1:] for row in session.execute(stmt)}
+
+    series = []
+    for i in range((end_date - start_date).days + 1):
+        day = start_date + timedelta(days=i)
+        values = sums.get(day.isoformat(), (0.0,) * len(metrics))
+        series.append(
+            (day, {m: round(float(v or 0.0), 1) for m, v in zip(metrics, values)})
+        )
+    return series
+
+
+def user_data_version(session: Session, user_id: int) -> str:
+    """Cheap fingerprint of a user's food log: changes whenever entries are added or removed.
+
+    Entries are never edited in place, so (row count, highest id) is enough and
+    costs one index-only aggregate. The time zone is part of it because it moves
+    the day boundaries. Used for ETags and cache keys.
+    """
+    count, max_id = session.execute(
+        select(func.count(FoodEntry.id), func.max(FoodEntry.id)).where(
+            FoodEntry.user_id == user_id
+        )
+    ).one()
+    return f"{count}-{max_id or 0}-{get_user_timezone(session, user_id)}"
+
+
+def most_logged_fdc_ids(
+    session: Session, limit: int = 200, since: Optional[datetime] = None
+) -> List[int]:
+    """Most frequently logged USDA foods across all users, most common first.
+
+    Args:
+        session: Open DB session.
+        limit: Max number of FDC IDs.
+        since: Only count entries created at or after this (naive UTC) time.
+    """
+    logged = func.count(FoodEntry.id)
+    stmt = (
+        select(FoodEntry.fdc_id)
+        .where(FoodEntry.fdc_id.is_not(None))
+        .group_by(FoodEntry.fdc_id)
+        .order_by(logged.desc())
+        .limit(limit)
+    )
+    if since is not None:
+        stmt = stmt.where(FoodEntry.created_at >= since)
+    return list(session.scalars(stmt))
+
+
+# -------------------------------------------
+# FOOD DESCRIPTION SEARCH
+# -------------------------------------------
+
+# Minimum word similarity (0-1) for a misspelled keyword to match ("chiken" → "chicken" ≈ 0.7)
+SEARCH_SIMILARITY_THRESHOLD = 0.5
+
+_WORD_PATTERN = re.compile(r"\w+")
+_TS_CONFIG = literal_column("'english'::regconfig")
+_fts_available: Dict[str, bool] = {}
+
+
+def _trigrams(word: str) -> set:
+    padded = f"  {word} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def word_similarity(keyword: str, text: Optional[str]) -> float:
+    """Trigram similarity between each keyword word and its best-matching word in `text`.
+
+    Mirrors pg_trgm's word_similarity closely enough for the SQLite search path.
+    """
+    keyword_words = _WORD_PATTERN.findall(keyword.lower())
+    text_trigrams = [_trigrams(w) for w in _WORD_PATTERN.findall((text or "").lower())]
+    if not keyword_words or not text_trigrams:
+        return 0.0
+
+    scores = []
+    for word in keyword_words:
+        wanted = _trigrams(word)
+        scores.append(max(len(wanted & t) / len(wanted) for t in text_trigrams))
+    return sum(scores) / len(scores)
+
+
+@event.listens_for(Engine, "connect")
+def _register_sqlite_functions(dbapi_connection, connection_record) -> None:
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function(
+            "word_similarity", 2, word_similarity, deterministic=True
+        )
+
+
+def _has_fts_table(session: Session) -> bool:
+    bind = session.get_bind()
+    key = str(bind.url)
+    if bind.dialect.is_async:
+        # Can't reflect synchronously through an async driver; use the ILIKE fallback
+        return _fts_available.get(key, False)
+    if key not in _fts_available:
+        _fts_available[key] = inspect(bind).has_table("food_entries_fts")
+    return _fts_available[key]
+
+
+def apply_food_search(query: Searchable, session: Session, keyword: str) -> Searchable:
+    """Filters a FoodEntry query (ORM Query or select()) by a typo-tolerant keyword and orders it by relevance.
+
+    Postgres: ILIKE, pg_trgm word similarity (<%) and full-text match, all served by the
+    GIN indexes from the search migration. SQLite: FTS5 trigram candidates re-scored
+    with `word_similarity`. Anything else falls back to a plain ILIKE scan.
+    """
+    keyword = keyword.strip()
+    dialect = session.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        tsv = func.to_tsvector(_TS_CONFIG, FoodEntry.food_description)
+        tsq = func.plainto_tsquery(_TS_CONFIG, keyword)
+        relevance = func.greatest(
+            func.word_similarity(keyword, FoodEntry.food_description),
+            func.ts_rank(tsv, tsq),
+        )
+        return query.filter(
+            or_(
+                FoodEntry.food_description.ilike(f"%{keyword}%"),
+                literal(keyword).op("<%")(FoodEntry.food_description),
+                tsv.op("@@")(tsq),
+            )
+        ).order_by(relevance.desc())
+
+    trigrams = {
+        t.strip()
+        for word in _WORD_PATTERN.findall(keyword.lower())
+        for t in _trigrams(word)
+        if len(t.strip()) == 3
+    }
+    if dialect == "sqlite" and trigrams and _has_fts_table(session):
+        fts = table("food_entries_fts", column("rowid"))
+        match = " OR ".join(f'"{t}"' for t in sorted(trigrams))
+        candidates = select(fts.c.rowid).where(
+            literal_column("food_entries_fts").op("MATCH")(match)
+        )
+        relevance = func.word_similarity(keyword, FoodEntry.food_description)
+        return query.filter(
+            FoodEntry.id.in_(candidates),
+            or_(
+                FoodEntry.food_description.ilike(f"%{keyword}%"),
+                relevance >= SEARCH_SIMILARITY_THRESHOLD,
+            ),
+        ).order_by(relevance.desc())
+
+    return query.filter(FoodEntry.food_description.ilike(f"%{keyword}%"))
+
+
+# -------------------------------------------
+# PERSONAL FOOD MEMORY (repeat logging)
+# -------------------------------------------
+
+# How many of the user's recent matching entries are scanned to build the memory
+MEMORY_SCAN_LIMIT = 200
+
+
+def _memory_key(description: str) -> str:
+    return " ".join(description.casefold().split())
+
+
+def recall_user_foods(
+    session: Session, user_id: int, keyword: Optional[str] = None, limit: int = 5
+) -> List[Dict]:
+    """The user's previously logged foods, one per distinct description, with resolved macros.
+
+    With a keyword, matches are typo-tolerant and ordered by relevance (see
+    `apply_food_search`); without one, the most frequently logged foods come first.
+    Each food carries the values of its most recent entry, ready to be logged again.
+
+    Returns:
+        List of dicts with the latest `entry_id`, description, quantity/unit, macros,
+        fdc_id, source, meal_type, `times_logged` and `last_logged` (ISO date).
+    """
+    stmt = select(FoodEntry).where(FoodEntry.user_id == user_id)
+    if keyword and keyword.strip():
+        stmt = apply_food_search(stmt, session, keyword)
+    stmt = stmt.order_by(FoodEntry.created_at.desc()).limit(MEMORY_SCAN_LIMIT)
+
+    foods: Dict[str, Dict] = {}
+    for entry in session.scalars(stmt):
+        key = _memory_key(entry.food_description)
+        if key in foods:
+            foods[key]["times_logged"] += 1
+            continue
+        foods[key] = {
+            "entry_id": entry.id,
+            "food_description": entry.food_description,
+            "quantity": entry.quantity,
+            "unit": entry.unit,
+            "calories": entry.calories,
+            "protein_g": entry.protein_g,
+            "fat_g": entry.fat_g,
+            "carbs_g": entry.carbs_g,
+            "fdc_id": entry.fdc_id,
+            "source": entry.source,
+            "meal_type": entry.meal_type,
+            "times_logged": 1,
+            "last_logged": entry.created_at.date().isoformat(),
+        }
+
+    recalled = list(foods.values())
+    if not keyword:
+        recalled.sort(key=lambda f: f["times_logged"], reverse=True)
+    return recalled[:limit]
+
+
+def recall_user_meal(
+    session: Session,
+    user_id: int,
+    day: date,
+    meal_type: Optional[str] = None,
+) -> List[FoodEntry]:
+    """Entries the user logged on a local day (optionally one meal), oldest first."""
+    start_utc, end_utc = local_days_utc(day, day, get_user_timezone(session, user_id))
+    stmt = select(FoodEntry).where(
+        FoodEntry.user_id == user_id,
+        FoodEntry.created_at >= start_utc,
+        FoodEntry.created_at < end_utc,
+    )
+    if meal_type:
+        stmt = stmt.where(FoodEntry.meal_type == meal_type)
+    return list(session.scalars(stmt.order_by(FoodEntry.created_at)))
+
+
+# -------------------------------------------
+# RECIPES
+# -------------------------------------------
+
+
+def recipe_summary(recipe: Recipe) -> Dict:
+    """Tool-friendly view of a recipe: per-serving macros and readable ingredients."""
+    return {
+        "recipe_id": recipe.id,
+        "name": recipe.name,
+        "servings": recipe.servings,
+        "per_serving": {
+            "calories": recipe.calories,
+            "protein_g": recipe.protein_g,
+            "fat_g": recipe.fat_g,
+            "carbs_g": recipe.carbs_g,
+        },
+        "ingredients": [
+            f"{i['quantity']:g} {i['unit']} {i['food_description']}"
+            for i in recipe.ingredients
+        ],
+    }
+
+
+def find_user_recipes(
+    session: Session, user_id: int, keyword: Optional[str] = None, limit: int = 5
+) -> List[Dict]:
+    """The user's saved recipes, best name match first (typo-tolerant), or newest first.
+
+    A user has a handful of recipes, so they are scored in Python with `word_similarity`
+    instead of going through the food_entries search indexes.
+    """
+    recipes = session.scalars(
+        select(Recipe)
+        .where(Recipe.user_id == user_id)
+        .order_by(Recipe.created_at.desc())
+    ).all()
+    if keyword and keyword.strip():
+        scored = [
+            (
+                (
+                    1.0
+                    if keyword.casefold() in r.name.casefold()
+                    else word_similarity(keyword, r.name)
+                ),
+                r,
+            )
+            for r in recipes
+        ]
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        recipes = [r for score, r in scored if score >= SEARCH_SIMILARITY_THRESHOLD]
+    return [recipe_summary(r) for r in recipes[:limit]]
@@ -1,30 +1,134 @@
-from collections.abc import Generator
-from contextlib import contextmanager
+import asyncio
+import threading
+import time
+from collections.abc import AsyncGenerator, Generator
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import Session, sessionmaker
 
 from App.config import DatabaseConfig, config
 
+# Primary handles every write; reads go to the replica when DATABASE_REPLICA_URL is set
 engine = create_engine(
     DatabaseConfig.get_database_url(),
     echo=DatabaseConfig.ECHO,
-    pool_pre_ping=True,
+    **DatabaseConfig.get_pool_options(),
+)
+
+_replica_url = DatabaseConfig.get_replica_url()
+read_engine = (
+    create_engine(
+        _replica_url, echo=DatabaseConfig.ECHO, **DatabaseConfig.get_pool_options()
+    )
+    if _replica_url is not None
+    else engine
 )
 
 SessionLocal = sessionmaker(bind=engine)
+ReadSessionLocal = sessionmaker(bind=read_engine)
+
+
+# ----- Pool checkout wait times ----- #
+class PoolWaitStats:
+    """Thread-safe running stats of how long sessions waited for a pooled connection."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.total_wait_s = 0.0
+        self.max_wait_s = 0.0
+
+    def record(self, wait_s: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait_s += wait_s
+            self.max_wait_s = max(self.max_wait_s, wait_s)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "avg_wait_ms": (
+                    round(1000 * self.total_wait_s / self.checkouts, 2)
+                    if self.checkouts
+                    else 0.0
+                ),
+                "max_wait_ms": round(1000 * self.max_wait_s, 2),
+            }
+
+
+_wait_stats = {"primary": PoolWaitStats(), "replica": PoolWaitStats()}
+
+# Seconds this thread spent opening new DBAPI connections since the last reset: they
+# are subtracted from the checkout time, so the stats are the wait for a free slot
+_connect_time = threading.local()
+
+
+def _track_connect_time(target) -> None:
+    @event.listens_for(target, "do_connect")
+    def connect_started(dialect, conn_rec, cargs, cparams):
+        _connect_time.started = time.perf_counter()
+
+    @event.listens_for(target, "connect")
+    def connect_finished(dbapi_connection, connection_record):
+        started = getattr(_connect_time, "started", None)
+        if started is not None:
+            _connect_time.total = (
+                getattr(_connect_time, "total", 0.0) + time.perf_counter() - started
+            )
+            _connect_time.started = None
+
+
+for _target in {engine, read_engine}:
+    _track_connect_time(_target)
+
+
+def _pool_status(pool) -> dict:
+    # QueuePool counters (other pool classes don't have them)
+    return {
+        name: getattr(pool, name)()
+        for name in ("size", "checkedin", "checkedout", "overflow")
+        if hasattr(pool, name)
+    }
+
+
+def get_pool_stats() -> dict:
+    """Pool status and checkout wait times for the primary and replica engines."""
+    stats = {
+        "primary": {**_pool_status(engine.pool), **_wait_stats["primary"].snapshot()}
+    }
+    if read_engine is not engine:
+        stats["replica"] = {
+            **_pool_status(read_engine.pool),
+            **_wait_stats["replica"].snapshot(),
+        }
+    return stats
 
 
 @contextmanager
-def get_db_session() -> Generator[Session, None, None]:
+def get_db_session(read_only: bool = False) -> Generator[Session, None, None]:
     """Context manager that yields a SQLAlchemy session with commit/rollback handling.
 
     Honors the DB_FORCE_ROLL_BACK config flag for test isolation.
+    Pass read_only=True for queries that can be served by the read replica.
     """
-    session = SessionLocal()
+    session = ReadSessionLocal() if read_only else SessionLocal()
     try:
+        # Check out the connection up front so the pool wait is measured (minus the
+        # time spent connecting, when the pool had to open a new connection)
+        _connect_time.total = 0.0
+        started = time.perf_counter()
+        session.connection()
+        waited = time.perf_counter() - started - _connect_time.total
+        role = "replica" if read_only and read_engine is not engine else "primary"
+        _wait_stats[role].record(max(waited, 0.0))
+
         yield session
-        if config.DB_FORCE_ROLL_BACK:
+        if config.DB_FORCE_ROLL_BACK or read_only:
             session.rollback()
         else:
             session.commit()
@@ -33,3 +137,81 @@ def get_db_session() -> Generator[Session, None, None]:
         raise
     finally:
         session.close()
+
+
+# lru_cache so the asyncpg engines are only built on first use (asyncpg is optional)
+@lru_cache()
+def get_async_sessionmaker(read_only: bool = False) -> async_sessionmaker[AsyncSession]:
+    """Returns the sessionmaker bound to the async (asyncpg) primary or replica engine."""
+    url = DatabaseConfig.get_async_database_url()
+    if read_only:
+        replica_url = DatabaseConfig.get_replica_url(driver=DatabaseConfig.ASYNC_DRIVER)
+        if replica_url is None:
+            # No replica: share the primary's pool instead of opening a second one
+            return get_async_sessionmaker(read_only=False)
+        url = replica_url
+    try:
+        async_engine = create_async_engine(
+            url, echo=DatabaseConfig.ECHO, **DatabaseConfig.get_pool_options()
+        )
+    except ImportError as e:
+        raise RuntimeError(
+            "Async DB access needs asyncpg: install it with `uv sync --extra async`."
+        ) from e
+    return async_sessionmaker(bind=async_engine)
+
+
+@asynccontextmanager
+async def async_get_db_session(
+    read_only: bool = False,
+) -> AsyncGenerator[AsyncSession, None]:
+    """Async counterpart of get_db_session with the same commit/rollback handling.
+
+    Honors the DB_FORCE_ROLL_BACK config flag for test isolation.
+    """
+    session = get_async_sessionmaker(read_only)()
+    try:
+        yield session
+        if config.DB_FORCE_ROLL_BACK or read_only:
+            await session.rollback()
+        else:
+            await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
+
+# ----- Cross-process locks ----- #
+def _try_advisory_lock(conn: Connection, namespace: int, key: str) -> bool:
+    return bool(
+        conn.execute(
+            text("SELECT pg_try_advisory_xact_lock(:namespace, hashtext(:key))"),
+            {"namespace": namespace, "key": key},
+        ).scalar()
+    )
+
+
+@asynccontextmanager
+async def advisory_lock(
+    namespace: int, key: str, poll_s: float = 0.1
+) -> AsyncGenerator[None, None]:
+    """Holds a Postgres advisory lock on (`namespace`, `key`) across every process.
+
+    A no-op on other databases (local SQLite runs a single process). The lock is
+    transaction-scoped: its connection stays checked out of the primary pool, idle
+    in a transaction, until the block ends, and returning it to the pool rolls back
+    and releases the lock even if the block was cancelled. Waiting polls
+    pg_try_advisory_xact_lock, so it ties up neither the event loop nor a thread.
+    """
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    conn = await asyncio.to_thread(engine.connect)
+    try:
+        while not await asyncio.to_thread(_try_advisory_lock, conn, namespace, key):
+            await asyncio.sleep(poll_s)
+        yield
+    finally:
+        await asyncio.to_thread(conn.close)
@@ -0,0 +1,3 @@
+from .weekly import run_weekly_reports
+
+__all__ = ["run_weekly_reports"]
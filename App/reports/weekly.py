@@ -0,0 +1,323 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import func, select
+
+from App.database import (
+    FoodEntry,
+    get_db_session,
+    local_day,
+    local_days_utc,
+    timezone_groups,
+)
+from App.MyAgent.utils.charts import render_chart_task
+
+# Private: not under exports/, which the API serves to anyone at /exports. Users get
+# their own report through the Telegram bot's /report command (see load_latest_report).
+REPORTS_DIR = "reports"
+
+METRICS = ("calories", "protein_g", "fat_g", "carbs_g")
+DAYS_PER_WEEK = 7
+
+
+def last_full_week(today: Optional[date] = None) -> date:
+    """Returns the Monday of the last complete Monday–Sunday week."""
+    today = today or datetime.now(timezone.utc).date()
+    return today - timedelta(days=today.weekday() + DAYS_PER_WEEK)
+
+
+# -------------------------------------------
+# AGGREGATION (single grouped query + vectorized stats)
+# -------------------------------------------
+
+
+def fetch_weekly_aggregates(week_start: date) -> Dict[str, np.ndarray]:
+    """Loads per-user, per-day macro sums for one week, grouped in SQL.
+
+    Days are local days in each user's time zone (the same buckets as the charts):
+    one GROUP BY query per time zone in use.
+
+    Returns:
+        Dict with `user_ids` (n,), `daily` (n, 7, 4) macro sums in METRICS order
+        and `counts` (n, 7) entries per day. Only users with entries that week are included.
+    """
+    week_end = week_start + timedelta(days=DAYS_PER_WEEK - 1)
+    rows = []
+    with get_db_session(read_only=True) as session:
+        for tz_name, users in timezone_groups(session):
+            start_utc, end_utc = local_days_utc(week_start, week_end, tz_name)
+            day = local_day(session, tz_name, start_utc, end_utc)
+            stmt = (
+                select(
+                    FoodEntry.user_id,
+                    day.label("day"),
+                    *(func.sum(getattr(FoodEntry, m)) for m in METRICS),
+                    func.count(FoodEntry.id),
+                )
+                .where(
+                    users,
+                    FoodEntry.created_at >= start_utc,
+                    FoodEntry.created_at < end_utc,
+                )
+                .group_by(FoodEntry.user_id, day)
+            )
+            rows.extend(session.execute(stmt).all())
+
+    return build_weekly_cube(rows, week_start)
+
+
+def _as_date(value: Any) -> date:
+    # SQLite returns the local day as a string, Postgres as a date
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def build_weekly_cube(rows: List[Any], week_start: date) -> Dict[str, np.ndarray]:
+    """Turns (user_id, day, *metrics, count) rows into dense numpy arrays."""
+    if not rows:
+        return {
+            "user_ids": np.zeros(0, dtype=np.int64),
+            "daily": np.zeros((0, DAYS_PER_WEEK, len(METRICS))),
+            "counts": np.zeros((0, DAYS_PER_WEEK), dtype=np.int64),
+        }
+
+    user_col = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    day_col = np.fromiter(
+        ((_as_date(r[1]) - week_start).days for r in rows),
+        dtype=np.int64,
+        count=len(rows),
+    )
+    metric_cols = np.array([r[2 : 2 + len(METRICS)] for r in rows], dtype=float)
+    count_col = np.fromiter((r[-1] for r in rows), dtype=np.int64, count=len(rows))
+
+    user_ids, user_index = np.unique(user_col, return_inverse=True)
+    daily = np.zeros((len(user_ids), DAYS_PER_WEEK, len(METRICS)))
+    counts = np.zeros((len(user_ids), DAYS_PER_WEEK), dtype=np.int64)
+    # Rows are unique per (user, day), so plain fancy-index assignment is enough
+    daily[user_index, day_col] = metric_cols
+    counts[user_index, day_col] = count_col
+
+    return {"user_ids": user_ids, "daily": daily, "counts": counts}
+
+
+def compute_weekly_stats(cube: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Computes every user's weekly statistics at once from the aggregate cube."""
+    daily, counts = cube["daily"], cube["counts"]
+    days_logged = (counts > 0).sum(axis=1)
+    totals = daily.sum(axis=1)
+    # Average over days the user actually logged, so skipped days don't drag it to zero
+    daily_average = totals / np.maximum(days_logged, 1)[:, None]
+
+    return {
+        "totals": np.round(totals, 1),
+        "daily_average": np.round(daily_average, 1),
+        "days_logged": days_logged,
+        "entries": counts.sum(axis=1),
+        "peak_day": daily[:, :, 0].argmax(axis=1),
+    }
+
+
+# -------------------------------------------
+# REPORT PIPELINE
+# -------------------------------------------
+
+
+def run_weekly_reports(
+    week_start: Optional[date] = None,
+    workers: Optional[int] = None,
+    render_charts: bool = True,
+) -> Dict[str, Any]:
+    """Builds the weekly summary (JSON) and calorie chart (PNG) for every active user.
+
+    Aggregation is one grouped query plus vectorized numpy stats; chart
+    rendering is spread across a process pool.
+
+    Returns:
+        Dict with the output directory, user count and timings in seconds.
+    """
+    week_start = week_start or last_full_week()
+    output_dir = os.path.join(REPORTS_DIR, week_start.isoformat())
+    os.makedirs(output_dir, exist_ok=True)
+
+    started = time.perf_counter()
+    cube = fetch_weekly_aggregates(week_start)
+    query_done = time.perf_counter()
+
+    stats = compute_weekly_stats(cube)
+    chart_tasks = write_summaries(cube, stats, week_start, output_dir, render_charts)
+    summaries_done = time.perf_counter()
+
+    render_charts_in_pool(chart_tasks, workers)
+    finished = time.perf_counter()
+
+    result = {
+        "output_dir": output_dir,
+        "users": int(len(cube["user_ids"])),
+        "query_s": round(query_done - started, 3),
+        "summaries_s": round(summaries_done - query_done, 3),
+        "charts_s": round(finished - summaries_done, 3),
+        "total_s": round(finished - started, 3),
+    }
+    print(f"📊 Weekly reports for {week_start}: {result}")
+    return result
+
+
+def write_summaries(
+    cube: Dict[str, np.ndarray],
+    stats: Dict[str, np.ndarray],
+    week_start: date,
+    output_dir: str,
+    render_charts: bool = True,
+) -> List[Dict[str, Any]]:
+    """Writes one summary JSON per user and returns the chart render tasks."""
+    dates = [week_start + timedelta(days=i) for i in range(DAYS_PER_WEEK)]
+    week_end = dates[-1]
+    calories = np.round(cube["daily"][:, :, 0], 1).tolist()
+    totals = stats["totals"].tolist()
+    averages = stats["daily_average"].tolist()
+
+    chart_tasks = []
+    for i, user_id in enumerate(cube["user_ids"].tolist()):
+        chart_path = os.path.join(output_dir, f"user_{user_id}_calories.png")
+        summary = {
+            "user_id": user_id,
+            "week_start": week_start.isoformat(),
+            "week_end": week_end.isoformat(),
+            "entries": int(stats["entries"][i]),
+            "days_logged": int(stats["days_logged"][i]),
+            "totals": dict(zip(METRICS, totals[i])),
+            "daily_average": dict(zip(METRICS, averages[i])),
+            "peak_day": dates[int(stats["peak_day"][i])].isoformat(),
+            "daily_calories": dict(zip((d.isoformat() for d in dates), calories[i])),
+            "chart": chart_path if render_charts else None,
+        }
+        with open(
+            os.path.join(output_dir, f"user_{user_id}.json"), "w", encoding="utf-8"
+        ) as f:
+            json.dump(summary, f)
+
+        if render_charts:
+            chart_tasks.append(
+                {
+                    "dates": dates,
+                    "values": calories[i],
+                    "metric": "calories",
+                    "file_path": chart_path,
+                    "title": f"Calories (kcal) — Week of {week_start.isoformat()}",
+                }
+            )
+
+    return chart_tasks
+
+
+def load_latest_report(user_id: int) -> Optional[Dict[str, Any]]:
+    """The user's most recent weekly summary (see write_summaries), or None."""
+    if not os.path.isdir(REPORTS_DIR):
+        return None
+    # Week directories are ISO dates, so name order is date order
+    for week in sorted(os.listdir(REPORTS_DIR), reverse=True):
+        path = os.path.join(REPORTS_DIR, week, f"user_{user_id}.json")
+        if os.path.isfile(path):
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+    return None
+
+
+def render_charts_in_pool(
+    chart_tasks: List[Dict[str, Any]], workers: Optional[int] = None
+) -> List[str]:
+    """Renders chart tasks across a process pool (matplotlib is CPU-bound and not thread-safe)."""
+    if not chart_tasks:
+        return []
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return [render_chart_task(task) for task in chart_tasks]
+
+    chunksize = max(1, len(chart_tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(render_chart_task, chart_tasks, chunksize=chunksize))
+
+
+# -------------------------------------------
+# BENCHMARK
+# -------------------------------------------
+
+
+def benchmark(
+    n_users: int = 10_000, n_charts: int = 500, workers: Optional[int] = None
+) -> Dict[str, float]:
+    """Measures pipeline throughput on synthetic aggregates (no database needed).
+
+    All `n_users` go through stats and summary writing; `n_charts` of them are
+    rendered to measure chart throughput, which dominates the pipeline cost.
+    """
+    rng = np.random.default_rng(42)
+    week_start = last_full_week()
+    rows = [
+        (user_id, week_start + timedelta(days=d), *rng.uniform(0, 900, 4), 3)
+        for user_id in range(1, n_users + 1)
+        for d in range(DAYS_PER_WEEK)
+        if rng.random() < 0.8
+    ]
+    # Synthetic output: a throwaway directory, never the real reports
+    output_dir = tempfile.mkdtemp(prefix="weekly_reports_")
+
+    started = time.perf_counter()
+    cube = build_weekly_cube(rows, week_start)
+    stats = compute_weekly_stats(cube)
+    stats_done = time.perf_counter()
+    chart_tasks = write_summaries(cube, stats, week_start, output_dir)
+    summaries_done = time.perf_counter()
+    render_charts_in_pool(chart_tasks[:n_charts], workers)
+    charts_done = time.perf_counter()
+
+    results = {
+        "users": n_users,
+        "stats_users_per_s": round(n_users / max(stats_done - started, 1e-9)),
+        "summaries_users_per_s": round(
+            n_users / max(summaries_done - stats_done, 1e-9)
+        ),
+        "charts_per_s": round(
+            min(n_charts, len(chart_tasks)) / max(charts_done - summaries_done, 1e-9),
+            1,
+        ),
+    }
+    print(f"⏱️ Weekly report benchmark: {results}")
+    return results
+
+
+def run_reports_cli(argv: List[str]) -> None:
+    """Entry point for `python main.py report [options]` (e.g. from cron every Monday)."""
+    parser = argparse.ArgumentParser(
+        prog="main.py report",
+        description="Generate weekly nutrition reports for every active user.",
+    )
+    parser.add_argument(
+        "--week-start",
+        type=date.fromisoformat,
+        help="Monday of the week to report (default: last complete week)",
+    )
+    parser.add_argument("--workers", type=int, help="Chart rendering processes")
+    parser.add_argument("--no-charts", action="store_true")
+    parser.add_argument(
+        "--benchmark",
+        type=int,
+        metavar="USERS",
+        help="Run the synthetic throughput benchmark instead",
+    )
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        benchmark(n_users=args.benchmark, workers=args.workers)
+    else:
+        run_weekly_reports(
+            week_start=args.week_start,
+            workers=args.workers,
+            render_charts=not args.no_charts,
+        )
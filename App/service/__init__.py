@@ -1,3 +1,3 @@
-from .agent_service import AgentResponse, invoke_agent
+from .agent_service import AgentResponse, ainvoke_agent, invoke_agent
 
-__all__ = ["invoke_agent", "AgentResponse"]
+__all__ = ["invoke_agent", "ainvoke_agent", "AgentResponse"]
@@ -1,37 +1,67 @@
 import os
 import re
 from dataclasses import dataclass, field
-from typing import cast
+from typing import TYPE_CHECKING, cast
 
-from langchain_core.messages import HumanMessage
-from langchain_core.runnables import RunnableConfig
-
-from App.MyAgent.graph import graph
-from App.MyAgent.utils.state import INITIAL_SYSTEM_PROMPT, AgentState
+if TYPE_CHECKING:
+    from App.MyAgent.utils.state import AgentState
 
 _FILE_PATTERN = re.compile(r"exports[\\/][\w\-]+\.(?:png|csv)")
+_JOB_PATTERN = re.compile(r"^Job #(\d+) queued")
 
 
 @dataclass
 class AgentResponse:
     text: str
     file_paths: list[str] = field(default_factory=list)
+    # Artifacts still being built (see App.service.jobs), delivered when ready
+    job_ids: list[int] = field(default_factory=list)
 
 
-def invoke_agent(user_input: str, thread_id: str) -> AgentResponse:
-    """Invoke the LangGraph agent and return the final response."""
-    config = RunnableConfig(configurable={"thread_id": thread_id})
+def get_agent_graph():
+    """Imports and compiles the agent graph on first use (tools, models, checkpointer)."""
+    from App.MyAgent.graph import get_graph
+
+    return get_graph()
+
+
+def get_async_agent_graph():
+    """Same graph compiled with the async checkpointer, for ainvoke_agent."""
+    from App.MyAgent.graph import get_async_graph
+
+    return get_async_graph()
+
+
+def _turn_messages(user_input: str, state_values: dict) -> list:
+    """Messages to send for this turn; also starts speculative USDA searches."""
+    # Lazy imports: langgraph/langchain are only loaded once the agent is first used
+    from langchain_core.messages import HumanMessage
+
+    from App.config import config as app_config
+    from App.MyAgent.utils.state import INITIAL_SYSTEM_PROMPT
+    from App.service.speculation import speculate_food_search
 
-    # Inject system prompt on first message of a thread
-    existing_state = graph.get_state(config)
     messages: list = []
 
-    if not existing_state.values.get("messages"):
+    # Inject system prompt on first message of a thread
+    if not state_values.get("messages"):
         messages.append(INITIAL_SYSTEM_PROMPT)
 
+    # Start likely USDA searches now so they run while the router classifies the message
+    # (a pending confirmation goes straight to the food agent: nothing new to search)
+    if (
+        app_config.USDA_SPECULATIVE_SEARCH
+        and state_values.get("food_record_state") != "awaiting_confirmation"
+    ):
+        speculate_food_search(user_input)
+
     messages.append(HumanMessage(content=user_input))
+    return messages
 
-    result = graph.invoke(cast(AgentState, {"messages": messages}), config=config)
+
+def _agent_response(result: dict, history_length: int) -> AgentResponse:
+    """Builds the response from the final state of one agent turn."""
+    from langchain_core.messages import ToolMessage
 
     last_message = result["messages"][-1]
     text = last_message.content
@@ -43,4 +73,48 @@ def invoke_agent(user_input: str, thread_id: str) -> AgentResponse:
         if os.path.isfile(normalized):
             file_paths.append(normalized)
 
-    return AgentResponse(text=text, file_paths=file_paths)
+    # Jobs queued by this turn's tool calls
+    job_ids = [
+        int(match.group(1))
+        for message in result["messages"][history_length:]
+        if isinstance(message, ToolMessage)
+        and (match := _JOB_PATTERN.match(str(message.content)))
+    ]
+
+    return AgentResponse(text=text, file_paths=file_paths, job_ids=job_ids)
+
+
+def invoke_agent(user_input: str, thread_id: str) -> AgentResponse:
+    """Invoke the LangGraph agent and return the final response (CLI, scripts)."""
+    from langchain_core.runnables import RunnableConfig
+
+    config = RunnableConfig(configurable={"thread_id": thread_id})
+    graph = get_agent_graph()
+
+    existing_state = graph.get_state(config)
+    messages = _turn_messages(user_input, existing_state.values)
+    history_length = len(existing_state.values.get("messages", []))
+
+    result = graph.invoke(cast("AgentState", {"messages": messages}), config=config)
+    return _agent_response(result, history_length)
+
+
+async def ainvoke_agent(user_input: str, thread_id: str) -> AgentResponse:
+    """Async invoke_agent for the API server and the Telegram bot.
+
+    Runs the graph with ainvoke on the caller's event loop, so the DB tools with a
+    native coroutine (see App.MyAgent.utils.tools) await their queries there.
+    """
+    from langchain_core.runnables import RunnableConfig
+
+    config = RunnableConfig(configurable={"thread_id": thread_id})
+    graph = get_async_agent_graph()
+
+    existing_state = await graph.aget_state(config)
+    messages = _turn_messages(user_input, existing_state.values)
+    history_length = len(existing_state.values.get("messages", []))
+
+    result = await graph.ainvoke(
+        cast("AgentState", {"messages": messages}), config=config
+    )
+    return _agent_response(result, history_length)
@@ -0,0 +1,387 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import ColumnElement, func, select, update
+
+from App.config import config
+from App.database import Job, get_db_session
+
+logger = logging.getLogger(__name__)
+
+# Slow artifact work (CSV exports, chart rendering) runs as jobs: the agent replies
+# with a job handle at once, and a pool of worker threads renders the artifact and
+# hands it to the delivery listeners (Telegram, CLI). The jobs table is the queue:
+# every process polls it, so no broker is needed and jobs survive restarts.
+
+# Job kind → handler taking the job params and returning the artifact path. A
+# ValueError fails the job with its message (shown to the user).
+JobHandler = Callable[[Dict[str, Any]], str]
+# Called with job_dict() once a job is done or failed
+JobListener = Callable[[Dict[str, Any]], None]
+# Given the Job.thread_id column, the SQL condition selecting a listener's threads
+ThreadFilter = Callable[[Any], ColumnElement[bool]]
+
+_HANDLERS: Dict[str, JobHandler] = {}
+
+STATUSES = ("queued", "running", "done", "failed")
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """Registers the decorated function as the handler of `kind` jobs."""
+
+    def register(handler: JobHandler) -> JobHandler:
+        _HANDLERS[kind] = handler
+        return handler
+
+    return register
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def job_dict(job: Job) -> Dict[str, Any]:
+    """API/listener representation of a job."""
+
+    def iso(value: Optional[datetime]) -> Optional[str]:
+        return value.isoformat() if value else None
+
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "user_id": job.user_id,
+        "thread_id": job.thread_id,
+        "params": job.params,
+        "attempts": job.attempts,
+        "result_path": job.result_path,
+        "file_url": (
+            f"/exports/{os.path.basename(job.result_path)}" if job.result_path else None
+        ),
+        "error": job.error,
+        "created_at": iso(job.created_at),
+        "started_at": iso(job.started_at),
+        "heartbeat_at": iso(job.heartbeat_at),
+        "finished_at": iso(job.finished_at),
+        "delivered_at": iso(job.delivered_at),
+        "delivery_attempts": job.delivery_attempts,
+        "delivery_error": job.delivery_error,
+    }
+
+
+def submit_job(
+    kind: str, params: Dict[str, Any], user_id: int, thread_id: Optional[str]
+) -> int:
+    """Queues a job and returns its id."""
+    if kind not in _HANDLERS:
+        raise ValueError(f"Unknown job kind {kind!r}")
+    with get_db_session() as session:
+        job = Job(kind=kind, user_id=user_id, thread_id=thread_id, params=params)
+        session.add(job)
+        session.flush()
+        job_id = job.id
+    # Committed: a local worker can pick it up without waiting for the next poll
+    get_job_queue().wake()
+    return job_id
+
+
+def job_counts(session) -> Dict[str, int]:
+    """Number of jobs per status."""
+    rows = session.execute(select(Job.status, func.count()).group_by(Job.status))
+    return {status: 0 for status in STATUSES} | dict(rows.all())
+
+
+# -------------------------------------------
+# WORKER POOL
+# -------------------------------------------
+
+
+class JobQueue:
+    """Worker threads that run the queued jobs of the jobs table.
+
+    Several processes (API workers, the CLI) can each run a queue on the same
+    table: a job is claimed with a conditional UPDATE, so one worker at a time runs
+    it. While it runs, its worker refreshes the job's heartbeat. A job whose
+    heartbeat is older than `timeout_s` (its process died) is queued again, up to
+    `max_attempts` runs. That run starts over, so handlers must be safe to repeat.
+
+    Finished jobs are delivered by a process with a listener for their thread, not
+    necessarily the one that ran them. A job is marked delivered only once its
+    listener returns; a failed send is recorded and retried on a later pass, up to
+    `max_attempts` sends. Delivery is at least once: a send that fails after the
+    artifact went out (e.g. a timeout) sends it again.
+
+    Args:
+        workers: Number of worker threads.
+        poll_interval_s: Idle workers look for new jobs this often.
+        timeout_s: Heartbeat age after which a running job is considered abandoned.
+        max_attempts: Runs of a job before it is marked failed, and sends of its
+            result before delivery is given up.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        poll_interval_s: float = 2.0,
+        timeout_s: float = 600.0,
+        max_attempts: int = 3,
+    ) -> None:
+        self.workers = workers
+        self.poll_interval_s = poll_interval_s
+        self.timeout_s = timeout_s
+        self.max_attempts = max_attempts
+        self._threads: List[threading.Thread] = []
+        self._listeners: List[Tuple[ThreadFilter, JobListener]] = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        # Several heartbeats per timeout, so one slow DB write doesn't requeue a job
+        self.heartbeat_interval_s = timeout_s / 4
+        # Abandoned jobs are older than timeout_s: one worker checks now and then
+        self.requeue_interval_s = max(timeout_s / 10, 30.0)
+        self._next_requeue = 0.0
+        self.processed = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+    def add_listener(self, listener: JobListener, owns: ThreadFilter) -> None:
+        """Delivers the finished jobs of the threads `owns` selects to `listener`.
+
+        `owns` builds a SQL condition on Job.thread_id (e.g.
+        `lambda thread_id: thread_id == "cli-1"`), so each listener only reads its
+        own jobs. Jobs of threads no listener owns (e.g. web clients, which poll
+        GET /api/jobs/{id}) are left undelivered.
+        """
+        self._listeners.append((owns, listener))
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        # The handlers are registered where the tools are defined
+        import App.MyAgent.utils.tools  # noqa: F401
+
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"job-worker-{n}", daemon=True)
+            for n in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info("Job queue started with %s workers", self.workers)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stops the workers once their current job is finished."""
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self.running,
+                "workers": self.workers,
+                "processed": self.processed,
+                "failed": self.failed,
+            }
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._requeue_abandoned()
+                self._deliver_finished()
+                job_id = self._claim()
+                if job_id is not None:
+                    self._run(job_id)
+                    continue
+            except Exception:
+                logger.exception("Job worker error")
+            self._wake.wait(self.poll_interval_s)
+            self._wake.clear()
+
+    def _claim(self) -> Optional[int]:
+        """Marks the oldest queued job as running and returns its id, if any."""
+        with get_db_session() as session:
+            # SKIP LOCKED: concurrent workers on Postgres pick different jobs
+            job_id = session.execute(
+                select(Job.id)
+                .where(Job.status == "queued")
+                .order_by(Job.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            ).scalar()
+            if job_id is None:
+                return None
+            # Conditional: elsewhere (SQLite) another worker may have claimed it
+            now = _utcnow()
+            claimed = session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == "queued")
+                .values(
+                    status="running",
+                    attempts=Job.attempts + 1,
+                    started_at=now,
+                    heartbeat_at=now,
+                )
+            ).rowcount
+        return job_id if claimed else None
+
+    def _run(self, job_id: int) -> None:
+        with get_db_session() as session:
+            job = session.get(Job, job_id)
+            kind, params, attempt = job.kind, dict(job.params), job.attempts
+
+        values: Dict[str, Any]
+        stop_heartbeat = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat,
+            args=(job_id, attempt, stop_heartbeat),
+            name=f"job-{job_id}-heartbeat",
+            daemon=True,
+        )
+        heartbeat.start()
+        try:
+            path = _HANDLERS[kind](params)
+            values = {"status": "done", "result_path": path}
+            logger.info("Job %s (%s) done: %s", job_id, kind, path)
+        except ValueError as e:
+            values = {"status": "failed", "error": str(e)}
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job_id, kind)
+            values = {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+        finally:
+            stop_heartbeat.set()
+            heartbeat.join()
+
+        with self._lock:
+            self.processed += 1
+            self.failed += values["status"] == "failed"
+        with get_db_session() as session:
+            # Unless it was requeued meanwhile (timed out) and picked up again
+            session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.attempts == attempt)
+                .values(finished_at=_utcnow(), **values)
+            )
+        # Delivered on the next loop turn, without waiting for the poll
+        self._wake.set()
+
+    def _heartbeat(self, job_id: int, attempt: int, stop: threading.Event) -> None:
+        """Keeps a running job's heartbeat fresh until `stop` is set."""
+        while not stop.wait(self.heartbeat_interval_s):
+            try:
+                with get_db_session() as session:
+                    session.execute(
+                        update(Job)
+                        .where(
+                            Job.id == job_id,
+                            Job.attempts == attempt,
+                            Job.status == "running",
+                        )
+                        .values(heartbeat_at=_utcnow())
+                    )
+            except Exception:
+                logger.exception("Heartbeat of job %s failed", job_id)
+
+    def _requeue_abandoned(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_requeue:
+                return
+            self._next_requeue = now + self.requeue_interval_s
+        cutoff = _utcnow() - timedelta(seconds=self.timeout_s)
+        # Jobs claimed before heartbeats existed only have started_at
+        last_seen = func.coalesce(Job.heartbeat_at, Job.started_at)
+        abandoned = (Job.status == "running", last_seen < cutoff)
+        with get_db_session() as session:
+            session.execute(
+                update(Job)
+                .where(*abandoned, Job.attempts < self.max_attempts)
+                .values(status="queued")
+            )
+            session.execute(
+                update(Job)
+                .where(*abandoned, Job.attempts >= self.max_attempts)
+                .values(
+                    status="failed",
+                    error=f"Timed out after {self.max_attempts} attempts",
+                    finished_at=_utcnow(),
+                )
+            )
+
+    def _deliver_finished(self) -> None:
+        """Hands the recently finished, undelivered jobs to their listeners."""
+        since = _utcnow() - timedelta(seconds=self.timeout_s)
+        for owns, listener in self._listeners:
+            # Filtered in SQL: unowned jobs (web clients) never crowd out the page
+            with get_db_session() as session:
+                jobs = session.scalars(
+                    select(Job)
+                    .where(
+                        Job.status.in_(("done", "failed")),
+                        Job.delivered_at.is_(None),
+                        Job.delivery_attempts < self.max_attempts,
+                        Job.finished_at >= since,
+                        owns(Job.thread_id),
+                    )
+                    .order_by(Job.id)
+                    .limit(20)
+                ).all()
+                pending = [job_dict(job) for job in jobs]
+
+            for job in pending:
+                self._deliver(job, listener)
+
+    def _deliver(self, job: Dict[str, Any], listener: JobListener) -> None:
+        """Sends one job's result; it stays undelivered (and is retried) if that fails."""
+        # Taken first (delivered_at set) so that two workers never send it at once
+        with get_db_session() as session:
+            taken = session.execute(
+                update(Job)
+                .where(
+                    Job.id == job["id"],
+                    Job.delivered_at.is_(None),
+                    Job.delivery_attempts == job["delivery_attempts"],
+                )
+                .values(
+                    delivered_at=_utcnow(), delivery_attempts=Job.delivery_attempts + 1
+                )
+            ).rowcount
+        if not taken:
+            return
+        try:
+            listener(job)
+        except Exception as e:
+            logger.exception("Delivery of job %s failed", job["id"])
+            # Released for a later pass, until delivery_attempts reaches max_attempts
+            with get_db_session() as session:
+                session.execute(
+                    update(Job)
+                    .where(Job.id == job["id"])
+                    .values(
+                        delivered_at=None, delivery_error=f"{type(e).__name__}: {e}"
+                    )
+                )
+
+
+# lru_cache so every caller in the process shares one pool
+@lru_cache()
+def get_job_queue() -> JobQueue:
+    return JobQueue(
+        workers=config.JOB_WORKERS,
+        poll_interval_s=config.JOB_POLL_INTERVAL_S,
+        timeout_s=config.JOB_TIMEOUT_S,
+        max_attempts=config.JOB_MAX_ATTEMPTS,
+    )
@@ -0,0 +1,70 @@
+import re
+from typing import List
+
+# Words that make a message look like a food log ("I had 2 eggs for breakfast")
+_LOG_HINTS = re.compile(
+    r"\b(ate|eaten|eat|had|have|drank|drink|log|logged|breakfast|lunch|dinner|snack)\b",
+    re.IGNORECASE,
+)
+# ...and openings of data review / chart / chat requests, which should not be speculated on
+_NOT_A_LOG = re.compile(
+    r"^\s*(how|what|when|why|which|show|chart|plot|graph|export|can|could|should|is|are|do|does)\b",
+    re.IGNORECASE,
+)
+
+_ITEM_SEPARATORS = re.compile(r",|;|\+|&|\band\b|\bwith\b|\bplus\b", re.IGNORECASE)
+_LEADING_FILLER = re.compile(
+    r"^(?:(?:i|i've|i'd|just|also|then|today|yesterday|for|my|usual|"
+    r"ate|eaten|eat|had|have|drank|drink|log|logged|please|"
+    r"a|an|some|the|of|few|couple|half|one|two|three|four|five|six)\s+)+",
+    re.IGNORECASE,
+)
+_QUANTITY = re.compile(
+    r"^\d+(?:[.,/]\d+)?\s*(?:g|gr|grams?|kg|ml|l|oz|lbs?|cups?|tbsp|tsp|slices?|"
+    r"pieces?|bowls?|glass(?:es)?|servings?)?\s+(?:of\s+)?",
+    re.IGNORECASE,
+)
+_TRAILING_CONTEXT = re.compile(
+    r"\s+(?:for|at|this|today|yesterday|in the)\b.*$", re.IGNORECASE
+)
+
+MAX_CANDIDATES = 4
+
+
+def looks_like_food_log(text: str) -> bool:
+    """Cheap pre-router guess: True when the message probably logs food."""
+    return bool(_LOG_HINTS.search(text)) and not _NOT_A_LOG.match(text)
+
+
+def extract_food_candidates(text: str) -> List[str]:
+    """Guesses the food names the food agent will search for.
+
+    "I ate 2 scrambled eggs and a raspberry smoothie for breakfast"
+    → ["scrambled eggs", "raspberry smoothie"]
+    """
+    candidates: List[str] = []
+    for part in _ITEM_SEPARATORS.split(text):
+        name = part.strip(" .!?\n\t").lower()
+        name = _TRAILING_CONTEXT.sub("", name)
+        # Fillers and quantities can interleave ("I had 2 cups of rice")
+        for _ in range(3):
+            name = _QUANTITY.sub("", _LEADING_FILLER.sub("", name)).strip()
+        if name and len(name) > 2 and name not in candidates:
+            candidates.append(name)
+    return candidates[:MAX_CANDIDATES]
+
+
+def speculate_food_search(user_input: str) -> List[str]:
+    """Starts USDA searches for the likely foods of a message while the router runs.
+
+    Returns the speculated queries (empty when the message doesn't look like a food log).
+    """
+    if not looks_like_food_log(user_input):
+        return []
+    candidates = extract_food_candidates(user_input)
+    if candidates:
+        from App.MyAgent.clients.usda_api import get_usda_client
+
+        get_usda_client().speculate_search(candidates)
+        print(f"🔮 Speculative USDA search: {candidates}")
+    return candidates
@@ -0,0 +1,175 @@
+import logging
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WarmupState:
+    enabled: bool = False
+    started: bool = False
+    done: bool = False
+    errors: Dict[str, str] = field(default_factory=dict)
+    steps: Dict[str, float] = field(default_factory=dict)  # step name → seconds
+
+    @property
+    def ready(self) -> bool:
+        """Ready once warm-up finished, or immediately when warm-up is disabled."""
+        return self.done or not self.enabled
+
+    def as_dict(self) -> dict:
+        return {
+            "ready": self.ready,
+            "warmup_enabled": self.enabled,
+            "warmup_started": self.started,
+            "steps_s": self.steps,
+            "errors": self.errors,
+        }
+
+
+warmup_state = WarmupState()
+
+
+# -------------------------------------------
+# WARM-UP STEPS (each one is what the first request would otherwise pay)
+# -------------------------------------------
+
+
+def _warm_graph() -> None:
+    # Imports tools/models/subgraphs and compiles the main graph with its checkpointer
+    from App.service.agent_service import get_agent_graph
+
+    get_agent_graph()
+
+
+def _warm_db_pool() -> None:
+    from sqlalchemy import text
+
+    from App.config import config
+    from App.database.session import engine, read_engine
+
+    for target in {engine, read_engine}:
+        # Hold pool_size connections at once so they are all opened, then return them idle
+        connections = [target.connect() for _ in range(config.DB_POOL_SIZE)]
+        try:
+            for conn in connections:
+                conn.execute(text("SELECT 1"))
+        finally:
+            for conn in connections:
+                conn.close()
+
+
+def _warm_llm() -> None:
+    from App.MyAgent.clients.model import get_instructor_client
+    from App.MyAgent.utils.chart_subgraph import get_chart_model
+    from App.MyAgent.utils.data_review_subgraph import get_data_review_model
+    from App.MyAgent.utils.nodes import get_chatbot_model
+    from App.MyAgent.utils.subgraph import get_food_model
+
+    get_instructor_client()
+    for factory in (get_food_model, get_chart_model, get_data_review_model):
+        factory()
+    # Free endpoint: opens the TLS connection the first LLM call would otherwise set up
+    get_chatbot_model().root_client.models.list()
+
+
+def _warm_clients() -> None:
+    from App.MyAgent.clients.usda_api import get_usda_client
+    from App.MyAgent.utils.charts import _pyplot
+
+    get_usda_client()
+    _pyplot()
+
+
+def _warm_usda_portions() -> None:
+    from datetime import datetime, timedelta, timezone
+
+    from App.config import config
+    from App.database import get_db_session, most_logged_fdc_ids
+    from App.MyAgent.clients.usda_api import get_usda_client
+
+    client = get_usda_client()
+    # The cache file is shared: the first API worker to start prefetches for all
+    if not client.cache.claim("warmup", "usda_portions", ttl_s=3600):
+        logger.info("USDA portion prefetch: done by another worker within the hour")
+        return
+    with get_db_session(read_only=True) as session:
+        fdc_ids = most_logged_fdc_ids(
+            session,
+            limit=config.USDA_PREFETCH_TOP_N,
+            since=datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=90),
+        )
+    # Fetching runs on the client's prefetch threads; readiness doesn't wait for it
+    stats = client.prefetch_portions(fdc_ids)
+    logger.info("USDA portion prefetch: %s", stats)
+
+
+WARMUP_STEPS: Dict[str, Callable[[], None]] = {
+    "graph": _warm_graph,
+    "db_pool": _warm_db_pool,
+    "llm": _warm_llm,
+    "clients": _warm_clients,
+    "usda_portions": _warm_usda_portions,
+}
+
+
+def run_warmup(state: Optional[WarmupState] = None) -> WarmupState:
+    """Runs every warm-up step, recording timings. A failing step is logged, not fatal."""
+    state = state or warmup_state
+    state.started = True
+    for name, step in WARMUP_STEPS.items():
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            logger.warning("Warm-up step %s failed: %s", name, e)
+            state.errors[name] = str(e)
+        state.steps[name] = round(time.perf_counter() - started, 3)
+    state.done = True
+    logger.info("Warm-up finished: %s", state.steps)
+    return state
+
+
+# -------------------------------------------
+# STARTUP BENCHMARK
+# -------------------------------------------
+
+
+def benchmark_startup(runs: int = 5) -> Dict[str, float]:
+    """Measures cold `import App.api` time (fresh interpreter per run) and warm-up step costs.
+
+    The warm-up step timings are the extra latency a first request pays when
+    warm-up is disabled.
+    """
+    code = (
+        "import time; t = time.perf_counter(); import App.api; "
+        "print(time.perf_counter() - t)"
+    )
+    import_times = [
+        float(
+            subprocess.run(
+                [sys.executable, "-c", code], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        )
+        for _ in range(runs)
+    ]
+
+    state = run_warmup(WarmupState(enabled=True))
+    results = {
+        "cold_import_api_s": round(statistics.median(import_times), 3),
+        **{f"first_request_{name}_s": t for name, t in state.steps.items()},
+        "first_request_total_s": round(sum(state.steps.values()), 3),
+    }
+    print(f"⏱️ Startup benchmark: {results}")
+    if state.errors:
+        print(f"⚠️ Steps with errors (timings include the failure): {state.errors}")
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_startup()
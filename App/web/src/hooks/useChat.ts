@@ -2,7 +2,7 @@
 
 import { useState, useCallback } from "react";
 import { Conversation, Message } from "@/lib/types";
-import { sendMessage } from "@/lib/api";
+import { sendMessage, waitForJob } from "@/lib/api";
 
 interface UseChatOptions {
   activeConversation: Conversation | null;
@@ -60,6 +60,24 @@ export function useChat({ activeConversation, updateConversation }: UseChatOptio
           updatedAt: Date.now(),
           messages: [...c.messages, assistantMessage],
         }));
+
+        // Exports and charts are built in the background: attach them when ready
+        for (const jobId of response.job_ids ?? []) {
+          waitForJob(jobId)
+            .then((job) => {
+              const update = (m: Message): Message =>
+                job.status === "done" && job.result_path
+                  ? { ...m, filePaths: [...m.filePaths, job.result_path] }
+                  : { ...m, content: `${m.content}\n\nCouldn't create the file: ${job.error}` };
+              updateConversation(threadId, (c) => ({
+                ...c,
+                messages: c.messages.map((m) =>
+                  m.id === assistantMessage.id ? update(m) : m
+                ),
+              }));
+            })
+            .catch(() => {});
+        }
       } catch (err) {
         const errorMessage: Message = {
           id: crypto.randomUUID(),
@@ -1,4 +1,4 @@
-import { ChatResponse } from "./types";
+import { ChatResponse, Job } from "./types";
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 
@@ -38,6 +38,19 @@ export async function sendMessage(
   }
 }
 
+// Polls a background job (CSV export, chart) until it is done or failed
+export async function waitForJob(jobId: number, intervalMs = 1500): Promise<Job> {
+  for (;;) {
+    const res = await fetch(`${API_URL}/api/jobs/${jobId}`);
+    if (!res.ok) {
+      throw new Error(`API error ${res.status}: ${res.statusText}`);
+    }
+    const job: Job = await res.json();
+    if (job.status === "done" || job.status === "failed") return job;
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+}
+
 export function getFileUrl(relativePath: string): string {
   const normalized = relativePath.replace(/\\/g, "/");
   return `${API_URL}/${normalized}`;
@@ -17,4 +17,12 @@ export interface Conversation {
 export interface ChatResponse {
   text: string;
   file_paths: string[];
+  job_ids: number[];
+}
+
+export interface Job {
+  id: number;
+  status: "queued" | "running" | "done" | "failed";
+  result_path: string | null;
+  error: string | null;
 }
@@ -0,0 +1,30 @@
+"""add import_key to food_entries
+
+Revision ID: 9b3f6c2a1e47
+Revises: 4d501275ea7d
+Create Date: 2026-10-19 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b3f6c2a1e47'
+down_revision: Union[str, Sequence[str], None] = '4d501275ea7d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('food_entries', sa.Column('import_key', sa.String(length=64), nullable=True))
+    op.create_index('uq_food_entries_user_import_key', 'food_entries', ['user_id', 'import_key'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_food_entries_user_import_key', table_name='food_entries')
+    op.drop_column('food_entries', 'import_key')
@@ -0,0 +1,120 @@
+"""partition food_entries by month
+
+Revision ID: a3c8e61f4d25
+Revises: f7b2d4a91c63
+Create Date: 2026-10-19 17:05:36.842197
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c8e61f4d25'
+down_revision: Union[str, Sequence[str], None] = 'f7b2d4a91c63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Months created past the current one; App.database.partitions keeps them coming
+MONTHS_AHEAD = 3
+
+SEARCH_INDEXES = (
+    "CREATE INDEX ix_food_entries_description_trgm ON food_entries "
+    "USING gin (food_description gin_trgm_ops)",
+    "CREATE INDEX ix_food_entries_description_tsv ON food_entries "
+    "USING gin (to_tsvector('english'::regconfig, food_description))",
+)
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _swap_indexes_sqlite() -> None:
+    op.drop_index('ix_food_entries_user_id', table_name='food_entries')
+    op.drop_index('uq_food_entries_user_import_key', table_name='food_entries')
+    op.create_index('ix_food_entries_user_created_at', 'food_entries', ['user_id', 'created_at'], unique=False)
+    op.create_index('uq_food_entries_user_import_key', 'food_entries', ['user_id', 'import_key', 'created_at'], unique=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        # No partitioning outside Postgres: only the new indexes
+        _swap_indexes_sqlite()
+        return
+
+    # The old heap table is copied into a partitioned one, then dropped
+    op.execute("ALTER TABLE food_entries RENAME TO food_entries_unpartitioned")
+    op.execute("ALTER INDEX food_entries_pkey RENAME TO food_entries_unpartitioned_pkey")
+    for index in (
+        "ix_food_entries_user_id",
+        "uq_food_entries_user_import_key",
+        "ix_food_entries_description_trgm",
+        "ix_food_entries_description_tsv",
+    ):
+        op.execute(f"DROP INDEX IF EXISTS {index}")
+
+    op.execute(
+        "CREATE TABLE food_entries "
+        "(LIKE food_entries_unpartitioned INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (created_at)"
+    )
+    # Keep the id sequence when the old table is dropped
+    op.execute("ALTER SEQUENCE food_entries_id_seq OWNED BY food_entries.id")
+    # Unique constraints of a partitioned table must include the partition key
+    op.execute("ALTER TABLE food_entries ADD PRIMARY KEY (id, created_at)")
+    op.create_index('ix_food_entries_user_created_at', 'food_entries', ['user_id', 'created_at'], unique=False)
+    op.create_index('uq_food_entries_user_import_key', 'food_entries', ['user_id', 'import_key', 'created_at'], unique=True)
+    for statement in SEARCH_INDEXES:
+        op.execute(statement)
+
+    # One partition per month from the oldest entry through MONTHS_AHEAD months ahead
+    current = datetime.now(timezone.utc).date().replace(day=1)
+    oldest = bind.execute(
+        sa.text("SELECT min(created_at) FROM food_entries_unpartitioned")
+    ).scalar()
+    month = min(oldest.date().replace(day=1), current) if oldest else current
+    while month <= _add_months(current, MONTHS_AHEAD):
+        following = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE food_entries_p{month:%Y_%m} PARTITION OF food_entries "
+            f"FOR VALUES FROM ('{month}') TO ('{following}')"
+        )
+        month = following
+    op.execute("CREATE TABLE food_entries_default PARTITION OF food_entries DEFAULT")
+
+    op.execute("INSERT INTO food_entries SELECT * FROM food_entries_unpartitioned")
+    op.execute("DROP TABLE food_entries_unpartitioned")
+    op.execute("ANALYZE food_entries")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        op.drop_index('uq_food_entries_user_import_key', table_name='food_entries')
+        op.drop_index('ix_food_entries_user_created_at', table_name='food_entries')
+        op.create_index('uq_food_entries_user_import_key', 'food_entries', ['user_id', 'import_key'], unique=True)
+        op.create_index('ix_food_entries_user_id', 'food_entries', ['user_id'], unique=False)
+        return
+
+    # Archived (detached) partitions are not copied back
+    op.execute("ALTER TABLE food_entries RENAME TO food_entries_partitioned")
+    op.execute(
+        "CREATE TABLE food_entries "
+        "(LIKE food_entries_partitioned INCLUDING DEFAULTS)"
+    )
+    op.execute("ALTER SEQUENCE food_entries_id_seq OWNED BY food_entries.id")
+    op.execute("INSERT INTO food_entries SELECT * FROM food_entries_partitioned")
+    op.execute("DROP TABLE food_entries_partitioned")
+    op.execute("ALTER TABLE food_entries ADD CONSTRAINT food_entries_pkey PRIMARY KEY (id)")
+    op.create_index('ix_food_entries_user_id', 'food_entries', ['user_id'], unique=False)
+    op.create_index('uq_food_entries_user_import_key', 'food_entries', ['user_id', 'import_key'], unique=True)
+    for statement in SEARCH_INDEXES:
+        op.execute(statement)
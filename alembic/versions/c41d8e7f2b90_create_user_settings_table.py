@@ -0,0 +1,32 @@
+"""create user_settings table
+
+Revision ID: c41d8e7f2b90
+Revises: 9b3f6c2a1e47
+Create Date: 2026-10-19 11:03:27.540916
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d8e7f2b90'
+down_revision: Union[str, Sequence[str], None] = '9b3f6c2a1e47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_settings',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('timezone', sa.String(length=64), nullable=False),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_settings')
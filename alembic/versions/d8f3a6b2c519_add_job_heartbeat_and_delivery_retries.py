@@ -0,0 +1,32 @@
+"""add job heartbeat and delivery retries
+
+Revision ID: d8f3a6b2c519
+Revises: b6e2f19c7a84
+Create Date: 2026-10-19 19:12:08.417263
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8f3a6b2c519'
+down_revision: Union[str, Sequence[str], None] = 'b6e2f19c7a84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('jobs', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+    op.add_column('jobs', sa.Column('delivery_attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('jobs', sa.Column('delivery_error', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('jobs', 'delivery_error')
+    op.drop_column('jobs', 'delivery_attempts')
+    op.drop_column('jobs', 'heartbeat_at')
@@ -0,0 +1,69 @@
+"""add food_description search indexes
+
+Revision ID: e5a9c3d17f28
+Revises: c41d8e7f2b90
+Create Date: 2026-10-19 11:48:02.913377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a9c3d17f28'
+down_revision: Union[str, Sequence[str], None] = 'c41d8e7f2b90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        # Trigram GIN serves ILIKE '%kw%' and the typo-tolerant word-similarity operator (<%)
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute(
+            "CREATE INDEX ix_food_entries_description_trgm ON food_entries "
+            "USING gin (food_description gin_trgm_ops)"
+        )
+        # Full-text index for stemmed matches ("burgers" → "burger")
+        op.execute(
+            "CREATE INDEX ix_food_entries_description_tsv ON food_entries "
+            "USING gin (to_tsvector('english'::regconfig, food_description))"
+        )
+    else:
+        # SQLite: external-content FTS5 table kept in sync by triggers
+        op.execute(
+            "CREATE VIRTUAL TABLE food_entries_fts USING fts5("
+            "food_description, content='food_entries', content_rowid='id', tokenize='trigram')"
+        )
+        op.execute(
+            "CREATE TRIGGER food_entries_fts_ai AFTER INSERT ON food_entries BEGIN "
+            "INSERT INTO food_entries_fts(rowid, food_description) "
+            "VALUES (new.id, new.food_description); END"
+        )
+        op.execute(
+            "CREATE TRIGGER food_entries_fts_ad AFTER DELETE ON food_entries BEGIN "
+            "INSERT INTO food_entries_fts(food_entries_fts, rowid, food_description) "
+            "VALUES ('delete', old.id, old.food_description); END"
+        )
+        op.execute(
+            "CREATE TRIGGER food_entries_fts_au AFTER UPDATE ON food_entries BEGIN "
+            "INSERT INTO food_entries_fts(food_entries_fts, rowid, food_description) "
+            "VALUES ('delete', old.id, old.food_description); "
+            "INSERT INTO food_entries_fts(rowid, food_description) "
+            "VALUES (new.id, new.food_description); END"
+        )
+        op.execute("INSERT INTO food_entries_fts(food_entries_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_food_entries_description_tsv")
+        op.execute("DROP INDEX IF EXISTS ix_food_entries_description_trgm")
+    else:
+        op.execute("DROP TRIGGER IF EXISTS food_entries_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS food_entries_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS food_entries_fts_ai")
+        op.execute("DROP TABLE IF EXISTS food_entries_fts")
@@ -0,0 +1,44 @@
+"""create recipes table
+
+Revision ID: f7b2d4a91c63
+Revises: e5a9c3d17f28
+Create Date: 2026-10-19 15:42:08.317264
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7b2d4a91c63'
+down_revision: Union[str, Sequence[str], None] = 'e5a9c3d17f28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('recipes',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=200), nullable=False),
+    sa.Column('servings', sa.Float(), nullable=False),
+    sa.Column('ingredients', sa.JSON(), nullable=False),
+    sa.Column('calories', sa.Float(), nullable=False),
+    sa.Column('protein_g', sa.Float(), nullable=False),
+    sa.Column('fat_g', sa.Float(), nullable=False),
+    sa.Column('carbs_g', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_recipes_user_id'), 'recipes', ['user_id'], unique=False)
+    op.create_index('uq_recipes_user_name', 'recipes', ['user_id', sa.text('lower(name)')], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_recipes_user_name', table_name='recipes')
+    op.drop_index(op.f('ix_recipes_user_id'), table_name='recipes')
+    op.drop_table('recipes')
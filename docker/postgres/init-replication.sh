@@ -0,0 +1,4 @@
+#!/bin/sh
+# Allow streaming-replication connections so the optional db-replica service can follow this primary
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
@@ -2,6 +2,10 @@ import sys
 
 # sys is used to check command-line arguments to determine whether to run the CLI or the API server.
 # example: `python main.py cli` will run the CLI, while `python main.py` will run the API server.
+# `python main.py import <file> --user-id 1` bulk imports a CSV / JSON Lines food log.
+# `python main.py export --all-users --format parquet` exports every user's log for analysts.
+# `python main.py partitions --archive-before 2025-01` creates/archives monthly food_entries partitions.
+# `python main.py report` builds the weekly reports for every active user (run it from cron).
 
 
 def main():
@@ -10,11 +14,36 @@ def main():
         from App.cli.cli import run_cli
 
         run_cli()
+    elif len(sys.argv) > 1 and sys.argv[1] == "import":
+        from App.cli.importer import run_import
+
+        run_import(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "export":
+        from App.cli.exporter import run_export
+
+        run_export(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "partitions":
+        from App.database.partitions import run_partitions
+
+        run_partitions(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "report":
+        from App.reports.weekly import run_reports_cli
+
+        run_reports_cli(sys.argv[2:])
     else:
         # Lazy imports to speed up CLI startup time
         import uvicorn
 
-        uvicorn.run("App.api:app", host="0.0.0.0", port=8000)
+        from App.config import config
+
+        workers = config.API_WORKERS
+        if workers > 1 and config.TELEGRAM_MODE == "polling":
+            # Only one process may poll getUpdates; webhook mode has no such limit
+            print(
+                "⚠️ TELEGRAM_MODE=polling runs a single worker; use webhook mode to scale out"
+            )
+            workers = 1
+        uvicorn.run("App.api:app", host="0.0.0.0", port=8000, workers=workers)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,306 @@
+import json
+import random
+import re
+import statistics
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+# A handful of foods in FoodData Central's response shapes (per 100 g)
+FAKE_FOODS = [
+    {
+        "fdcId": 1001,
+        "description": "Chicken breast, roasted",
+        "macros": (165, 31.0, 3.6, 0.0),
+        "portions": [("cup", 1, 140.0), ("breast", 1, 172.0)],
+    },
+    {
+        "fdcId": 1002,
+        "description": "Egg, whole, boiled",
+        "macros": (155, 12.6, 10.6, 1.1),
+        "portions": [("large", 1, 50.0), ("cup", 1, 136.0)],
+    },
+    {
+        "fdcId": 1003,
+        "description": "Rice, white, cooked",
+        "macros": (130, 2.7, 0.3, 28.2),
+        "portions": [("cup", 1, 158.0)],
+    },
+    {
+        "fdcId": 1004,
+        "description": "Banana, raw",
+        "macros": (89, 1.1, 0.3, 22.8),
+        "portions": [("medium", 1, 118.0), ("cup", 1, 150.0)],
+    },
+    {
+        "fdcId": 1005,
+        "description": "Avocado, raw",
+        "macros": (160, 2.0, 14.7, 8.5),
+        "portions": [("fruit", 1, 201.0)],
+    },
+]
+_MACRO_IDS = (1008, 1003, 1004, 1005)
+_MACRO_NAMES = {
+    1008: ("Energy", "KCAL"),
+    1003: ("Protein", "G"),
+    1004: ("Total lipid (fat)", "G"),
+    1005: ("Carbohydrate, by difference", "G"),
+}
+
+
+class FakeUSDAServer:
+    """Local stand-in for the FoodData Central API, with injectable latency and failures.
+
+    Serves GET /foods/search and GET /food/<fdc_id> on 127.0.0.1 (random port).
+
+    Args:
+        latency_s: Base latency of every response.
+        slow_rate: Fraction of requests that take `slow_latency_s` instead (tail latency).
+        slow_latency_s: Latency of the slow requests.
+        error_rate: Fraction of requests answered with a 503.
+        quota: Requests served before every response becomes a 429 (None = unlimited).
+    """
+
+    def __init__(
+        self,
+        latency_s: float = 0.01,
+        slow_rate: float = 0.0,
+        slow_latency_s: float = 1.0,
+        error_rate: float = 0.0,
+        quota: Optional[int] = None,
+        seed: int = 7,
+    ) -> None:
+        self.latency_s = latency_s
+        self.slow_rate = slow_rate
+        self.slow_latency_s = slow_latency_s
+        self.error_rate = error_rate
+        self.quota = quota
+        self.down = False  # set True to refuse every request with a 503
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "FakeUSDAServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:  # keep test output quiet
+                pass
+
+            def do_GET(self) -> None:
+                with fake._lock:
+                    fake.requests += 1
+                    served = fake.requests
+                    roll, slow_roll = fake._random.random(), fake._random.random()
+                time.sleep(
+                    fake.slow_latency_s
+                    if slow_roll < fake.slow_rate
+                    else fake.latency_s
+                )
+
+                if fake.quota is not None and served > fake.quota:
+                    return self._reply(
+                        429, {"error": "OVER_RATE_LIMIT"}, {"Retry-After": "3600"}
+                    )
+                if fake.down or roll < fake.error_rate:
+                    return self._reply(503, {"error": "Service Unavailable"})
+
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if url.path.endswith("/foods/search"):
+                    return self._reply(200, fake.search(query.get("query", [""])[0]))
+                match = re.search(r"/food/(\d+)$", url.path)
+                food = match and next(
+                    (f for f in FAKE_FOODS if f["fdcId"] == int(match.group(1))), None
+                )
+                if food:
+                    return self._reply(200, fake.detail(food))
+                return self._reply(404, {"error": "Not found"})
+
+            def _reply(
+                self, status: int, body, headers: Optional[Dict[str, str]] = None
+            ) -> None:
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+    @staticmethod
+    def search(query: str) -> dict:
+        words = query.lower().split()
+        foods = [
+            {
+                "fdcId": f["fdcId"],
+                "description": f["description"],
+                "foodNutrients": [
+                    {
+                        "nutrientId": nid,
+                        "nutrientName": _MACRO_NAMES[nid][0],
+                        "unitName": _MACRO_NAMES[nid][1],
+                        "value": value,
+                    }
+                    for nid, value in zip(_MACRO_IDS, f["macros"])
+                ],
+            }
+            for f in FAKE_FOODS
+            if any(w in f["description"].lower() for w in words)
+        ]
+        return {"totalHits": len(foods), "foods": foods}
+
+    @staticmethod
+    def detail(food: dict) -> dict:
+        return {
+            "fdcId": food["fdcId"],
+            "description": food["description"],
+            "foodNutrients": [
+                {"nutrient": {"id": nid}, "amount": value}
+                for nid, value in zip(_MACRO_IDS, food["macros"])
+            ],
+            "foodPortions": [
+                {"measureUnit": {"name": unit}, "amount": amount, "gramWeight": grams}
+                for unit, amount, grams in food["portions"]
+            ],
+        }
+
+
+# -------------------------------------------
+# SCENARIOS (run from the repo root: python -m scripts.fake_usda)
+# -------------------------------------------
+
+
+def _latencies(client, queries: List[str]) -> Dict[str, float]:
+    times = []
+    for query in queries:
+        started = time.perf_counter()
+        client.search_food(query)
+        times.append(time.perf_counter() - started)
+    times.sort()
+    return {
+        "p50_ms": round(1000 * statistics.median(times)),
+        "p99_ms": round(1000 * times[int(0.99 * (len(times) - 1))]),
+    }
+
+
+def run_scenarios() -> None:
+    from App.MyAgent.clients.usda_api import USDAClient
+    from App.MyAgent.clients.usda_scheduler import RequestScheduler
+
+    cache_dir = tempfile.mkdtemp(prefix="fake_usda_")
+    queries = ["chicken", "egg", "rice", "banana", "avocado"] * 20
+
+    def client_for(
+        server: FakeUSDAServer, name: str, **scheduler_options
+    ) -> USDAClient:
+        options = {"timeout_s": 2.0, "backoff_base_s": 0.01, **scheduler_options}
+        return USDAClient(
+            base_url=server.url,
+            cache_db=f"{cache_dir}/{name}.db",
+            scheduler=RequestScheduler(**options),
+        )
+
+    # 1) Flaky server: jittered retries hide transient 503s
+    with FakeUSDAServer(error_rate=0.3) as server:
+        client = client_for(server, "flaky")
+        ok = sum(isinstance(client.search_food(q), list) for q in queries[:30])
+        print(f"🔁 30% errors → {ok}/30 searches succeeded, {client.scheduler.stats()}")
+
+    # 2) Outage: the breaker opens and searches fall back to the local cache
+    with FakeUSDAServer() as server:
+        client = client_for(server, "outage", failure_threshold=3, reset_timeout_s=60)
+        client.search_food("chicken")
+        client.get_food_portions(1003)
+        server.down = True
+        before = server.requests
+        results = [client.search_food(q) for q in ("chicken", "rice", "banana", "egg")]
+        sources = [
+            r[0].get("source") if isinstance(r, list) and r else r for r in results
+        ]
+        print(
+            f"🛑 Outage → sources {sources}, {server.requests - before} requests reached "
+            f"the server, circuit={client.scheduler.breaker.state}"
+        )
+
+    # 3) Quota: a 429 with a long Retry-After fails fast instead of sleeping for an hour
+    with FakeUSDAServer(quota=3) as server:
+        client = client_for(server, "quota")
+        started = time.perf_counter()
+        results = [client.search_food(q) for q in queries[:6]]
+        print(
+            f"🚦 Quota of 3 → {sum(isinstance(r, list) for r in results)}/6 ok in "
+            f"{time.perf_counter() - started:.2f}s, {client.scheduler.stats()}"
+        )
+
+    # 4) Tail latency: hedging after 100 ms cuts p99 when 5% of requests take 1 s
+    for hedge_after_s in (None, 0.1):
+        with FakeUSDAServer(slow_rate=0.05, slow_latency_s=1.0) as server:
+            # Quota high enough that no request is throttled
+            client = client_for(
+                server,
+                f"hedge_{hedge_after_s}",
+                hedge_after_s=hedge_after_s,
+                hourly_quota=1_000_000,
+            )
+            label = f"after {hedge_after_s}s" if hedge_after_s else "off"
+            print(
+                f"🪃 Hedging {label} → {_latencies(client, queries)}, "
+                f"{client.scheduler.stats()}"
+            )
+
+    # 5) Prefetch: portions of the top hits are cached while the user reads the results
+    with FakeUSDAServer(latency_s=0.3) as server:
+        for prefetch in (False, True):
+            client = client_for(server, f"prefetch_{prefetch}")
+            results = client.search_food("chicken egg")
+            if prefetch:
+                client.prefetch_portions(r["fdc_id"] for r in results[:3])
+            time.sleep(0.5)  # user confirms the match
+            started = time.perf_counter()
+            client.get_food_portions(results[0]["fdc_id"])
+            print(
+                f"📦 Prefetch {'on' if prefetch else 'off'} → confirmation lookup "
+                f"{1000 * (time.perf_counter() - started):.0f} ms"
+            )
+        warm = client_for(server, "warmup").prefetch_portions(
+            [f["fdcId"] for f in FAKE_FOODS] + [9999], wait_for_results=True
+        )
+        print(f"📦 Warm-up prefetch of {len(FAKE_FOODS) + 1} foods → {warm}")
+
+    # 6) Speculation: the search starts while the router (~0.4 s) classifies the message
+    from App.service.speculation import extract_food_candidates
+
+    with FakeUSDAServer(latency_s=0.3) as server:
+        client = client_for(server, "speculation")
+        message = "I had 2 scrambled eggs and a banana for breakfast"
+        client.speculate_search(extract_food_candidates(message))
+        time.sleep(0.4)  # router LLM call
+        for query in ("scrambled eggs", "banana", "toast"):
+            client.search_food(query)
+        print(f"🔮 Speculation → {client.speculation_report()}")
+
+
+if __name__ == "__main__":
+    run_scenarios()
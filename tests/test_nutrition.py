@@ -0,0 +1,74 @@
+import pytest
+
+from App.MyAgent.utils.nutrition import (
+    PortionResolutionError,
+    parse_quantity,
+    resolve_grams,
+)
+
+
+def portions(*labels):
+    return [{"label": label, "gram_weight": grams} for label, grams in labels]
+
+
+# -------------------------------------------
+# PARSING
+# -------------------------------------------
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("1/2 cup rice", (0.5, "cup rice")),
+        ("3/4cup", (0.75, "cup")),
+        ("1.5 cups", (1.5, "cups")),
+        ("2,5 kg", (2.5, "kg")),
+        ("150g", (150.0, "g")),
+        ("Banana", (1.0, "banana")),
+    ],
+)
+def test_parse_quantity(text, expected):
+    assert parse_quantity(text) == expected
+
+
+# -------------------------------------------
+# UNIT → GRAMS RESOLUTION
+# -------------------------------------------
+
+
+def test_mass_units_need_no_portions():
+    assert resolve_grams(2, "ounces") == pytest.approx(56.699)
+
+
+@pytest.mark.parametrize(
+    "unit, label",
+    [
+        ("tablespoons", "1 tbsp"),
+        ("tbsp", "1 tablespoon"),
+        ("Tbs.", "1 tbsp"),
+    ],
+)
+def test_spoon_synonyms_match_usda_portions(unit, label):
+    assert resolve_grams(2, unit, portions((label, 15.0))) == 30.0
+
+
+def test_teaspoon_matches_tsp_portion():
+    assert resolve_grams(1, "teaspoon", portions(("1 tsp", 5.0))) == 5.0
+
+
+def test_volume_is_checked_before_word_matching():
+    assert resolve_grams(1, "l", portions(("1 large", 50.0))) == 1000.0
+
+
+def test_count_units_use_the_typical_portion():
+    labels = portions(("1 small", 38.0), ("1 large", 50.0), ("1 medium", 44.0))
+    assert resolve_grams(2, "eggs", labels) == 88.0
+
+
+def test_es_plurals_are_singularized():
+    assert resolve_grams(2, "tomatoes", portions(("1 tomato", 120.0))) == 240.0
+
+
+def test_unmatched_measure_raises():
+    with pytest.raises(PortionResolutionError):
+        resolve_grams(1, "cup", portions(("1 large", 50.0)))